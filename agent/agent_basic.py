@@ -1,25 +1,18 @@
 import os
 import openai
 
+from qianfan_client import QianfanClient
+
 bce_api_key = os.environ.get('QIANFAN_API_KEY')
+# 所有 ask_llm 调用共用一个连接池，不必每次重新建连 / TLS 握手
+llm_client = QianfanClient(bce_api_key)
 
 # 工具函数：模拟一个天气查询
 def get_weather(city):
     return f"当前 {city} 的天气是 25°C，晴朗。"
 
 def ask_llm(content):
-    import requests
-    url = "https://qianfan.baidubce.com/v2/chat/completions"
-    headers = {
-        "Content-Type": "application/json",
-        "Authorization": f"Bearer {bce_api_key}"
-    }
-    data = {
-        "model": "ernie-3.5-8k",
-        "messages": [{"role": "user", "content": content}]
-    }
-    response = requests.post(url=url, headers=headers, json=data)
-    return response.json()
+    return llm_client.chat([{"role": "user", "content": content}])
 
 # Agent 主体
 def simple_agent(user_input):
@@ -6,29 +6,28 @@ from langchain.agents import (AgentType, Tool, initialize_agent)
 # from langchain.agents import Tool
 # from langchain.agents import initialize_agent
 from langchain.tools import tool
-from langchain_core.callbacks import CallbackManagerForLLMRun
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
 from langchain_core.language_models.chat_models import BaseChatModel
 from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
 from langchain_core.outputs import ChatResult, ChatGeneration
 
+from qianfan_client import QianfanClient, chat_text
+
 
 class QianfanChatModel(BaseChatModel):
     def __init__(self, model_url: str, api_key: str, **kwargs):
         super().__init__()
         self._api_key = api_key 
         self._model_url = model_url
+        # 同步 / 异步调用共用的连接池；kwargs (read_timeout、retries、pool_size 等) 传给 QianfanClient
+        self._client = QianfanClient(api_key=api_key, url=model_url, **kwargs)
 
     @property
     def _llm_type(self) -> str:
         return "qianfan-chat"
 
-    def _generate(
-        self,
-        messages: List[Any],
-        stop: Optional[List[str]] = None,
-        run_manager: Optional[CallbackManagerForLLMRun] = None,
-        **kwargs: Any,
-    ) -> ChatResult:
+    @staticmethod
+    def _to_qianfan_messages(messages: List[Any]) -> List[dict]:
         qianfan_messages = []
         for msg in messages:
             if isinstance(msg, SystemMessage):
@@ -39,23 +38,39 @@ class QianfanChatModel(BaseChatModel):
                 qianfan_messages.append({"role": "assistant", "content": msg.content})
             else:
                 raise ValueError(f"Unsupported message type: {msg}")
-        headers = {
-            "Authorization": f"Bearer {self._api_key}",
-            "Content-Type": "application/json"
-        }
-        payload = {
-            "model": "ernie-3.5-8k",
-            "messages": qianfan_messages       
-        }
-        import requests
-        response = requests.post(self._model_url, json=payload, headers=headers, timeout=60)
-        response.raise_for_status()
-        result = response.json()
-        print(result)
-        text = result['choices'][0]['message']['content'].strip()
+        return qianfan_messages
+
+    @staticmethod
+    def _request_params(stop: Optional[List[str]], kwargs: dict) -> dict:
+        # stop 和 bind() 进来的其他参数 (temperature 等) 原样放进请求体
+        params = dict(kwargs)
+        if stop:
+            params["stop"] = stop
+        return params
+
+    def _generate(
+        self,
+        messages: List[Any],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        result = self._client.chat(self._to_qianfan_messages(messages), **self._request_params(stop, kwargs))
+        return ChatResult(
+            generations=[ChatGeneration(message=AIMessage(content=chat_text(result)))]
+        )
 
+    async def _agenerate(
+        self,
+        messages: List[Any],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        # 不占用线程：同一个事件循环里的多个 ainvoke 共用 AsyncClient 的连接池并发执行
+        result = await self._client.achat(self._to_qianfan_messages(messages), **self._request_params(stop, kwargs))
         return ChatResult(
-            generations=[ChatGeneration(message=AIMessage(content=text))]
+            generations=[ChatGeneration(message=AIMessage(content=chat_text(result)))]
         )
 
 
@@ -0,0 +1,192 @@
+"""
+千帆 chat completions 的共享 HTTP 客户端。
+
+同步调用走一个 requests.Session：连接池保持 keep-alive，连续请求不再每次重新 TLS 握手；
+连接失败、429 和 5xx 由 urllib3 的 Retry 按指数退避重试 (遵守 Retry-After)。
+请求已经发出后的读超时 / 断连不重试：chat completions 不是幂等的，重发可能被计费两次。
+异步调用 (achat) 走 httpx.AsyncClient，连接池上限相同，重试策略相同，
+一个事件循环里可以同时挂着多个请求:
+
+    client = QianfanClient(os.environ['QIANFAN_API_KEY'])
+    result = client.chat([{"role": "user", "content": "你好"}])
+    results = await asyncio.gather(*(client.achat(m) for m in batch))
+
+httpx 只在第一次 achat 时导入 (openai / langchain 已经依赖它)。
+"""
+import asyncio
+import os
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+QIANFAN_CHAT_URL = "https://qianfan.baidubce.com/v2/chat/completions"
+DEFAULT_MODEL = "ernie-3.5-8k"
+RETRY_STATUS = (429, 500, 502, 503, 504)
+MAX_BACKOFF = 30.0
+
+
+class _Retry(Retry):
+    """
+    urllib3 的 Retry 在第一次重试前不等待，且 (1.x) 没有退避上限。这里改成与 achat 相同的
+    backoff_factor * 2**(n-1)，退避和 Retry-After 都不超过 MAX_BACKOFF。
+    """
+    def get_backoff_time(self):
+        consecutive_errors = 0
+        for entry in reversed(self.history):
+            if entry.redirect_location is not None:
+                break
+            consecutive_errors += 1
+        if not consecutive_errors:
+            return 0
+        return min(self.backoff_factor * (2 ** (consecutive_errors - 1)), MAX_BACKOFF)
+
+    def parse_retry_after(self, retry_after):
+        return min(super().parse_retry_after(retry_after), MAX_BACKOFF)
+
+
+def _httpx():
+    try:
+        import httpx
+    except ImportError:
+        raise ImportError("QianfanClient.achat() requires httpx (pip install httpx)") from None
+    return httpx
+
+
+class QianfanClient:
+    """
+    Args:
+        api_key (str): 千帆 API key，默认取环境变量 QIANFAN_API_KEY。
+        url (str): chat completions 接口地址。
+        model (str): 默认模型，chat() / achat() 可以单独指定。
+        connect_timeout / read_timeout (float): 建连超时和等待响应超时 (秒)。
+        retries (int): 建连失败或返回 RETRY_STATUS 时的最大重试次数 (读超时不重试)。
+        backoff (float): 第 n 次重试前等待 backoff * 2**(n-1) 秒 (不超过 MAX_BACKOFF)；
+            响应带 Retry-After 时按它等待 (同样不超过 MAX_BACKOFF)。
+        pool_size (int): 连接池大小，也就是同时在途请求数的上限。
+    """
+    def __init__(self, api_key=None, url=QIANFAN_CHAT_URL, model=DEFAULT_MODEL, connect_timeout=5.0,
+                 read_timeout=60.0, retries=3, backoff=0.5, pool_size=32):
+        self.api_key = api_key if api_key is not None else os.environ.get('QIANFAN_API_KEY')
+        self.url = url
+        self.model = model
+        self.timeout = (connect_timeout, read_timeout)
+        self.retries = retries
+        self.backoff = backoff
+        self.pool_size = pool_size
+        self.headers = {
+            "Content-Type": "application/json",
+            "Authorization": f"Bearer {self.api_key}",
+        }
+        self._session = None
+        self._async_client = None
+
+    @property
+    def session(self):
+        if self._session is None:
+            retry = _Retry(total=self.retries, connect=self.retries, read=0, status=self.retries,
+                          status_forcelist=RETRY_STATUS, allowed_methods=frozenset({'POST'}),
+                          backoff_factor=self.backoff, respect_retry_after_header=True, raise_on_status=False)
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size, max_retries=retry)
+            session = requests.Session()
+            session.headers.update(self.headers)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            self._session = session
+        return self._session
+
+    def _payload(self, messages, model, params):
+        payload = {"model": model or self.model, "messages": messages}
+        payload.update(params)
+        return payload
+
+    def chat(self, messages, model=None, **params):
+        """
+        同步调用。
+        Args:
+            messages (list): [{"role": ..., "content": ...}, ...]
+            model (str): 覆盖默认模型。
+            **params: 其他请求字段 (temperature, stop 等)，原样放进请求体。
+        Returns:
+            dict: 接口返回的 JSON。重试用尽后仍失败时抛出 requests.HTTPError / requests.RequestException。
+        """
+        response = self.session.post(self.url, json=self._payload(messages, model, params), timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+
+    def _get_async_client(self):
+        if self._async_client is None:
+            httpx = _httpx()
+            connect_timeout, read_timeout = self.timeout
+            self._async_client = httpx.AsyncClient(
+                headers=self.headers,
+                timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+                limits=httpx.Limits(max_connections=self.pool_size, max_keepalive_connections=self.pool_size))
+        return self._async_client
+
+    async def achat(self, messages, model=None, **params):
+        """
+        异步调用，参数和返回值同 chat()。AsyncClient 绑定在第一次调用时所在的事件循环上。
+        重试用尽后仍失败时抛出 httpx.HTTPStatusError / httpx.TransportError。
+        与 chat() 一样只在建连失败和 RETRY_STATUS 时重试。
+        """
+        httpx = _httpx()
+        client = self._get_async_client()
+        payload = self._payload(messages, model, params)
+        attempt = 0
+        while True:
+            try:
+                response = await client.post(self.url, json=payload)
+            except (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout):
+                # 请求还没有发出去，可以安全重试；其余 TransportError 直接抛出
+                if attempt >= self.retries:
+                    raise
+                delay = self._backoff_delay(attempt)
+            else:
+                if response.status_code not in RETRY_STATUS or attempt >= self.retries:
+                    response.raise_for_status()
+                    return response.json()
+                delay = _retry_after(response) or self._backoff_delay(attempt)
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    def _backoff_delay(self, attempt):
+        return min(self.backoff * (2 ** attempt), MAX_BACKOFF)
+
+    def close(self):
+        if self._session is not None:
+            self._session.close()
+            self._session = None
+
+    async def aclose(self):
+        if self._async_client is not None:
+            await self._async_client.aclose()
+            self._async_client = None
+        self.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.aclose()
+
+
+def _retry_after(response):
+    value = response.headers.get('Retry-After')
+    try:
+        return min(float(value), MAX_BACKOFF) if value else None
+    except ValueError:
+        return None # HTTP-date 格式的 Retry-After 按普通退避处理
+
+
+def chat_text(result):
+    """
+    取出 chat completions 返回里第一条回复的文本。
+    """
+    return result['choices'][0]['message']['content'].strip()
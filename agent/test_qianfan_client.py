@@ -0,0 +1,157 @@
+"""
+QianfanClient 的重试逻辑测试，不访问网络：
+achat 用 httpx.MockTransport 返回预设的响应；chat 连本机一个按脚本回复的 HTTP 服务。
+
+    python -m unittest test_qianfan_client      (在 agent/ 目录下)
+"""
+import json
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+import httpx
+from urllib3.util.retry import RequestHistory
+
+import qianfan_client
+from qianfan_client import MAX_BACKOFF, QianfanClient, _Retry, _retry_after, chat_text
+
+MESSAGES = [{"role": "user", "content": "你好"}]
+OK_BODY = {"choices": [{"message": {"role": "assistant", "content": " 你好！ "}}]}
+
+
+class _Script:
+    """
+    按顺序返回预设响应的 MockTransport handler，记录收到的请求。
+    响应项为 (status, headers) 或要抛出的异常。
+    """
+    def __init__(self, *steps):
+        self.steps = list(steps)
+        self.requests = []
+
+    def __call__(self, request):
+        self.requests.append(request)
+        step = self.steps.pop(0)
+        if isinstance(step, Exception):
+            raise step
+        status, headers = step
+        return httpx.Response(status, headers=headers, json=OK_BODY if status == 200 else {"error": status})
+
+
+class AchatRetryTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.delays = []
+
+        async def fake_sleep(delay):
+            self.delays.append(delay)
+
+        patcher = mock.patch.object(qianfan_client.asyncio, 'sleep', fake_sleep)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def _achat(self, script, retries=3, **params):
+        client = QianfanClient('test-key', url='https://qianfan.test/v2/chat/completions', retries=retries, backoff=0.5)
+        client._async_client = httpx.AsyncClient(transport=httpx.MockTransport(script), headers=client.headers)
+        try:
+            return await client.achat(MESSAGES, **params)
+        finally:
+            await client.aclose()
+
+    async def test_retries_429_then_succeeds(self):
+        script = _Script((429, {}), (200, {}))
+        result = await self._achat(script, temperature=0.1, stop=["\n"])
+        self.assertEqual(chat_text(result), "你好！")
+        self.assertEqual(len(script.requests), 2)
+        self.assertEqual(self.delays, [0.5])
+        body = json.loads(script.requests[-1].content)
+        self.assertEqual(body["model"], "ernie-3.5-8k")
+        self.assertEqual(body["stop"], ["\n"])
+        self.assertEqual(script.requests[-1].headers["Authorization"], "Bearer test-key")
+
+    async def test_retry_after_header_overrides_backoff(self):
+        script = _Script((503, {"Retry-After": "2"}), (429, {"Retry-After": "3600"}), (200, {}))
+        await self._achat(script)
+        self.assertEqual(self.delays, [2.0, MAX_BACKOFF])
+
+    async def test_exponential_backoff_then_gives_up(self):
+        script = _Script((500, {}), (502, {}), (503, {}), (504, {}))
+        with self.assertRaises(httpx.HTTPStatusError):
+            await self._achat(script)
+        self.assertEqual(len(script.requests), 4)
+        self.assertEqual(self.delays, [0.5, 1.0, 2.0])
+
+    async def test_connect_error_is_retried(self):
+        script = _Script(httpx.ConnectError("refused"), (200, {}))
+        await self._achat(script)
+        self.assertEqual(len(script.requests), 2)
+
+    async def test_read_timeout_is_not_retried(self):
+        script = _Script(httpx.ReadTimeout("slow"), (200, {}))
+        with self.assertRaises(httpx.ReadTimeout):
+            await self._achat(script)
+        self.assertEqual(len(script.requests), 1)
+
+    async def test_client_error_is_not_retried(self):
+        script = _Script((400, {}), (200, {}))
+        with self.assertRaises(httpx.HTTPStatusError):
+            await self._achat(script)
+        self.assertEqual(len(script.requests), 1)
+
+
+class RetryAfterTest(unittest.TestCase):
+    def test_parse(self):
+        self.assertEqual(_retry_after(httpx.Response(429, headers={"Retry-After": "1.5"})), 1.5)
+        self.assertEqual(_retry_after(httpx.Response(429, headers={"Retry-After": "999"})), MAX_BACKOFF)
+        self.assertIsNone(_retry_after(httpx.Response(429)))
+        self.assertIsNone(_retry_after(httpx.Response(429, headers={"Retry-After": "Wed, 21 Oct 2015 07:28:00 GMT"})))
+
+
+class SyncRetryTest(unittest.TestCase):
+    def test_backoff_matches_achat(self):
+        client = QianfanClient('k', backoff=0.5)
+        for n in range(1, 9):
+            history = tuple(RequestHistory('POST', '/', None, 503, None) for _ in range(n))
+            retry = _Retry(total=10, backoff_factor=0.5, history=history)
+            self.assertEqual(retry.get_backoff_time(), client._backoff_delay(n - 1))
+        self.assertEqual(_Retry().parse_retry_after("3600"), MAX_BACKOFF)
+
+    def test_chat_retries_over_keep_alive_session(self):
+        statuses = [429, 503, 200]
+        seen = []
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                seen.append((json.loads(self.rfile.read(int(self.headers["Content-Length"]))),
+                             self.client_address))
+                status = statuses.pop(0)
+                body = json.dumps(OK_BODY if status == 200 else {"error": status}).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.send_header("Retry-After", "0")
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            with QianfanClient('k', url=f'http://127.0.0.1:{server.server_port}/v2/chat/completions',
+                               backoff=0) as client:
+                self.assertEqual(chat_text(client.chat(MESSAGES, stop=["x"])), "你好！")
+        finally:
+            server.shutdown()
+            server.server_close()
+        self.assertEqual(len(seen), 3)
+        self.assertEqual(seen[0][0]["stop"], ["x"])
+        # 三次请求走的是同一个 keep-alive 连接
+        self.assertEqual(len({address for _, address in seen}), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
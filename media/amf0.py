@@ -0,0 +1,6 @@
+"""
+兼容入口：AMF0 编解码已移到 rtmp_video.amf0，这里保留旧的导入路径。
+"""
+from rtmp_video.amf0 import (AMF0_BOOLEAN, AMF0_DATE, AMF0_ECMA_ARRAY, AMF0_LONG_STRING, AMF0_NULL, AMF0_NUMBER,
+                             AMF0_OBJECT, AMF0_OBJECT_END, AMF0_REFERENCE, AMF0_STRICT_ARRAY, AMF0_STRING,
+                             AMF0_UNDEFINED, AMF0Error, decode_amf0, decode_amf0_all, encode_amf0)
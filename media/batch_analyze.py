@@ -0,0 +1,189 @@
+"""
+批量分析 RTMP/FLV 录制文件。
+
+用法: python batch_analyze.py [-j 进程数] [-f json|csv] [-o 输出文件] 文件或目录 ...
+
+每个文件在独立进程中用 rtmp_video.flv.parse_flv_file 解析，汇总出编码、分辨率、帧率、
+GOP 统计和错误数，最后合并成一份 JSON / CSV 报告。文件按大小从大到小提交，
+最耗时的任务最先开始，避免最后只剩一个大文件在单核上跑。
+"""
+import argparse
+import csv
+import fnmatch
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from rtmp_video.flv import parse_flv_file
+from rtmp_video.h264 import SPS_CACHE
+
+SUMMARY_FIELDS = (
+    'file', 'size', 'codec', 'width', 'height', 'fps', 'declared_fps', 'duration_ms',
+    'video_frames', 'keyframes', 'gop_min', 'gop_max', 'gop_avg', 'gop_tail', 'sequence_headers',
+    'error_count', 'error',
+)
+
+
+def summarize_file(path):
+    """
+    解析单个文件并返回汇总信息。在 worker 进程中执行。
+    Args:
+        path (str): FLV 文件 (或单个 RTMP VideoData body) 的路径。
+    Returns:
+        dict: 字段见 SUMMARY_FIELDS。解析过程抛出异常时 'error' 为异常信息。
+              gop_min / gop_max / gop_avg 只统计完整的 GOP；最后一个关键帧之后的帧数 (录制截断处
+              不完整的 GOP) 单独记在 gop_tail。
+    """
+    summary = dict.fromkeys(SUMMARY_FIELDS)
+    summary.update(file=path, size=os.path.getsize(path), video_frames=0, keyframes=0,
+                   sequence_headers=0, error_count=0)
+    gops = []
+    frames_since_key = None
+    first_ts = last_ts = None
+
+    try:
+        for tag, parsed in parse_flv_file(path):
+            if parsed is None:
+                summary['error_count'] += 1
+                continue
+            summary['error_count'] += len(parsed.errors)
+            summary['codec'] = parsed.codec_id_str
+
+            if tag is not None:
+                if first_ts is None:
+                    first_ts = tag['timestamp']
+                last_ts = tag['timestamp']
+
+            if parsed.avc_packet_type == 0:
+                summary['sequence_headers'] += 1
+                sps = None
+                if parsed.avc_decoder_config_record and parsed.avc_decoder_config_record['sps_nalus']:
+                    sps = SPS_CACHE.parse(parsed.avc_decoder_config_record['sps_nalus'][0])
+                    if sps is not None:
+                        summary['width'], summary['height'] = sps.cropped_width, sps.cropped_height
+                elif parsed.hevc_decoder_config_record and parsed.hevc_decoder_config_record['sps_nalus']:
+                    from rtmp_video.hevc import HEVC_SPS_CACHE
+                    sps = HEVC_SPS_CACHE.parse(parsed.hevc_decoder_config_record['sps_nalus'][0])
+                    if sps is not None:
+                        summary['width'], summary['height'] = sps.width, sps.height
+                if sps is not None:
+                    summary['declared_fps'] = sps.frame_rate
+                continue
+            if parsed.avc_packet_type != 1:
+                continue
+
+            summary['video_frames'] += 1
+            if parsed.frame_type == 1:
+                summary['keyframes'] += 1
+                if frames_since_key is not None:
+                    gops.append(frames_since_key)
+                frames_since_key = 1
+            elif frames_since_key is not None:
+                frames_since_key += 1
+    except Exception as e:
+        summary['error'] = f"{type(e).__name__}: {e}"
+
+    if frames_since_key is not None:
+        summary['gop_tail'] = frames_since_key
+    if gops:
+        summary['gop_min'] = min(gops)
+        summary['gop_max'] = max(gops)
+        summary['gop_avg'] = round(sum(gops) / len(gops), 2)
+    if first_ts is not None:
+        summary['duration_ms'] = last_ts - first_ts
+        if last_ts > first_ts and summary['video_frames'] > 1:
+            summary['fps'] = round((summary['video_frames'] - 1) * 1000.0 / (last_ts - first_ts), 3)
+    if summary['fps'] is None:
+        summary['fps'] = summary['declared_fps']
+    return summary
+
+
+def collect_files(inputs, pattern="*.flv"):
+    """
+    展开输入参数：文件直接使用，目录递归查找匹配 pattern 的文件。
+    同一个文件 (按 os.path.realpath 判断) 被多次给出或同时经由目录匹配到时只保留第一次出现的路径。
+    """
+    files = []
+    seen = set()
+
+    def add(path):
+        real = os.path.realpath(path)
+        if real not in seen:
+            seen.add(real)
+            files.append(path)
+
+    for item in inputs:
+        if os.path.isdir(item):
+            for root, _, names in os.walk(item):
+                for name in fnmatch.filter(names, pattern):
+                    add(os.path.join(root, name))
+        elif os.path.isfile(item):
+            add(item)
+        else:
+            print(f"Warning: {item} does not exist, skipped.", file=sys.stderr)
+    return files
+
+
+def run_batch(files, workers=None):
+    """
+    用进程池并行分析 files，按文件大小从大到小提交。
+    Returns:
+        list: 每个文件一条汇总，顺序与输入文件顺序一致。
+    """
+    ordered = sorted(files, key=os.path.getsize, reverse=True)
+    summaries = {}
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(summarize_file, path): path for path in ordered}
+        for future in as_completed(futures):
+            path = futures[future]
+            try:
+                summaries[path] = future.result()
+            except Exception as e: # worker 进程崩溃等
+                summaries[path] = dict.fromkeys(SUMMARY_FIELDS)
+                summaries[path].update(file=path, error=f"{type(e).__name__}: {e}")
+    return [summaries[path] for path in files]
+
+
+def write_report(summaries, out, fmt):
+    if fmt == 'csv':
+        writer = csv.DictWriter(out, fieldnames=SUMMARY_FIELDS)
+        writer.writeheader()
+        writer.writerows(summaries)
+    else:
+        totals = {
+            'files': len(summaries),
+            'failed_files': sum(1 for s in summaries if s['error']),
+            'bytes': sum(s['size'] or 0 for s in summaries),
+            'video_frames': sum(s['video_frames'] or 0 for s in summaries),
+            'error_count': sum(s['error_count'] or 0 for s in summaries),
+        }
+        json.dump({'totals': totals, 'files': summaries}, out, indent=2, ensure_ascii=False)
+        out.write("\n")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Analyze many RTMP/FLV captures in parallel.")
+    parser.add_argument("inputs", nargs="+", help="capture files or directories")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("-f", "--format", choices=("json", "csv"), default="json")
+    parser.add_argument("-o", "--output", help="report file (default: stdout)")
+    parser.add_argument("--pattern", default="*.flv", help="file pattern used inside directories (default: *.flv)")
+    args = parser.parse_args(argv)
+
+    files = collect_files(args.inputs, args.pattern)
+    if not files:
+        print("No capture files found.", file=sys.stderr)
+        return 1
+    summaries = run_batch(files, args.jobs)
+
+    if args.output:
+        with open(args.output, "w", newline="") as out:
+            write_report(summaries, out, args.format)
+    else:
+        write_report(summaries, sys.stdout, args.format)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
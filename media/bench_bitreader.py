@@ -0,0 +1,110 @@
+"""
+对比逐比特 BitReader 与缓存字 BitReader 在 SPS / slice header 上的解析耗时。
+
+用法: python bench_bitreader.py [次数]
+"""
+import sys
+import timeit
+
+from rtmp_video.bitreader import BitReader
+from rtmp_video.h264 import parse_h264_sps
+
+# 1920x1080 High Profile SPS (x264 输出)
+SPS_1080P = bytes.fromhex(
+    "6764002aacd940780227e5c044000003000400000300f03c60c658")
+# IDR / P slice header 开头若干字节 (nal header 之后)
+SLICE_HEADERS = [
+    bytes.fromhex("888400337ffe0ff6e2b7"),
+    bytes.fromhex("9a3c44a0fe0b52e3c810"),
+    bytes.fromhex("9e5b6a42bf00d20c0a7b"),
+]
+
+
+class LegacyBitReader:
+    """旧的逐比特实现，仅用于对比。"""
+    def __init__(self, data):
+        self.data = data
+        self.byte_pos = 0
+        self.bit_pos = 0
+
+    def read_bit(self):
+        if self.byte_pos >= len(self.data):
+            raise IndexError("End of data reached while reading bit.")
+        byte = self.data[self.byte_pos]
+        bit = (byte >> (7 - self.bit_pos)) & 0x01
+        self.bit_pos += 1
+        if self.bit_pos == 8:
+            self.bit_pos = 0
+            self.byte_pos += 1
+        return bit
+
+    def read_bits(self, num_bits):
+        result = 0
+        for _ in range(num_bits):
+            result = (result << 1) | self.read_bit()
+        return result
+
+    def read_ue(self):
+        leading_zeros = 0
+        while self.read_bit() == 0 and self.byte_pos < len(self.data):
+            leading_zeros += 1
+        if leading_zeros == 0:
+            return 0
+        return (1 << leading_zeros) - 1 + self.read_bits(leading_zeros)
+
+    def read_se(self):
+        val = self.read_ue()
+        return (val + 1) // 2 if val % 2 else -(val // 2)
+
+
+def read_sps_fields(reader_cls, data):
+    r = reader_cls(data)
+    r.read_bits(8); r.read_bits(8); r.read_bits(8)  # profile / constraint / level
+    r.read_ue()                                     # sps_id
+    r.read_ue(); r.read_ue(); r.read_ue(); r.read_bit(); r.read_bit()
+    r.read_ue(); r.read_ue(); r.read_ue()           # log2_max_frame_num, poc type, poc lsb
+    r.read_ue(); r.read_bit()                       # num_ref_frames, gaps
+    return r.read_ue(), r.read_ue()                 # width / height in mbs
+
+
+def read_slice_header(reader_cls, data):
+    r = reader_cls(data)
+    first_mb = r.read_ue()
+    slice_type = r.read_ue()
+    pps_id = r.read_ue()
+    frame_num = r.read_bits(4)
+    poc_lsb = r.read_bits(6)
+    return first_mb, slice_type, pps_id, frame_num, poc_lsb
+
+
+def bench(label, func, number):
+    cost = min(timeit.repeat(func, number=number, repeat=5)) / number
+    print(f"  {label:<28} {cost * 1e6:8.2f} us/op")
+    return cost
+
+
+def main():
+    number = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    sps_rbsp = SPS_1080P[1:]
+
+    for reader_cls in (LegacyBitReader, BitReader):
+        assert read_sps_fields(reader_cls, sps_rbsp) == read_sps_fields(BitReader, sps_rbsp)
+        for header in SLICE_HEADERS:
+            assert read_slice_header(reader_cls, header) == read_slice_header(BitReader, header)
+
+    print("--- SPS fields ---")
+    old = bench("LegacyBitReader", lambda: read_sps_fields(LegacyBitReader, sps_rbsp), number)
+    new = bench("BitReader", lambda: read_sps_fields(BitReader, sps_rbsp), number)
+    print(f"  speedup: {old / new:.2f}x")
+
+    print("--- slice headers ---")
+    old = bench("LegacyBitReader", lambda: [read_slice_header(LegacyBitReader, h) for h in SLICE_HEADERS], number)
+    new = bench("BitReader", lambda: [read_slice_header(BitReader, h) for h in SLICE_HEADERS], number)
+    print(f"  speedup: {old / new:.2f}x")
+
+    print("--- parse_h264_sps ---")
+    bench("parse_h264_sps", lambda: parse_h264_sps(SPS_1080P), number)
+
+
+if __name__ == "__main__":
+    main()
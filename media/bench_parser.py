@@ -0,0 +1,488 @@
+"""
+解析器基准测试与性能回归检查。
+
+输入全部由 BitWriter 现场生成 (SPS/PPS 带 VUI、裁剪、High/High 10 profile、隔行、
+scaling list、HRD、bitstream_restriction、slice group，AVCDecoderConfigurationRecord，以及不同大小的多 NALU VideoData)，生成后先用解析器回读校验，
+保证测的是合法码流。
+
+用法: python bench_parser.py [-o results.json] [--baseline baseline.json] [--threshold 0.25] [-k 名称子串]
+      结果比 baseline 慢超过 threshold (默认 25%) 的项会被列出，并以退出码 1 结束。
+      baseline 默认是同目录下提交的 bench_parser_baseline.json (--no-baseline 不比较)；
+      换了机器或 Python 版本时用 python bench_parser.py -o bench_parser_baseline.json 重新生成并提交。
+      完整语法的 SPS 与旧的部分解析能覆盖的 SPS 之间的开销比超过 OVERHEAD_LIMITS 时同样以退出码 1 结束。
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import struct
+import sys
+import timeit
+
+from rtmp_video.bitreader import BitReader
+from rtmp_video.h264 import (VideoStreamContext, parse_avc_decoder_configuration_record, parse_h264_pps,
+                             parse_h264_sps, parse_nalu_data, parse_rtmp_video_data)
+
+
+class BitWriter:
+    """
+    BitReader 的逆操作：按 bit 写入定长字段和 Exp-Golomb 编码。
+    """
+    def __init__(self):
+        self._value = 0
+        self._bits = 0
+
+    def write_bits(self, value, num_bits):
+        self._value = (self._value << num_bits) | (value & ((1 << num_bits) - 1))
+        self._bits += num_bits
+
+    def write_bit(self, value):
+        self.write_bits(value, 1)
+
+    def write_ue(self, value):
+        code_num = value + 1
+        length = code_num.bit_length()
+        self.write_bits(code_num, 2 * length - 1) # length-1 个前导 0，再是 code_num 本身
+
+    def write_se(self, value):
+        self.write_ue(2 * value - 1 if value > 0 else -2 * value)
+
+    def write_trailing_bits(self):
+        # rbsp_stop_one_bit + rbsp_alignment_zero_bit
+        self.write_bit(1)
+        if self._bits % 8:
+            self.write_bits(0, 8 - self._bits % 8)
+
+    def to_bytes(self):
+        padded = self._bits + (-self._bits) % 8
+        return (self._value << (padded - self._bits)).to_bytes(padded // 8, 'big')
+
+
+def add_emulation_prevention(rbsp):
+    """
+    RBSP -> NALU 负载：在 0x0000 之后、0x00~0x03 之前插入 0x03。
+    """
+    out = bytearray()
+    zeros = 0
+    for byte in rbsp:
+        if zeros >= 2 and byte <= 3:
+            out.append(3)
+            zeros = 0
+        out.append(byte)
+        zeros = zeros + 1 if byte == 0 else 0
+    return bytes(out)
+
+
+def _write_scaling_list(w, values):
+    last_scale = 8
+    for value in values:
+        delta = (value - last_scale + 128) % 256 - 128 # 映射到 [-128, 127]
+        w.write_se(delta)
+        last_scale = value
+
+
+def _write_hrd(w, bit_rate, cpb_size):
+    w.write_ue(0) # cpb_cnt_minus1
+    w.write_bits(0, 4) # bit_rate_scale
+    w.write_bits(0, 4) # cpb_size_scale
+    w.write_ue(bit_rate // 64 - 1)
+    w.write_ue(cpb_size // 16 - 1)
+    w.write_bit(0) # cbr_flag
+    for _ in range(4):
+        w.write_bits(23, 5) # *_length_minus1, time_offset_length
+
+
+def make_sps(width, height, profile_idc=100, level_idc=40, fps=30, sps_id=0, frame_mbs_only=1,
+             bit_depth=8, poc_type=0, vui=True, sar=None, scaling_matrix=False, hrd=False, max_num_reorder_frames=None):
+    """
+    生成 SPS NALU (含 0x67 header)。宽高不是 16 的倍数时写入 frame cropping。
+    scaling_matrix 写入 8 个显式 scaling list (第 2 个用 useDefaultScalingMatrixFlag)；
+    hrd 写入 NAL/VCL HRD 参数；max_num_reorder_frames 不为 None 时写入 bitstream_restriction。
+    """
+    w = BitWriter()
+    w.write_bits(profile_idc, 8)
+    w.write_bits(0, 8) # constraint flags + reserved_zero_2bits
+    w.write_bits(level_idc, 8)
+    w.write_ue(sps_id)
+    if profile_idc in (100, 110, 122, 244, 44, 83, 86, 118, 128, 138, 139, 134, 135):
+        w.write_ue(1) # chroma_format_idc 4:2:0
+        w.write_ue(bit_depth - 8)
+        w.write_ue(bit_depth - 8)
+        w.write_bit(0) # qpprime_y_zero_transform_bypass_flag
+        w.write_bit(1 if scaling_matrix else 0) # seq_scaling_matrix_present_flag
+        if scaling_matrix:
+            for i in range(8):
+                w.write_bit(1)
+                if i == 1:
+                    w.write_se(-8) # nextScale = 0 -> useDefaultScalingMatrixFlag
+                else:
+                    _write_scaling_list(w, [16 + (j * 3 + i) % 40 for j in range(16 if i < 6 else 64)])
+    w.write_ue(0) # log2_max_frame_num_minus4
+    w.write_ue(poc_type)
+    if poc_type == 0:
+        w.write_ue(2) # log2_max_pic_order_cnt_lsb_minus4
+    elif poc_type == 1:
+        w.write_bit(0)
+        w.write_se(-2)
+        w.write_se(0)
+        w.write_ue(2)
+        w.write_se(2)
+        w.write_se(2)
+    w.write_ue(4) # num_ref_frames
+    w.write_bit(0)
+
+    map_unit_height = 16 * (2 - frame_mbs_only)
+    width_mbs = (width + 15) // 16
+    height_map_units = (height + map_unit_height - 1) // map_unit_height
+    w.write_ue(width_mbs - 1)
+    w.write_ue(height_map_units - 1)
+    w.write_bit(frame_mbs_only)
+    if not frame_mbs_only:
+        w.write_bit(0) # mb_adaptive_frame_field_flag
+    w.write_bit(1) # direct_8x8_inference_flag
+
+    crop_right = (width_mbs * 16 - width) // 2
+    crop_bottom = (height_map_units * map_unit_height - height) // (2 * (2 - frame_mbs_only))
+    if crop_right or crop_bottom:
+        w.write_bit(1)
+        for offset in (0, crop_right, 0, crop_bottom):
+            w.write_ue(offset)
+    else:
+        w.write_bit(0)
+
+    w.write_bit(1 if vui else 0)
+    if vui:
+        if sar is not None:
+            w.write_bit(1)
+            w.write_bits(255, 8)
+            w.write_bits(sar[0], 16)
+            w.write_bits(sar[1], 16)
+        else:
+            w.write_bit(1)
+            w.write_bits(1, 8) # 1:1
+        w.write_bit(0) # overscan_info_present_flag
+        w.write_bit(1) # video_signal_type_present_flag
+        w.write_bits(5, 3)
+        w.write_bit(0)
+        w.write_bit(1) # colour_description_present_flag
+        w.write_bits(1, 8)
+        w.write_bits(1, 8)
+        w.write_bits(1, 8)
+        w.write_bit(0) # chroma_loc_info_present_flag
+        w.write_bit(1) # timing_info_present_flag
+        w.write_bits(1, 32)
+        w.write_bits(fps * 2, 32)
+        w.write_bit(1)
+        for _ in range(2): # nal_hrd_parameters_present_flag, vcl_hrd_parameters_present_flag
+            w.write_bit(1 if hrd else 0)
+            if hrd:
+                _write_hrd(w, 8000000, 16000000)
+        if hrd:
+            w.write_bit(0) # low_delay_hrd_flag
+        w.write_bit(0) # pic_struct_present_flag
+        w.write_bit(0 if max_num_reorder_frames is None else 1) # bitstream_restriction_flag
+        if max_num_reorder_frames is not None:
+            w.write_bit(1)
+            w.write_ue(2)
+            w.write_ue(1)
+            w.write_ue(16)
+            w.write_ue(16)
+            w.write_ue(max_num_reorder_frames)
+            w.write_ue(4) # max_dec_frame_buffering
+    w.write_trailing_bits()
+    return b'\x67' + add_emulation_prevention(w.to_bytes())
+
+
+def make_pps(pps_id=0, sps_id=0, cabac=1, transform_8x8=True, slice_group_map_units=0):
+    """
+    生成 PPS NALU (含 0x68 header)。slice_group_map_units > 0 时写入 4 个 slice group、
+    slice_group_map_type 6 (逐 map unit 显式给出 slice_group_id)。
+    """
+    w = BitWriter()
+    w.write_ue(pps_id)
+    w.write_ue(sps_id)
+    w.write_bit(cabac)
+    w.write_bit(0) # bottom_field_pic_order_in_frame_present_flag
+    w.write_ue(3 if slice_group_map_units else 0) # num_slice_groups_minus1
+    if slice_group_map_units:
+        w.write_ue(6)
+        w.write_ue(slice_group_map_units - 1)
+        for i in range(slice_group_map_units):
+            w.write_bits(i % 4, 2)
+    w.write_ue(2)
+    w.write_ue(0)
+    w.write_bit(1) # weighted_pred_flag
+    w.write_bits(2, 2)
+    w.write_se(-3)
+    w.write_se(0)
+    w.write_se(-2)
+    w.write_bit(1)
+    w.write_bit(0)
+    w.write_bit(0)
+    if transform_8x8:
+        w.write_bit(1) # transform_8x8_mode_flag
+        w.write_bit(0) # pic_scaling_matrix_present_flag
+        w.write_se(-2) # second_chroma_qp_index_offset
+    w.write_trailing_bits()
+    return b'\x68' + add_emulation_prevention(w.to_bytes())
+
+
+def make_slice(idr, size, frame_num=0, poc_lsb=0, slice_type=None, rng=None):
+    """
+    生成 slice NALU：合法的 slice header (对应 make_sps 的 log2_max_frame_num=4、log2_max_poc_lsb=6)
+    加随机负载，总大小约为 size 字节。
+    """
+    rng = rng or random.Random(size)
+    w = BitWriter()
+    w.write_ue(0) # first_mb_in_slice
+    w.write_ue(slice_type if slice_type is not None else (7 if idr else 5))
+    w.write_ue(0) # pic_parameter_set_id
+    w.write_bits(frame_num, 4)
+    if idr:
+        w.write_ue(frame_num & 0xFF) # idr_pic_id
+    w.write_bits(poc_lsb, 6)
+    w.write_trailing_bits()
+    rbsp = w.to_bytes() + rng.randbytes(max(size - 8, 1)) + b'\x80'
+    return (b'\x65' if idr else b'\x41') + add_emulation_prevention(rbsp)
+
+
+def make_avc_record(sps_list, pps_list, length_size=4):
+    sps = sps_list[0]
+    record = bytes([1, sps[1], sps[2], sps[3], 0xFC | (length_size - 1), 0xE0 | len(sps_list)])
+    for nalu in sps_list:
+        record += struct.pack('>H', len(nalu)) + nalu
+    record += bytes([len(pps_list)])
+    for nalu in pps_list:
+        record += struct.pack('>H', len(nalu)) + nalu
+    return record
+
+
+def length_prefixed(nalus, length_size=4):
+    return b''.join(len(n).to_bytes(length_size, 'big') + n for n in nalus)
+
+
+def make_video_data(nalus, keyframe, composition_time=0, length_size=4):
+    return bytes([0x17 if keyframe else 0x27, 1]) + composition_time.to_bytes(3, 'big') + length_prefixed(nalus, length_size)
+
+
+SPS_VARIANTS = {
+    '1080p_high_vui': dict(width=1920, height=1080, profile_idc=100, level_idc=42),
+    '720p_main': dict(width=1280, height=720, profile_idc=77, level_idc=31),
+    '2160p_high10_sar': dict(width=3840, height=2160, profile_idc=110, level_idc=51, bit_depth=10, sar=(4, 3)),
+    '1080i_high_poc1': dict(width=1920, height=1080, profile_idc=100, frame_mbs_only=0, poc_type=1),
+    '360p_baseline_novui': dict(width=640, height=360, profile_idc=66, level_idc=30, vui=False),
+    '1080p_high_full': dict(width=1920, height=1080, profile_idc=100, level_idc=42, scaling_matrix=True,
+                            hrd=True, max_num_reorder_frames=2),
+}
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'bench_parser_baseline.json')
+
+# (完整语法的项, 对照项, 每字节耗时之比的上限)。1080p_high_vui 只含旧的部分解析读得到的字段
+# (VUI 到 timing_info 为止)，1080p_high_full 在同一码流上加了 scaling list、HRD 和 bitstream_restriction。
+# 两者长度差了几倍，所以按每字节耗时比较。
+OVERHEAD_LIMITS = [
+    ('sps[1080p_high_full]', 'sps[1080p_high_vui]', 1.5),
+]
+
+
+def _check(condition, what):
+    if not condition:
+        raise RuntimeError(f"Synthetic {what} does not round-trip through the parser.")
+
+
+def build_inputs():
+    """
+    生成全部测试输入并回读校验。
+    """
+    inputs = {'sps': {}, 'pps': {}}
+    for name, params in SPS_VARIANTS.items():
+        nalu = make_sps(**params)
+        sps = parse_h264_sps(nalu)
+        _check(sps is not None and (sps.cropped_width, sps.cropped_height) == (params['width'], params['height']),
+               f"SPS {name}")
+        _check(not params.get('vui', True) or sps.frame_rate == 30.0, f"SPS {name} timing")
+        if params.get('max_num_reorder_frames') is not None:
+            _check(sps.vui_parameters['max_num_reorder_frames'] == params['max_num_reorder_frames'], f"SPS {name} VUI")
+        if params.get('scaling_matrix'):
+            _check(sps.scaling_lists[1] == 'default' and len(sps.scaling_lists[7]) == 64, f"SPS {name} scaling lists")
+        inputs['sps'][name] = nalu
+    for name, params in (('cabac', dict(cabac=1)), ('cavlc', dict(cabac=0)),
+                         ('cavlc_slice_groups', dict(cabac=0, transform_8x8=False, slice_group_map_units=396))):
+        nalu = make_pps(**params)
+        pps = parse_h264_pps(nalu)
+        _check(pps is not None and pps.entropy_coding_mode_flag == params['cabac']
+               and pps.get('transform_8x8_mode_flag', 0) == params.get('transform_8x8', True)
+               and len(pps.get('slice_group_id', ())) == params.get('slice_group_map_units', 0), f"PPS {name}")
+        inputs['pps'][name] = nalu
+
+    sps, pps = inputs['sps']['1080p_high_vui'], inputs['pps']['cabac']
+    inputs['record'] = make_avc_record([sps], [pps])
+    _check(parse_avc_decoder_configuration_record(inputs['record']) is not None, "AVC config record")
+
+    rng = random.Random(1)
+    inputs['nalus'] = {
+        'idr_2k': length_prefixed([b'\x09\xf0', sps, pps, make_slice(True, 2000, rng=rng)]),
+        'p_8x8k': length_prefixed([b'\x09\xf0'] + [make_slice(False, 8000, frame_num=1, poc_lsb=2, rng=rng)] * 8),
+        'idr_4x256k': length_prefixed([make_slice(True, 256 * 1024, rng=rng)] * 4),
+    }
+    inputs['video_data'] = {
+        'idr_64k': make_video_data([b'\x09\xf0', make_slice(True, 64 * 1024, rng=rng)], True),
+        'p_4k': make_video_data([b'\x09\xf0', make_slice(False, 4096, frame_num=1, poc_lsb=2, rng=rng)], False, 66),
+    }
+    context = VideoStreamContext()
+    context.update_avc_config(parse_avc_decoder_configuration_record(inputs['record']))
+    for name, body in inputs['video_data'].items():
+        parsed = parse_rtmp_video_data(body, context)
+        _check(not parsed.errors and parsed.parsed_nalus[1].slice_header is not None, f"VideoData {name}")
+    inputs['context'] = context
+
+    w = BitWriter()
+    for i in range(2000):
+        w.write_ue(i % 300)
+        w.write_se((i % 50) - 25)
+        w.write_bits(i & 0x1F, 5)
+    w.write_trailing_bits()
+    inputs['bitstream'] = w.to_bytes()
+    return inputs
+
+
+def _read_bitstream(data):
+    reader = BitReader(data)
+    read_ue, read_se, read_bits = reader.read_ue, reader.read_se, reader.read_bits
+    for _ in range(2000):
+        read_ue()
+        read_se()
+        read_bits(5)
+
+
+def bench_cases(inputs):
+    """
+    Returns:
+        list: [(名称, 无参函数, 每次调用处理的字节数), ...]
+    """
+    cases = [('bitreader_ue_se_bits', lambda data=inputs['bitstream']: _read_bitstream(data), len(inputs['bitstream']))]
+    for name, nalu in inputs['sps'].items():
+        cases.append((f'sps[{name}]', lambda nalu=nalu: parse_h264_sps(nalu), len(nalu)))
+    for name, nalu in inputs['pps'].items():
+        cases.append((f'pps[{name}]', lambda nalu=nalu: parse_h264_pps(nalu), len(nalu)))
+    record = inputs['record']
+    cases.append(('avc_record', lambda: parse_avc_decoder_configuration_record(record), len(record)))
+
+    context = inputs['context']
+    no_slices = VideoStreamContext(parse_slice_headers=False)
+    no_slices.update_avc_config(parse_avc_decoder_configuration_record(record))
+    for name, data in inputs['nalus'].items():
+        cases.append((f'nalu_data[{name}]', lambda data=data: parse_nalu_data(data, 4, [], context), len(data)))
+        cases.append((f'nalu_data[{name},no_slice_headers]',
+                      lambda data=data: parse_nalu_data(data, 4, [], no_slices), len(data)))
+    for name, body in inputs['video_data'].items():
+        cases.append((f'video_data[{name}]', lambda body=body: parse_rtmp_video_data(body, context), len(body)))
+    return cases
+
+
+def measure(func, repeat=5):
+    """
+    timeit.autorange 决定单轮调用次数 (>= 0.2s)，重复 repeat 轮取最快的一轮。
+    Returns:
+        float: 每次调用的秒数。
+    """
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat, number)) / number
+
+
+def run(name_filter=None, repeat=5):
+    inputs = build_inputs()
+    results = {}
+    for name, func, size in bench_cases(inputs):
+        if name_filter and name_filter not in name:
+            continue
+        seconds = measure(func, repeat)
+        results[name] = {
+            'ns_per_op': round(seconds * 1e9, 1),
+            'mb_per_s': round(size / seconds / 1e6, 2),
+            'bytes_per_op': size,
+        }
+        print(f"{name:<40} {seconds * 1e9:>14,.0f} ns/op {size / seconds / 1e6:>10.2f} MB/s", file=sys.stderr)
+    return {
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'machine': platform.machine(),
+        'results': results,
+    }
+
+
+def compare(report, baseline, threshold):
+    """
+    Returns:
+        list: 比 baseline 慢超过 threshold 的项 [(名称, 当前 ns/op, baseline ns/op), ...]。
+    """
+    regressions = []
+    for name, result in report['results'].items():
+        base = baseline.get('results', {}).get(name)
+        if base and result['ns_per_op'] > base['ns_per_op'] * (1 + threshold):
+            regressions.append((name, result['ns_per_op'], base['ns_per_op']))
+    return regressions
+
+
+def check_overhead(report):
+    """
+    Returns:
+        list: 超出 OVERHEAD_LIMITS 的项 [(完整语法的项, 对照项, 每字节耗时之比, 上限), ...]；
+              被 -k 过滤掉的项不检查。比值同时写进 report['overhead']。
+    """
+    results = report['results']
+    report['overhead'] = {}
+    exceeded = []
+    for full, partial, limit in OVERHEAD_LIMITS:
+        if full not in results or partial not in results:
+            continue
+        ratio = ((results[full]['ns_per_op'] / results[full]['bytes_per_op'])
+                 / (results[partial]['ns_per_op'] / results[partial]['bytes_per_op']))
+        report['overhead'][f'{full} / {partial}'] = round(ratio, 3)
+        if ratio > limit:
+            exceeded.append((full, partial, ratio, limit))
+    return exceeded
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the H.264/RTMP parsers on synthetic bitstreams.")
+    parser.add_argument("-o", "--output", help="write results as JSON to this file")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE,
+                        help="JSON results of a previous run to compare against (default: bench_parser_baseline.json)")
+    parser.add_argument("--no-baseline", dest="baseline", action="store_const", const=None,
+                        help="do not compare against a baseline")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown vs. baseline (default: 0.25)")
+    parser.add_argument("-k", "--filter", help="only run benchmarks whose name contains this string")
+    parser.add_argument("-r", "--repeat", type=int, default=5, help="timing rounds per benchmark, fastest wins")
+    args = parser.parse_args(argv)
+
+    report = run(args.filter, args.repeat)
+    status = 0
+    for full, partial, ratio, limit in check_overhead(report):
+        print(f"OVERHEAD {full}: {ratio:.2f}x the per-byte cost of {partial} (limit {limit:.2f}x)", file=sys.stderr)
+        status = 1
+    if args.output:
+        with open(args.output, "w") as out:
+            json.dump(report, out, indent=2)
+            out.write("\n")
+
+    if args.baseline:
+        with open(args.baseline) as fd:
+            baseline = json.load(fd)
+        environment = ('python', 'implementation', 'machine')
+        if any(baseline.get(key) != report[key] for key in environment):
+            print(f"note: baseline was recorded on {' '.join(str(baseline.get(key)) for key in environment)}, "
+                  f"this run is {' '.join(report[key] for key in environment)}", file=sys.stderr)
+        regressions = compare(report, baseline, args.threshold)
+        for name, current, base in regressions:
+            print(f"REGRESSION {name}: {current:,.0f} ns/op vs baseline {base:,.0f} ns/op "
+                  f"(+{(current / base - 1) * 100:.0f}%)", file=sys.stderr)
+        if regressions:
+            status = 1
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
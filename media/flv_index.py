@@ -0,0 +1,226 @@
+"""
+FLV 录制文件的随机访问索引 (side-car 文件，默认 <录制文件>.idx)。
+
+用法: python flv_index.py capture.flv            # 生成索引
+      python flv_index.py capture.flv -t 65000   # 查询 65s 附近的 GOP
+
+索引记录每个视频 tag 的字节偏移、时间戳和类型，以及参数集 (SPS/PPS，HEVC 还有 VPS) 变化点。
+数据按列存放在 array 里 (关键帧和 sequence header 的位置也单独存一列)，
+保存/加载都是整块的 tofile()/fromfile()，加载时不逐条处理；
+按时间定位只需要对关键帧时间戳做一次 bisect。
+"""
+import argparse
+import mmap
+import os
+import struct
+import sys
+from array import array
+from bisect import bisect_right
+
+from rtmp_video.flv import FLV_TAG_VIDEO, iter_flv_tags
+from rtmp_video.h264 import VideoStreamContext
+from rtmp_video.hevc import HEVC_NAL_PPS, HEVC_NAL_SPS, HEVC_NAL_VPS
+
+INDEX_MAGIC = b'FLVIDX02'
+# magic, entry count, size of the indexed file, keyframe count, sequence header count
+INDEX_HEADER = struct.Struct('<8sIQII')
+
+H264_CODEC_ID = 7
+HEVC_CODEC_ID = 12
+# 带内参数集的 NALU 类型和 sequence header 里参数集字段的名字，按 codec_id 区分
+PARAMETER_SET_TYPES = {
+    H264_CODEC_ID: ((7, 8), 'avc_decoder_config_record', ('sps_nalus', 'pps_nalus')),
+    HEVC_CODEC_ID: ((HEVC_NAL_VPS, HEVC_NAL_SPS, HEVC_NAL_PPS), 'hevc_decoder_config_record',
+                    ('vps_nalus', 'sps_nalus', 'pps_nalus')),
+}
+
+# flags 的布局: 低 4 位 frame_type，4~5 位 avc_packet_type (3 表示未知/非 AVC)，第 6 位 参数集变化
+FLAG_PACKET_SHIFT = 4
+FLAG_PARAMETER_SET_CHANGE = 0x40
+
+
+class KeyframeIndex:
+    """
+    视频 tag 索引。offsets / timestamps / flags 是等长的 array，第 i 项对应第 i 个视频 tag。
+    keyframes / keyframe_timestamps 为关键帧 (AVC NALU 包且 frame_type 为 1) 在条目中的位置及其时间戳，
+    用于 bisect；sequence_headers 为 AVC sequence header 在条目中的位置。这几列在 build() 扫描时
+    顺便生成，和前三列一起存进索引文件。
+    """
+    def __init__(self, offsets, timestamps, flags, file_size, keyframes, keyframe_timestamps, sequence_headers):
+        self.offsets = offsets
+        self.timestamps = timestamps
+        self.flags = flags
+        self.file_size = file_size
+        self.keyframes = keyframes
+        self.keyframe_timestamps = keyframe_timestamps
+        self.sequence_headers = sequence_headers
+
+    def __len__(self):
+        return len(self.offsets)
+
+    @classmethod
+    def build(cls, flv_path):
+        """
+        单次顺序扫描 flv_path，为每个视频 tag 记录偏移、时间戳和 parse_rtmp_video_data 给出的类型。
+        """
+        offsets, timestamps, flags = array('Q'), array('I'), array('B')
+        keyframes, keyframe_timestamps, sequence_headers = array('I'), array('I'), array('I')
+        # 只需要 frame_type / avc_packet_type 和参数集字节，不解析 slice header
+        context = VideoStreamContext(parse_slice_headers=False)
+        last_parameter_sets = None
+        with open(flv_path, 'rb') as fd:
+            for tag in iter_flv_tags(fd, tag_types={FLV_TAG_VIDEO}):
+                parsed = context.parse(tag['data'])
+                if parsed is None:
+                    continue
+                packet_type = parsed.avc_packet_type if parsed.avc_packet_type in (0, 1, 2) else 3
+                flag = (parsed.frame_type & 0x0F) | (packet_type << FLAG_PACKET_SHIFT)
+
+                parameter_sets = None
+                if parsed.codec_id in PARAMETER_SET_TYPES:
+                    nalu_types, record_field, names = PARAMETER_SET_TYPES[parsed.codec_id]
+                    config = getattr(parsed, record_field)
+                    if packet_type == 0 and config:
+                        parameter_sets = b''.join(bytes(n) for name in names for n in config.get(name, ()))
+                    elif packet_type == 1:
+                        in_band = [bytes(n.nalu_data) for n in parsed.parsed_nalus if n.nalu_type in nalu_types]
+                        if in_band:
+                            parameter_sets = b''.join(in_band)
+                if parameter_sets is not None and parameter_sets != last_parameter_sets:
+                    flag |= FLAG_PARAMETER_SET_CHANGE
+                    last_parameter_sets = parameter_sets
+
+                if packet_type == 0:
+                    sequence_headers.append(len(offsets))
+                elif packet_type == 1 and parsed.frame_type == 1:
+                    keyframes.append(len(offsets))
+                    keyframe_timestamps.append(tag['timestamp'])
+                offsets.append(tag['offset'])
+                timestamps.append(tag['timestamp'])
+                flags.append(flag)
+            file_size = fd.seek(0, os.SEEK_END)
+        return cls(offsets, timestamps, flags, file_size, keyframes, keyframe_timestamps, sequence_headers)
+
+    def _columns(self):
+        return (self.offsets, self.timestamps, self.flags,
+                self.keyframes, self.keyframe_timestamps, self.sequence_headers)
+
+    def save(self, index_path):
+        with open(index_path, 'wb') as out:
+            out.write(INDEX_HEADER.pack(INDEX_MAGIC, len(self.offsets), self.file_size,
+                                        len(self.keyframes), len(self.sequence_headers)))
+            for column in self._columns():
+                if sys.byteorder != 'little':
+                    column = array(column.typecode, column)
+                    column.byteswap()
+                column.tofile(out)
+
+    @classmethod
+    def load(cls, index_path):
+        with open(index_path, 'rb') as fd:
+            header = fd.read(INDEX_HEADER.size)
+            if len(header) < INDEX_HEADER.size or header[:len(INDEX_MAGIC)] != INDEX_MAGIC:
+                raise ValueError(f"{index_path} is not an FLV index file (or was written by an older version).")
+            _, count, file_size, keyframe_count, sequence_header_count = INDEX_HEADER.unpack(header)
+            columns = []
+            for typecode, size in (('Q', count), ('I', count), ('B', count), ('I', keyframe_count),
+                                   ('I', keyframe_count), ('I', sequence_header_count)):
+                column = array(typecode)
+                column.fromfile(fd, size)
+                if sys.byteorder != 'little':
+                    column.byteswap()
+                columns.append(column)
+        offsets, timestamps, flags, keyframes, keyframe_timestamps, sequence_headers = columns
+        return cls(offsets, timestamps, flags, file_size, keyframes, keyframe_timestamps, sequence_headers)
+
+    @classmethod
+    def open(cls, flv_path, index_path=None):
+        """
+        加载 flv_path 的索引；索引不存在、格式不对 (旧版本) 或与文件大小不符时重新生成并保存。
+        """
+        index_path = index_path or flv_path + '.idx'
+        if os.path.isfile(index_path):
+            try:
+                index = cls.load(index_path)
+            except (ValueError, EOFError):
+                index = None
+            if index is not None and index.file_size == os.path.getsize(flv_path):
+                return index
+        index = cls.build(flv_path)
+        index.save(index_path)
+        return index
+
+    def keyframe_at(self, timestamp):
+        """
+        返回时间戳不大于 timestamp 的最后一个关键帧在条目中的位置；timestamp 早于第一个关键帧时返回 None。
+        """
+        k = bisect_right(self.keyframe_timestamps, timestamp) - 1
+        if k < 0:
+            return None
+        return self.keyframes[k]
+
+    def gop_at(self, timestamp):
+        """
+        定位包含 timestamp 的 GOP。
+        Returns:
+            dict: {'timestamp', 'start', 'end', 'sequence_header_offset'}，start/end 为文件中的字节范围
+                  (包含其间交错的音频/脚本 tag)，sequence_header_offset 为解码该 GOP 所需的最近一个
+                  AVC sequence header tag 的偏移 (找不到时为 None)。
+        """
+        entry = self.keyframe_at(timestamp)
+        if entry is None:
+            return None
+        k = bisect_right(self.keyframes, entry)
+        end = self.offsets[self.keyframes[k]] if k < len(self.keyframes) else self.file_size
+
+        h = bisect_right(self.sequence_headers, entry) - 1
+        sequence_header_offset = self.offsets[self.sequence_headers[h]] if h >= 0 else None
+        return {
+            'timestamp': self.timestamps[entry],
+            'start': self.offsets[entry],
+            'end': end,
+            'sequence_header_offset': sequence_header_offset,
+        }
+
+    def parameter_set_changes(self):
+        """
+        返回 SPS/PPS 发生变化的位置列表 [(timestamp, offset), ...]。
+        """
+        return [(self.timestamps[i], self.offsets[i])
+                for i, f in enumerate(self.flags) if f & FLAG_PARAMETER_SET_CHANGE]
+
+
+def read_gop(flv_path, index, timestamp):
+    """
+    通过 mmap 一次读出包含 timestamp 的 GOP 的原始 FLV tag 字节。
+    """
+    gop = index.gop_at(timestamp)
+    if gop is None:
+        return None
+    with open(flv_path, 'rb') as fd:
+        with mmap.mmap(fd.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return mm[gop['start']:gop['end']]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build or query a keyframe index for an FLV recording.")
+    parser.add_argument("flv", help="FLV recording")
+    parser.add_argument("-i", "--index", help="index file (default: <flv>.idx)")
+    parser.add_argument("-t", "--time", type=int, help="locate the GOP containing this timestamp (ms)")
+    parser.add_argument("--rebuild", action="store_true", help="rebuild the index even if it is up to date")
+    args = parser.parse_args(argv)
+
+    if args.rebuild:
+        index = KeyframeIndex.build(args.flv)
+        index.save(args.index or args.flv + '.idx')
+    else:
+        index = KeyframeIndex.open(args.flv, args.index)
+    print(f"{len(index)} video tags, {len(index.keyframes)} keyframes, "
+          f"{len(index.parameter_set_changes())} parameter set changes")
+    if args.time is not None:
+        print(index.gop_at(args.time))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,83 @@
+"""
+把 FLV 录制文件重新封装为 Annex-B 裸流和/或 MPEG-TS，在解析的同一个进程里完成，不需要 ffmpeg。
+
+用法: python flv_remux.py capture.flv -o capture.h264 [--ts capture.ts]
+"""
+import argparse
+import sys
+import time
+
+from rtmp_video.audio import AudioStreamContext
+from rtmp_video.flv import FLV_TAG_AUDIO, FLV_TAG_VIDEO, is_flv, iter_flv_tags
+from rtmp_video.h264 import VideoStreamContext
+from rtmp_video.remux import AnnexBWriter, TsWriter
+
+
+def remux_flv(path, annexb_out=None, ts_out=None):
+    """
+    Args:
+        path (str): FLV 文件。
+        annexb_out / ts_out: 以二进制写模式打开的文件对象，None 表示不输出该格式。
+    Returns:
+        dict: 各输出的访问单元 / 帧数和字节数。
+    """
+    annexb = AnnexBWriter(annexb_out) if annexb_out is not None else None
+    ts = TsWriter(ts_out) if ts_out is not None else None
+    # 只需要切分 NALU，不解析 slice header
+    video_context = VideoStreamContext(parse_slice_headers=False)
+    audio_context = AudioStreamContext()
+    tag_types = {FLV_TAG_VIDEO, FLV_TAG_AUDIO} if ts is not None else {FLV_TAG_VIDEO}
+    with open(path, 'rb') as fd:
+        if not is_flv(fd):
+            raise ValueError(f"{path} is not an FLV file")
+        for tag in iter_flv_tags(fd, tag_types=tag_types):
+            if tag['tag_type'] == FLV_TAG_VIDEO:
+                parsed = video_context.parse(tag['data'])
+                if annexb is not None:
+                    annexb.write_video(parsed)
+                if ts is not None:
+                    ts.write_video(tag['timestamp'], parsed)
+            else:
+                ts.write_audio(tag['timestamp'], audio_context.parse(tag['data']), tag['data'])
+
+    result = {}
+    if annexb is not None:
+        annexb.close()
+        result['annexb'] = {'access_units': annexb.access_units, 'bytes': annexb.bytes_written,
+                            'parameter_sets_inserted': annexb.inserted_parameter_sets}
+    if ts is not None:
+        ts.close()
+        result['ts'] = {'video_frames': ts.video_frames, 'audio_frames': ts.audio_frames,
+                        'packets': ts.packets, 'bytes': ts.bytes_written}
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Remux an FLV recording to an Annex-B elementary stream and/or MPEG-TS.")
+    parser.add_argument("input", help="FLV recording (H.264 / H.265 video, AAC audio)")
+    parser.add_argument("-o", "--annexb", help="write the video as an Annex-B stream (.h264 / .h265)")
+    parser.add_argument("--ts", help="write video and AAC audio as MPEG-TS")
+    args = parser.parse_args(argv)
+    if not args.annexb and not args.ts:
+        parser.error("nothing to do: give -o and/or --ts")
+
+    annexb_out = open(args.annexb, 'wb') if args.annexb else None
+    ts_out = open(args.ts, 'wb') if args.ts else None
+    start = time.perf_counter()
+    try:
+        result = remux_flv(args.input, annexb_out, ts_out)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    finally:
+        for out in (annexb_out, ts_out):
+            if out is not None:
+                out.close()
+    elapsed = time.perf_counter() - start
+    for name, stats in result.items():
+        print(f"{name}: {stats}, {stats['bytes'] / 1e6 / elapsed:.1f} MB/s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
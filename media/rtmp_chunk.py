@@ -0,0 +1,255 @@
+"""
+增量 (push 模式) 的 RTMP chunk 流解析。
+
+把 TCP 收到的任意大小片段依次 feed() 进来，按 chunk stream id 重组出完整的 RTMP 消息，
+视频消息 (type 9) 直接交给 parse_rtmp_video_data 解析。
+
+    parser = RtmpChunkParser(skip_handshake=True)
+    for message in parser.feed(data):
+        if message.parsed is not None:
+            ...
+"""
+import logging
+import struct
+
+from rtmp_video.h264 import VideoStreamContext
+from rtmp_video.records import Record
+
+logger = logging.getLogger("rtmp_video_parse")
+
+RTMP_HANDSHAKE_SIZE = 1 + 1536 + 1536 # C0 + C1 + C2
+RTMP_DEFAULT_CHUNK_SIZE = 128
+
+RTMP_MSG_SET_CHUNK_SIZE = 1
+RTMP_MSG_ABORT = 2
+RTMP_MSG_ACK = 3
+RTMP_MSG_USER_CONTROL = 4
+RTMP_MSG_WINDOW_ACK_SIZE = 5
+RTMP_MSG_SET_PEER_BANDWIDTH = 6
+RTMP_MSG_AUDIO = 8
+RTMP_MSG_VIDEO = 9
+RTMP_MSG_DATA_AMF0 = 18
+RTMP_MSG_COMMAND_AMF0 = 20
+
+_MESSAGE_HEADER_SIZES = (11, 7, 3, 0)
+_unpack_u32_le = struct.Struct('<I').unpack_from
+_unpack_u32_be = struct.Struct('>I').unpack_from
+
+# 缓冲区前面已消费的部分超过这个大小才整体前移，避免每次 feed 都搬移数据
+_COMPACT_THRESHOLD = 64 * 1024
+
+
+class RtmpMessage(Record):
+    __slots__ = ('csid', 'timestamp', 'type_id', 'stream_id', 'payload', 'parsed')
+    _dict_fields = __slots__
+
+    def __init__(self, csid, timestamp, type_id, stream_id, payload):
+        self.csid = csid
+        self.timestamp = timestamp
+        self.type_id = type_id
+        self.stream_id = stream_id
+        self.payload = payload
+        self.parsed = None
+
+
+def encode_message(csid, timestamp, type_id, stream_id, payload, chunk_size=RTMP_DEFAULT_CHUNK_SIZE):
+    """
+    把一条消息按 chunk_size 切成 chunk：第一个 chunk 用 fmt 0 头，后续用 fmt 3 头。
+    Returns:
+        bytes: 可以直接写到连接上的数据。
+    """
+    if csid < 64:
+        basic = bytes([csid])
+    elif csid < 320:
+        basic = bytes([0, csid - 64])
+    else:
+        basic = bytes([1, (csid - 64) & 0xFF, (csid - 64) >> 8])
+    extended = timestamp >= 0xFFFFFF
+    length = len(payload)
+    out = bytearray(basic)
+    out += (0xFFFFFF if extended else timestamp).to_bytes(3, 'big')
+    out += length.to_bytes(3, 'big')
+    out.append(type_id)
+    out += struct.pack('<I', stream_id)
+    continuation = bytes([0xC0 | basic[0]]) + basic[1:]
+    if extended:
+        extended_timestamp = struct.pack('>I', timestamp & 0xFFFFFFFF)
+        out += extended_timestamp
+        continuation += extended_timestamp
+    view = memoryview(payload)
+    for start in range(0, length, chunk_size):
+        if start:
+            out += continuation
+        out += view[start : start + chunk_size]
+    return bytes(out)
+
+
+class _ChunkStream:
+    __slots__ = ('timestamp', 'delta', 'length', 'type_id', 'stream_id', 'extended', 'payload')
+
+    def __init__(self):
+        self.timestamp = 0
+        self.delta = 0
+        self.length = 0
+        self.type_id = 0
+        self.stream_id = 0
+        self.extended = False
+        self.payload = bytearray()
+
+
+class RtmpChunkParser:
+    """
+    单个 TCP 方向上的 RTMP chunk 流解析器。
+    Args:
+        skip_handshake (bool): 数据从连接开头开始时为 True，先跳过 C0/C1/C2 (或 S0/S1/S2)。
+        parse_video (bool): 是否对视频消息调用 parse_rtmp_video_data (结果放在 message.parsed)。
+        chunk_size (int): 初始 chunk 大小，之后按收到的 Set Chunk Size 消息更新。
+        parse_slice_headers (bool): 传给每路流的 VideoStreamContext，只关心码率/帧率时可以关掉。
+    """
+    def __init__(self, skip_handshake=False, parse_video=True, chunk_size=RTMP_DEFAULT_CHUNK_SIZE,
+                 parse_slice_headers=True):
+        self.chunk_size = chunk_size
+        self.parse_video = parse_video
+        self.parse_slice_headers = parse_slice_headers
+        self.bytes_received = 0
+        self._handshake_left = RTMP_HANDSHAKE_SIZE if skip_handshake else 0
+        self._buf = bytearray()
+        self._pos = 0
+        self._chunk_streams = {}
+        self._video_contexts = {} # message stream id -> VideoStreamContext
+
+    def buffered(self):
+        return len(self._buf) - self._pos
+
+    def video_context(self, stream_id):
+        context = self._video_contexts.get(stream_id)
+        if context is None:
+            context = self._video_contexts[stream_id] = VideoStreamContext(self.parse_slice_headers)
+        return context
+
+    def feed(self, data):
+        """
+        追加一段收到的数据，返回因此而完整的消息列表 (可能为空)。
+        """
+        self.bytes_received += len(data)
+        if self._handshake_left:
+            skip = min(self._handshake_left, len(data))
+            self._handshake_left -= skip
+            data = memoryview(data)[skip:]
+            if not data:
+                return []
+
+        buf = self._buf
+        buf += data
+        messages = []
+        view = memoryview(buf)
+        try:
+            self._pos = self._parse_chunks(buf, view, self._pos, messages)
+        finally:
+            view.release()
+
+        if self._pos == len(buf):
+            buf.clear()
+            self._pos = 0
+        elif self._pos > _COMPACT_THRESHOLD:
+            del buf[:self._pos]
+            self._pos = 0
+
+        for message in messages:
+            self._handle_message(message)
+        return messages
+
+    def _parse_chunks(self, buf, view, pos, messages):
+        end = len(buf)
+        streams = self._chunk_streams
+        while pos < end:
+            # Basic header
+            first = buf[pos]
+            fmt = first >> 6
+            csid = first & 0x3F
+            header_size = 1
+            if csid == 0:
+                if end - pos < 2:
+                    break
+                csid = 64 + buf[pos + 1]
+                header_size = 2
+            elif csid == 1:
+                if end - pos < 3:
+                    break
+                csid = 64 + buf[pos + 1] + (buf[pos + 2] << 8)
+                header_size = 3
+
+            p = pos + header_size
+            message_header_size = _MESSAGE_HEADER_SIZES[fmt]
+            if end - p < message_header_size:
+                break
+
+            state = streams.get(csid)
+            if state is None:
+                if fmt != 0:
+                    logger.warning(f"Warning: RTMP chunk stream {csid} starts with fmt {fmt} chunk.")
+                state = streams[csid] = _ChunkStream()
+
+            # Message header
+            timestamp_field = length = type_id = stream_id = None
+            if fmt <= 2:
+                timestamp_field = (buf[p] << 16) | (buf[p + 1] << 8) | buf[p + 2]
+            if fmt <= 1:
+                length = (buf[p + 3] << 16) | (buf[p + 4] << 8) | buf[p + 5]
+                type_id = buf[p + 6]
+            if fmt == 0:
+                stream_id = _unpack_u32_le(buf, p + 7)[0]
+            p += message_header_size
+
+            extended = timestamp_field == 0xFFFFFF if fmt <= 2 else state.extended
+            if extended:
+                if end - p < 4:
+                    break
+                extended_timestamp = _unpack_u32_be(buf, p)[0]
+                p += 4
+
+            if length is None:
+                length = state.length
+            starting = not state.payload
+            size = min(self.chunk_size, length - len(state.payload))
+            if end - p < size:
+                break
+
+            # 整个 chunk 都已到达，才更新 chunk stream 状态
+            if fmt <= 2:
+                value = extended_timestamp if extended else timestamp_field
+                if fmt == 0:
+                    state.timestamp = value
+                else:
+                    state.timestamp = (state.timestamp + value) & 0xFFFFFFFF
+                state.delta = value
+                state.extended = extended
+            elif starting:
+                state.timestamp = (state.timestamp + state.delta) & 0xFFFFFFFF
+            if fmt <= 1:
+                state.length = length
+                state.type_id = type_id
+            if fmt == 0:
+                state.stream_id = stream_id
+
+            if size:
+                state.payload += view[p : p + size]
+            pos = p + size
+
+            if len(state.payload) >= length:
+                messages.append(RtmpMessage(csid, state.timestamp, state.type_id, state.stream_id, state.payload))
+                state.payload = bytearray()
+                if state.type_id == RTMP_MSG_SET_CHUNK_SIZE and length >= 4:
+                    # 必须立即生效，后面的 chunk 就按新的大小切分
+                    self.chunk_size = _unpack_u32_be(messages[-1].payload, 0)[0] & 0x7FFFFFFF
+                elif state.type_id == RTMP_MSG_ABORT and length >= 4:
+                    # 同样立即生效：只丢弃 Abort 之前已收到的部分消息，不影响同一批数据里之后的 chunk
+                    aborted = streams.get(_unpack_u32_be(messages[-1].payload, 0)[0])
+                    if aborted is not None:
+                        aborted.payload = bytearray()
+        return pos
+
+    def _handle_message(self, message):
+        type_id = message.type_id
+        if type_id == RTMP_MSG_VIDEO and self.parse_video and message.payload:
+            message.parsed = self.video_context(message.stream_id).parse(memoryview(message.payload))
@@ -0,0 +1,621 @@
+"""
+直接从抓包文件 (.pcap / .pcapng) 分析 RTMP：一遍读完文件，按 TCP 连接重组端口 1935 上的字节流，
+每个方向交给一个 RtmpChunkParser (从握手开始)，视频消息由它调用 parse_rtmp_video_data 解析，
+再按 connect / publish / play 命令归到各路流上统计。不需要先在 Wireshark 里逐个导出 RTMP body。
+
+用法: python rtmp_pcap.py capture.pcapng [--port 1935] [--slice-headers] [-o report.json]
+
+文件通过 mmap 顺序访问；每个 TCP 方向只缓存乱序到达的段 (有上限) 和 chunk 解析器里未完整的消息，
+连接结束 (FIN/RST) 后即释放解析状态，内存不随抓包大小增长。
+抓包开始时已经建立的连接 (没有看到 SYN) 无法对齐 chunk 边界，只计数不解析。
+"""
+import argparse
+import json
+import logging
+import mmap
+import struct
+import sys
+
+from rtmp_video.amf0 import AMF0Error, decode_amf0_all
+from rtmp_chunk import RTMP_MSG_AUDIO, RTMP_MSG_COMMAND_AMF0, RTMP_MSG_DATA_AMF0, RTMP_MSG_VIDEO, RtmpChunkParser
+from rtmp_probe import StreamStats
+
+logger = logging.getLogger("rtmp_pcap")
+logger.addHandler(logging.NullHandler())
+
+RTMP_PORT = 1935
+MAX_PENDING_BYTES = 4 * 1024 * 1024 # 每个 TCP 方向最多缓存的乱序数据
+
+PCAP_MAGIC_US = 0xA1B2C3D4
+PCAP_MAGIC_NS = 0xA1B23C4D
+PCAPNG_SHB = 0x0A0D0D0A
+PCAPNG_BYTE_ORDER_MAGIC = 0x1A2B3C4D
+PCAPNG_IDB = 1
+PCAPNG_OPB = 2 # 已废弃的 Packet Block
+PCAPNG_SPB = 3
+PCAPNG_EPB = 6
+PCAPNG_OPT_IF_TSRESOL = 9
+
+LINKTYPE_NULL = 0
+LINKTYPE_ETHERNET = 1
+LINKTYPE_RAW = 101
+LINKTYPE_LOOP = 108
+LINKTYPE_LINUX_SLL = 113
+LINKTYPE_IPV4 = 228
+LINKTYPE_IPV6 = 229
+LINKTYPE_LINUX_SLL2 = 276
+
+ETHERTYPE_IPV4 = 0x0800
+ETHERTYPE_IPV6 = 0x86DD
+_ETHERTYPE_VLAN = (0x8100, 0x88A8, 0x9100)
+_IPV6_EXTENSION_HEADERS = (0, 43, 60) # hop-by-hop / routing / destination options
+
+TCP_FIN = 0x01
+TCP_SYN = 0x02
+TCP_RST = 0x04
+TCP_ACK = 0x10
+
+_unpack_u16_be = struct.Struct('>H').unpack_from
+
+
+class PcapError(ValueError):
+    pass
+
+
+def iter_pcap_packets(path):
+    """
+    逐个读取 pcap / pcapng 文件中的数据包 (按文件格式自动识别)。
+    Yields:
+        (timestamp, linktype, data, truncated): timestamp 为秒 (float)；data 是指向 mmap 的 memoryview，
+        只在下一次迭代前有效；truncated 表示抓包长度小于原始长度 (snaplen 截断)。
+    """
+    with open(path, 'rb') as fd:
+        if fd.seek(0, 2) < 24:
+            raise PcapError(f"{path}: too short for a pcap/pcapng file")
+        mm = mmap.mmap(fd.fileno(), 0, access=mmap.ACCESS_READ)
+    view = memoryview(mm)
+    try:
+        magic = struct.unpack_from('<I', view)[0]
+        if magic == PCAPNG_SHB:
+            yield from _iter_pcapng(view)
+        elif magic in (PCAP_MAGIC_US, PCAP_MAGIC_NS) or struct.unpack_from('>I', view)[0] in (PCAP_MAGIC_US, PCAP_MAGIC_NS):
+            yield from _iter_pcap(view)
+        else:
+            raise PcapError(f"{path}: not a pcap/pcapng file (magic 0x{magic:08x})")
+    finally:
+        view.release()
+        try:
+            mm.close()
+        except BufferError:
+            pass # 调用方仍持有 data 视图，映射在这些视图释放后由 GC 回收
+
+
+def _iter_pcap(view):
+    for endian in ('<', '>'):
+        magic = struct.unpack_from(endian + 'I', view)[0]
+        if magic in (PCAP_MAGIC_US, PCAP_MAGIC_NS):
+            break
+    scale = 1e-9 if magic == PCAP_MAGIC_NS else 1e-6
+    linktype = struct.unpack_from(endian + 'I', view, 20)[0] & 0xFFFF
+    record_header = struct.Struct(endian + 'IIII').unpack_from
+    size = len(view)
+    offset = 24
+    while offset + 16 <= size:
+        ts_sec, ts_frac, incl_len, orig_len = record_header(view, offset)
+        offset += 16
+        if offset + incl_len > size:
+            logger.warning(f"Warning: Truncated pcap record at offset {offset - 16}.")
+            break
+        yield ts_sec + ts_frac * scale, linktype, view[offset : offset + incl_len], incl_len < orig_len
+        offset += incl_len
+
+
+def _iter_pcapng(view):
+    size = len(view)
+    offset = 0
+    endian = '<'
+    interfaces = [] # (linktype, 每个时间戳单位的秒数, snaplen)
+    while offset + 12 <= size:
+        block_type = struct.unpack_from(endian + 'I', view, offset)[0]
+        if block_type == PCAPNG_SHB:
+            # 每个 section 可以有自己的字节序，interface id 也在 section 内重新编号
+            byte_order_magic = struct.unpack_from('<I', view, offset + 8)[0]
+            endian = '<' if byte_order_magic == PCAPNG_BYTE_ORDER_MAGIC else '>'
+            interfaces = []
+        block_length = struct.unpack_from(endian + 'I', view, offset + 4)[0]
+        if block_length < 12 or block_length % 4 or offset + block_length > size:
+            logger.warning(f"Warning: Bad or truncated pcapng block at offset {offset}.")
+            break
+        body = view[offset + 8 : offset + block_length - 4]
+        offset += block_length
+
+        if block_type == PCAPNG_EPB or block_type == PCAPNG_OPB:
+            if block_type == PCAPNG_EPB:
+                interface_id, ts_high, ts_low, cap_len, orig_len = struct.unpack_from(endian + 'IIIII', body)
+            else:
+                interface_id, _, ts_high, ts_low, cap_len, orig_len = struct.unpack_from(endian + 'HHIIII', body)
+            if interface_id >= len(interfaces):
+                continue
+            linktype, ts_unit, _ = interfaces[interface_id]
+            yield ((ts_high << 32) | ts_low) * ts_unit, linktype, body[20 : 20 + cap_len], cap_len < orig_len
+        elif block_type == PCAPNG_SPB:
+            if not interfaces:
+                continue
+            linktype, snaplen = interfaces[0][0], interfaces[0][2]
+            orig_len = struct.unpack_from(endian + 'I', body)[0]
+            cap_len = min(orig_len, len(body) - 4, snaplen or orig_len)
+            yield 0.0, linktype, body[4 : 4 + cap_len], cap_len < orig_len
+        elif block_type == PCAPNG_IDB:
+            linktype, _, snaplen = struct.unpack_from(endian + 'HHI', body)
+            interfaces.append((linktype, _pcapng_ts_unit(body[8:], endian), snaplen))
+
+
+def _pcapng_ts_unit(options, endian):
+    """
+    从 IDB 的选项里取 if_tsresol，默认微秒。
+    """
+    pos = 0
+    while pos + 4 <= len(options):
+        code, length = struct.unpack_from(endian + 'HH', options, pos)
+        if code == 0:
+            break
+        if code == PCAPNG_OPT_IF_TSRESOL and length >= 1:
+            resolution = options[pos + 4]
+            return 2.0 ** -(resolution & 0x7F) if resolution & 0x80 else 10.0 ** -resolution
+        pos += 4 + (length + 3) // 4 * 4
+    return 1e-6
+
+
+def decode_tcp(linktype, frame):
+    """
+    从链路层帧中取出 IPv4/IPv6 上的 TCP 段。
+    Returns:
+        (src, sport, dst, dport, seq, flags, payload)，src/dst 为地址字节 (bytes)；
+        不是 TCP、IP 分片或帧被截断时返回 None。
+    """
+    if linktype == LINKTYPE_ETHERNET:
+        if len(frame) < 14:
+            return None
+        ethertype = _unpack_u16_be(frame, 12)[0]
+        pos = 14
+        while ethertype in _ETHERTYPE_VLAN and len(frame) >= pos + 4:
+            ethertype = _unpack_u16_be(frame, pos + 2)[0]
+            pos += 4
+        packet = frame[pos:]
+    elif linktype == LINKTYPE_LINUX_SLL:
+        if len(frame) < 16:
+            return None
+        ethertype = _unpack_u16_be(frame, 14)[0]
+        packet = frame[16:]
+    elif linktype == LINKTYPE_LINUX_SLL2:
+        if len(frame) < 20:
+            return None
+        ethertype = _unpack_u16_be(frame, 0)[0]
+        packet = frame[20:]
+    elif linktype in (LINKTYPE_NULL, LINKTYPE_LOOP, LINKTYPE_RAW, LINKTYPE_IPV4, LINKTYPE_IPV6):
+        packet = frame[4:] if linktype in (LINKTYPE_NULL, LINKTYPE_LOOP) else frame
+        if not packet:
+            return None
+        # 这几种链路层直接从 IP 版本号判断，不依赖 (主机字节序的) 地址族字段
+        ethertype = ETHERTYPE_IPV4 if packet[0] >> 4 == 4 else ETHERTYPE_IPV6
+    else:
+        return None
+
+    if ethertype == ETHERTYPE_IPV4:
+        if len(packet) < 20 or packet[0] >> 4 != 4:
+            return None
+        header_length = (packet[0] & 0x0F) * 4
+        total_length = _unpack_u16_be(packet, 2)[0]
+        if packet[9] != 6 or _unpack_u16_be(packet, 6)[0] & 0x3FFF: # 非 TCP，或 MF / fragment offset
+            return None
+        src, dst = bytes(packet[12:16]), bytes(packet[16:20])
+        # total_length 去掉以太网最小帧长的填充; TSO 抓包里可能为 0，此时取整个帧
+        segment = packet[header_length : total_length] if total_length else packet[header_length:]
+    elif ethertype == ETHERTYPE_IPV6:
+        if len(packet) < 40:
+            return None
+        next_header = packet[6]
+        payload_length = _unpack_u16_be(packet, 4)[0]
+        src, dst = bytes(packet[8:24]), bytes(packet[24:40])
+        segment = packet[40 : 40 + payload_length] if payload_length else packet[40:]
+        while next_header in _IPV6_EXTENSION_HEADERS and len(segment) >= 8:
+            next_header, extension_length = segment[0], (segment[1] + 1) * 8
+            segment = segment[extension_length:]
+        if next_header != 6:
+            return None
+    else:
+        return None
+
+    if len(segment) < 20:
+        return None
+    sport, dport, seq = struct.unpack_from('>HHI', segment)
+    data_offset = (segment[12] >> 4) * 4
+    return src, sport, dst, dport, seq, segment[13], segment[data_offset:]
+
+
+def _format_address(address, port):
+    if len(address) == 4:
+        return f"{'.'.join(map(str, address))}:{port}"
+    return f"[{':'.join(address[i:i + 2].hex() for i in range(0, 16, 2))}]:{port}"
+
+
+class _TcpDirection:
+    """
+    一个 TCP 方向上的按序重组。乱序段按 seq 暂存，补齐后依次交给 deliver；
+    暂存超过 max_pending 字节 (抓包丢了数据) 时，该方向标记为 broken 并停止解析，
+    因为丢失字节之后的 chunk 边界已经无法确定。
+    """
+    __slots__ = ('next_seq', 'pending', 'pending_bytes', 'max_pending', 'deliver', 'bytes', 'broken', 'fin_seq')
+
+    def __init__(self, deliver, max_pending):
+        self.next_seq = None
+        self.pending = {}
+        self.pending_bytes = 0
+        self.max_pending = max_pending
+        self.deliver = deliver
+        self.bytes = 0
+        self.broken = None
+        self.fin_seq = None
+
+    @property
+    def finished(self):
+        """
+        收到 FIN 且 FIN 之前的数据都已交付 (FIN 可能先于最后几个乱序段到达)。
+        """
+        return self.fin_seq is not None and (self.next_seq is None or self.broken is not None
+                                             or self.next_seq == self.fin_seq)
+
+    def segment(self, seq, flags, payload):
+        if flags & TCP_SYN:
+            self.next_seq = (seq + 1) & 0xFFFFFFFF
+            return
+        if flags & TCP_FIN:
+            self.fin_seq = (seq + len(payload)) & 0xFFFFFFFF
+        if self.next_seq is None or self.broken is not None or not payload:
+            return
+        # 带符号的序号差，处理 32 位回绕
+        delta = ((seq - self.next_seq + 0x80000000) & 0xFFFFFFFF) - 0x80000000
+        if delta > 0:
+            if self.pending_bytes + len(payload) > self.max_pending:
+                self.broken = f"gap at seq {self.next_seq} (more than {self.max_pending} bytes out of order)"
+                self.pending.clear()
+                self.pending_bytes = 0
+                return
+            if seq not in self.pending:
+                self.pending[seq] = bytes(payload)
+                self.pending_bytes += len(payload)
+            return
+        if -delta >= len(payload):
+            return # 重传
+        self._accept(payload[-delta:])
+        while self.pending and self._drain_pending():
+            pass
+
+    def _accept(self, data):
+        self.next_seq = (self.next_seq + len(data)) & 0xFFFFFFFF
+        self.bytes += len(data)
+        self.deliver(data)
+
+    def _drain_pending(self):
+        """
+        交付所有已经接上的暂存段，返回是否有进展。
+        """
+        progress = False
+        for seq in list(self.pending):
+            delta = ((seq - self.next_seq + 0x80000000) & 0xFFFFFFFF) - 0x80000000
+            if delta > 0:
+                continue
+            data = self.pending.pop(seq)
+            self.pending_bytes -= len(data)
+            if -delta < len(data):
+                self._accept(data[-delta:])
+                progress = True
+        return progress
+
+    def close(self):
+        if self.pending and self.broken is None:
+            self.broken = f"capture ended with {self.pending_bytes} bytes after a gap at seq {self.next_seq}"
+        self.pending.clear()
+        self.pending_bytes = 0
+
+
+class CaptureStreamStats(StreamStats):
+    """
+    rtmp_probe.StreamStats 加上抓包里才有的信息：发起的命令 (publish / play) 和抓包时间范围。
+    """
+    def __init__(self, app, name, command=None, capture_ts=None):
+        super().__init__(app, name)
+        self.command = command
+        self.first_capture_ts = self.last_capture_ts = capture_ts
+
+    def summary(self):
+        """
+        返回统计结果 (dict)。速率按 RTMP 时间戳计算，与抓包的时间跨度和分析速度无关。
+        """
+        summary = {
+            'stream': self.key,
+            'command': self.command,
+            'first_capture_ts': self.first_capture_ts,
+            'last_capture_ts': self.last_capture_ts,
+            'codec': self.codec,
+            'width': self.width,
+            'height': self.height,
+            'declared_fps': self.declared_fps,
+            'video_frames': self.video_frames,
+            'keyframes': self.keyframes,
+            'gop_min': self.gop_min,
+            'gop_max': self.gop_max,
+            'sequence_headers': self.sequence_headers,
+            'video_bytes': self.video_bytes,
+            'audio_bytes': self.audio_bytes,
+            'duration_ms': None,
+            'fps': None,
+            'video_kbps': None,
+            'resolution_changes': self.resolution_changes,
+            'errors': self.errors,
+            'metadata': self.metadata,
+        }
+        if self.first_ts is not None and self.last_ts > self.first_ts:
+            duration = self.last_ts - self.first_ts
+            summary['duration_ms'] = duration
+            summary['fps'] = round((self.video_frames - 1) * 1000.0 / duration, 3)
+            summary['video_kbps'] = round(self.video_bytes * 8 / duration, 1)
+        return summary
+
+
+class RtmpConnection:
+    """
+    一个 RTMP TCP 连接：两个方向各有一个重组器和 chunk 解析器。
+    客户端 -> 服务端方向上的 publish 对应推上来的流，play 对应服务端 -> 客户端方向发出的流。
+    """
+    def __init__(self, client, server, first_seen, analyzer):
+        self.client = client
+        self.server = server
+        self.first_seen = self.last_seen = first_seen
+        self.analyzer = analyzer
+        self.app = None
+        self.streams = {'c2s': None, 's2c': None}
+        self.finished_streams = []
+        self.bytes = {'c2s': 0, 's2c': 0}
+        self.errors = []
+        self.parsers = {
+            direction: RtmpChunkParser(skip_handshake=True, parse_slice_headers=analyzer.parse_slice_headers)
+            for direction in ('c2s', 's2c')}
+        self.directions = {
+            direction: _TcpDirection(lambda data, d=direction: self._on_data(d, data), analyzer.max_pending_bytes)
+            for direction in ('c2s', 's2c')}
+        self.closed = False
+
+    @property
+    def key(self):
+        return f"{_format_address(*self.client)} -> {_format_address(*self.server)}"
+
+    def _on_data(self, direction, data):
+        for message in self.parsers[direction].feed(data):
+            self._on_message(direction, message)
+
+    def _on_message(self, direction, message):
+        type_id = message.type_id
+        if type_id == RTMP_MSG_VIDEO:
+            self._stats(direction).on_video(message)
+        elif type_id == RTMP_MSG_AUDIO:
+            self._stats(direction).on_audio(message)
+        elif type_id == RTMP_MSG_COMMAND_AMF0:
+            self._on_command(direction, message)
+        elif type_id == RTMP_MSG_DATA_AMF0:
+            self._on_data_message(direction, message)
+        if self.analyzer.on_message is not None:
+            self.analyzer.on_message(self, direction, message)
+
+    def _stats(self, direction, name=None):
+        stats = self.streams[direction]
+        if stats is None or (name is not None and name != stats.name):
+            if stats is not None:
+                self._finish_stream(direction)
+            # 没看到 publish/play 就收到媒体时流名记为空
+            stats = self.streams[direction] = CaptureStreamStats(self.app or '', name or '', capture_ts=self.last_seen)
+        return stats
+
+    def _finish_stream(self, direction):
+        stats = self.streams[direction]
+        if stats is not None:
+            stats.active = False
+            self.finished_streams.append((direction, stats))
+            self.streams[direction] = None
+
+    def _on_command(self, direction, message):
+        try:
+            values = decode_amf0_all(message.payload)
+        except AMF0Error as e:
+            logger.warning(f"Warning: {self.key}: bad AMF0 command: {e}")
+            return
+        if len(values) < 2 or not isinstance(values[0], str) or direction != 'c2s':
+            return
+        name, args = values[0], values[3:]
+        if name == 'connect':
+            command_object = values[2] if len(values) > 2 and isinstance(values[2], dict) else {}
+            self.app = command_object.get('app', '')
+        elif name in ('publish', 'play'):
+            stream_name = args[0] if args and isinstance(args[0], str) else ''
+            self._stats('c2s' if name == 'publish' else 's2c', stream_name).command = name
+        elif name in ('deleteStream', 'closeStream'):
+            self._finish_stream('c2s')
+            self._finish_stream('s2c')
+
+    def _on_data_message(self, direction, message):
+        try:
+            values = decode_amf0_all(message.payload)
+        except AMF0Error:
+            return
+        if values and values[0] == '@setDataFrame':
+            values = values[1:]
+        if len(values) >= 2 and values[0] == 'onMetaData':
+            self._stats(direction).metadata = values[1]
+
+    def has_data(self):
+        return self.directions is None or any(d.bytes for d in self.directions.values())
+
+    def segment(self, from_client, timestamp, seq, flags, payload):
+        self.last_seen = timestamp
+        direction = self.directions['c2s' if from_client else 's2c']
+        direction.segment(seq, flags, payload)
+        stats = self.streams['c2s' if from_client else 's2c']
+        if stats is not None:
+            stats.last_capture_ts = timestamp
+        if flags & TCP_RST or all(d.finished for d in self.directions.values()):
+            self.close()
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        for name, direction in self.directions.items():
+            direction.close()
+            self.bytes[name] = direction.bytes
+            if direction.broken is not None:
+                self.errors.append(f"{name}: {direction.broken}")
+        self._finish_stream('c2s')
+        self._finish_stream('s2c')
+        # 连接结束后只保留统计，释放解析器和重组缓冲
+        self.parsers = None
+        self.directions = None
+
+    def report(self):
+        streams = []
+        for direction, stats in self.finished_streams:
+            summary = stats.summary()
+            summary['direction'] = direction
+            streams.append(summary)
+        return {
+            'connection': self.key,
+            'app': self.app,
+            'first_seen': self.first_seen,
+            'last_seen': self.last_seen,
+            'bytes': self.bytes,
+            'errors': self.errors,
+            'streams': streams,
+        }
+
+
+class RtmpPcapAnalyzer:
+    """
+    Args:
+        ports (iterable[int]): RTMP 服务端口，任一端口命中即认为是 RTMP 连接。
+        parse_slice_headers (bool): 是否解析每个 slice header。
+        max_pending_bytes (int): 每个 TCP 方向最多缓存的乱序数据，超过即认为抓包丢了数据。
+        on_message (callable): 可选，on_message(connection, direction, message) 在每条 RTMP 消息后调用，
+            direction 为 'c2s' / 's2c'，视频消息的解析结果在 message.parsed。
+    """
+    def __init__(self, ports=(RTMP_PORT,), parse_slice_headers=False, max_pending_bytes=MAX_PENDING_BYTES,
+                 on_message=None):
+        self.ports = frozenset(ports)
+        self.parse_slice_headers = parse_slice_headers
+        self.max_pending_bytes = max_pending_bytes
+        self.on_message = on_message
+        self.connections = {} # (client, server) -> RtmpConnection，进行中的连接
+        self.finished = []
+        self.packets = 0
+        self.tcp_segments = 0
+        self.truncated_packets = 0
+        self.midstream_segments = 0 # 没看到 SYN 的连接上的段
+
+    def add_file(self, path):
+        for timestamp, linktype, frame, truncated in iter_pcap_packets(path):
+            self.packets += 1
+            if truncated:
+                self.truncated_packets += 1
+            segment = decode_tcp(linktype, frame)
+            if segment is not None:
+                self.add_segment(timestamp, *segment)
+
+    def add_segment(self, timestamp, src, sport, dst, dport, seq, flags, payload):
+        if sport not in self.ports and dport not in self.ports:
+            return
+        self.tcp_segments += 1
+        source, destination = (src, sport), (dst, dport)
+        connection = self.connections.get((source, destination))
+        from_client = True
+        if connection is None:
+            connection = self.connections.get((destination, source))
+            from_client = False
+        syn = flags & TCP_SYN and not flags & TCP_ACK
+        if connection is None or (syn and from_client and connection.has_data()):
+            if not syn:
+                self.midstream_segments += 1
+                return
+            if connection is not None:
+                self._close(connection) # 同一四元组上的新连接 (端口复用)
+            connection = RtmpConnection(source, destination, timestamp, self)
+            self.connections[(source, destination)] = connection
+            from_client = True
+        connection.segment(from_client, timestamp, seq, flags, payload)
+        if connection.closed:
+            self._close(connection)
+
+    def _close(self, connection):
+        connection.close()
+        self.connections.pop((connection.client, connection.server), None)
+        self.finished.append(connection.report())
+
+    def finish(self):
+        """
+        关闭所有未结束的连接 (抓包结束时仍在进行)，返回完整报告。
+        """
+        for connection in list(self.connections.values()):
+            self._close(connection)
+        return self.report()
+
+    def report(self):
+        return {
+            'packets': self.packets,
+            'rtmp_tcp_segments': self.tcp_segments,
+            'truncated_packets': self.truncated_packets,
+            'midstream_segments': self.midstream_segments,
+            'connections': self.finished,
+        }
+
+
+def analyze_pcap(path, **kwargs):
+    """
+    分析单个抓包文件，参数同 RtmpPcapAnalyzer。
+    Returns:
+        dict: 见 RtmpPcapAnalyzer.report()。
+    """
+    analyzer = RtmpPcapAnalyzer(**kwargs)
+    analyzer.add_file(path)
+    return analyzer.finish()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Reassemble RTMP sessions from a pcap/pcapng capture and report per-stream stats.")
+    parser.add_argument("files", nargs="+", help="pcap / pcapng captures, analysed in order as one capture")
+    parser.add_argument("-p", "--port", type=int, action="append", help=f"RTMP server port (default {RTMP_PORT}, repeatable)")
+    parser.add_argument("--slice-headers", action="store_true", help="also parse every slice header")
+    parser.add_argument("--max-pending", type=int, default=MAX_PENDING_BYTES,
+                        help="out-of-order bytes buffered per TCP direction before giving up on it")
+    parser.add_argument("-o", "--output", help="write the JSON report here instead of stdout")
+    parser.add_argument("-v", "--verbose", action="store_true")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING, format="%(message)s")
+
+    analyzer = RtmpPcapAnalyzer(ports=args.port or (RTMP_PORT,), parse_slice_headers=args.slice_headers,
+                                max_pending_bytes=args.max_pending)
+    try:
+        for path in args.files:
+            analyzer.add_file(path)
+    except (OSError, PcapError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    report = analyzer.finish()
+    out = open(args.output, 'w') if args.output else sys.stdout
+    try:
+        json.dump(report, out, indent=2, default=str)
+        out.write("\n")
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
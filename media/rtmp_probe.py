@@ -0,0 +1,378 @@
+"""
+asyncio 实现的 RTMP 推流探针：接受推流 (handshake, connect, createStream, publish)，
+用 RtmpChunkParser 重组消息并解析视频，统计每路流的码率、帧率、GOP 和分辨率变化。
+不转发、不存储媒体数据，每个连接只占一个协程和一个 chunk 解析器。
+
+用法: python rtmp_probe.py [--host 0.0.0.0] [--port 1935] [-i 统计打印间隔秒数]
+      ffmpeg -re -i input.flv -c copy -f flv rtmp://127.0.0.1/live/test
+"""
+import argparse
+import asyncio
+import logging
+import os
+import struct
+import sys
+import time
+
+from rtmp_video.amf0 import AMF0Error, decode_amf0_all, encode_amf0
+from rtmp_chunk import (RTMP_MSG_AUDIO, RTMP_MSG_COMMAND_AMF0, RTMP_MSG_DATA_AMF0, RTMP_MSG_SET_CHUNK_SIZE,
+                        RTMP_MSG_SET_PEER_BANDWIDTH, RTMP_MSG_VIDEO, RTMP_MSG_WINDOW_ACK_SIZE, RTMP_MSG_ACK,
+                        RtmpChunkParser, encode_message)
+from rtmp_video.h264 import SPS_CACHE
+from rtmp_video.health import StreamHealthMonitor
+
+logger = logging.getLogger("rtmp_probe")
+logger.addHandler(logging.NullHandler())
+
+RTMP_VERSION = 3
+HANDSHAKE_PACKET_SIZE = 1536
+SERVER_CHUNK_SIZE = 4096
+SERVER_WINDOW_ACK_SIZE = 2500000
+PUBLISH_STREAM_ID = 1
+READ_SIZE = 64 * 1024
+
+# 服务端发送消息使用的 chunk stream id
+CSID_PROTOCOL = 2
+CSID_COMMAND = 3
+CSID_STREAM = 5
+
+
+class StreamStats:
+    """
+    单路推流的实时统计。只在收到消息时做计数，速率在 snapshot() 时按两次快照的差值计算。
+    """
+    def __init__(self, app, name):
+        self.app = app
+        self.name = name
+        self.started = time.monotonic()
+        self.video_bytes = 0
+        self.audio_bytes = 0
+        self.video_frames = 0
+        self.keyframes = 0
+        self.sequence_headers = 0
+        self.errors = 0
+        self.first_ts = self.last_ts = None
+        self.frames_since_key = None
+        self.gop_min = self.gop_max = self.last_gop = None
+        self.codec = None
+        self.width = self.height = None
+        self.declared_fps = None
+        self.resolution_changes = []
+        self.metadata = None
+        self.health = None # StreamHealth，服务端开启健康监控时才有
+        self.active = True
+        self._last_snapshot = (self.started, 0, 0, 0)
+
+    @property
+    def key(self):
+        return f"{self.app}/{self.name}"
+
+    def on_video(self, message):
+        self.video_bytes += len(message.payload)
+        parsed = message.parsed
+        if self.health is not None:
+            self.health.on_video(message.timestamp, len(message.payload), parsed)
+        if parsed is None:
+            self.errors += 1
+            return
+        self.errors += len(parsed.errors)
+        self.codec = parsed.codec_id_str
+
+        if parsed.avc_packet_type == 0:
+            self.sequence_headers += 1
+            self._on_sequence_header(parsed, message.timestamp)
+            return
+        if parsed.avc_packet_type != 1:
+            return
+
+        if self.first_ts is None:
+            self.first_ts = message.timestamp
+        self.last_ts = message.timestamp
+        self.video_frames += 1
+        if parsed.frame_type == 1:
+            self.keyframes += 1
+            if self.frames_since_key is not None:
+                gop = self.last_gop = self.frames_since_key
+                self.gop_min = gop if self.gop_min is None else min(self.gop_min, gop)
+                self.gop_max = gop if self.gop_max is None else max(self.gop_max, gop)
+            self.frames_since_key = 1
+        elif self.frames_since_key is not None:
+            self.frames_since_key += 1
+
+    def _on_sequence_header(self, parsed, timestamp):
+        sps = None
+        if parsed.avc_decoder_config_record and parsed.avc_decoder_config_record['sps_nalus']:
+            sps = SPS_CACHE.parse(parsed.avc_decoder_config_record['sps_nalus'][0])
+            size = (sps.cropped_width, sps.cropped_height) if sps is not None else None
+        elif parsed.hevc_decoder_config_record and parsed.hevc_decoder_config_record['sps_nalus']:
+            from rtmp_video.hevc import HEVC_SPS_CACHE
+            sps = HEVC_SPS_CACHE.parse(parsed.hevc_decoder_config_record['sps_nalus'][0])
+            size = (sps.width, sps.height) if sps is not None else None
+        if sps is None:
+            return
+        self.declared_fps = sps.frame_rate
+        if size != (self.width, self.height):
+            if self.width is not None:
+                self.resolution_changes.append((timestamp, self.width, self.height, size[0], size[1]))
+            self.width, self.height = size
+
+    def on_audio(self, message):
+        self.audio_bytes += len(message.payload)
+
+    def snapshot(self):
+        """
+        返回当前统计 (dict)。bitrate / fps 为与上一次 snapshot 之间的平均值。
+        """
+        now = time.monotonic()
+        last_time, last_video, last_audio, last_frames = self._last_snapshot
+        elapsed = now - last_time
+        self._last_snapshot = (now, self.video_bytes, self.audio_bytes, self.video_frames)
+        snapshot = {
+            'stream': self.key,
+            'active': self.active,
+            'uptime': round(now - self.started, 3),
+            'codec': self.codec,
+            'width': self.width,
+            'height': self.height,
+            'declared_fps': self.declared_fps,
+            'fps': round((self.video_frames - last_frames) / elapsed, 2) if elapsed > 0 else None,
+            'video_kbps': round((self.video_bytes - last_video) * 8 / elapsed / 1000, 1) if elapsed > 0 else None,
+            'audio_kbps': round((self.audio_bytes - last_audio) * 8 / elapsed / 1000, 1) if elapsed > 0 else None,
+            'video_frames': self.video_frames,
+            'keyframes': self.keyframes,
+            'gop_last': self.last_gop,
+            'gop_min': self.gop_min,
+            'gop_max': self.gop_max,
+            'sequence_headers': self.sequence_headers,
+            'resolution_changes': len(self.resolution_changes),
+            'errors': self.errors,
+        }
+        if self.health is not None:
+            snapshot['health'] = self.health.window()
+        return snapshot
+
+
+class _RtmpSession:
+    """
+    单个推流连接的协议状态 (handshake 之后)。
+    """
+    def __init__(self, server, writer, peer):
+        self.server = server
+        self.writer = writer
+        self.peer = peer
+        self.parser = RtmpChunkParser(parse_slice_headers=server.parse_slice_headers)
+        self.app = None
+        self.stats = None
+        self.closed = False
+        self.peer_window_ack_size = 0
+        self.last_ack = 0
+
+    def send(self, csid, type_id, payload, stream_id=0):
+        self.writer.write(encode_message(csid, 0, type_id, stream_id, payload, SERVER_CHUNK_SIZE))
+
+    def send_command(self, *values, stream_id=0):
+        self.send(CSID_STREAM if stream_id else CSID_COMMAND, RTMP_MSG_COMMAND_AMF0, encode_amf0(*values), stream_id)
+
+    def feed(self, data):
+        for message in self.parser.feed(data):
+            type_id = message.type_id
+            if type_id == RTMP_MSG_VIDEO:
+                if self.stats is not None:
+                    self.stats.on_video(message)
+            elif type_id == RTMP_MSG_AUDIO:
+                if self.stats is not None:
+                    self.stats.on_audio(message)
+            elif type_id == RTMP_MSG_COMMAND_AMF0:
+                self.on_command(message)
+            elif type_id == RTMP_MSG_DATA_AMF0:
+                self.on_data(message)
+            elif type_id == RTMP_MSG_WINDOW_ACK_SIZE and len(message.payload) >= 4:
+                self.peer_window_ack_size = struct.unpack_from('>I', message.payload)[0]
+
+        if self.peer_window_ack_size and self.parser.bytes_received - self.last_ack >= self.peer_window_ack_size:
+            self.last_ack = self.parser.bytes_received
+            self.send(CSID_PROTOCOL, RTMP_MSG_ACK, struct.pack('>I', self.last_ack & 0xFFFFFFFF))
+
+    def on_command(self, message):
+        try:
+            values = decode_amf0_all(message.payload)
+        except AMF0Error as e:
+            logger.warning(f"Warning: {self.peer}: bad AMF0 command: {e}")
+            return
+        if len(values) < 2 or not isinstance(values[0], str):
+            return
+        name, transaction_id = values[0], values[1]
+        args = values[3:]
+
+        if name == 'connect':
+            command_object = values[2] if len(values) > 2 and isinstance(values[2], dict) else {}
+            self.app = command_object.get('app', '')
+            self.send(CSID_PROTOCOL, RTMP_MSG_WINDOW_ACK_SIZE, struct.pack('>I', SERVER_WINDOW_ACK_SIZE))
+            self.send(CSID_PROTOCOL, RTMP_MSG_SET_PEER_BANDWIDTH, struct.pack('>IB', SERVER_WINDOW_ACK_SIZE, 2))
+            self.send(CSID_PROTOCOL, RTMP_MSG_SET_CHUNK_SIZE, struct.pack('>I', SERVER_CHUNK_SIZE))
+            self.send_command('_result', transaction_id,
+                              {'fmsVer': 'FMS/3,0,1,123', 'capabilities': 31},
+                              {'level': 'status', 'code': 'NetConnection.Connect.Success',
+                               'description': 'Connection succeeded.', 'objectEncoding': 0})
+        elif name == 'createStream':
+            self.send_command('_result', transaction_id, None, PUBLISH_STREAM_ID)
+        elif name == 'publish':
+            stream_name = args[0] if args and isinstance(args[0], str) else ''
+            self.stats = self.server.register_stream(self.app, stream_name)
+            self.send_command('onStatus', 0, None,
+                              {'level': 'status', 'code': 'NetStream.Publish.Start',
+                               'description': f'{stream_name} is now published.'},
+                              stream_id=message.stream_id or PUBLISH_STREAM_ID)
+            logger.info(f"{self.peer} publishing {self.stats.key}")
+        elif name in ('deleteStream', 'FCUnpublish', 'closeStream'):
+            self.closed = name != 'FCUnpublish'
+        elif transaction_id:
+            # releaseStream / FCPublish / getStreamLength 等，回一个空结果即可
+            self.send_command('_result', transaction_id, None)
+
+    def on_data(self, message):
+        try:
+            values = decode_amf0_all(message.payload)
+        except AMF0Error:
+            return
+        if values and values[0] == '@setDataFrame':
+            values = values[1:]
+        if len(values) >= 2 and values[0] == 'onMetaData' and self.stats is not None:
+            self.stats.metadata = values[1]
+
+
+class RtmpProbeServer:
+    """
+    Args:
+        parse_slice_headers (bool): 是否解析每个 slice header。只看码率/GOP 时关掉可以省下大部分 CPU。
+        keep_finished (bool): 推流结束后是否保留统计 (active=False)。
+        health (StreamHealthMonitor): 提供时每路流同时做滑动窗口健康监控，阈值和告警回调在 monitor 上配置。
+    """
+    def __init__(self, host='0.0.0.0', port=1935, parse_slice_headers=False, keep_finished=True, health=None):
+        self.host = host
+        self.port = port
+        self.parse_slice_headers = parse_slice_headers
+        self.keep_finished = keep_finished
+        self.health = health
+        self.streams = {}
+        self.connections = 0
+        self._server = None
+
+    def register_stream(self, app, name):
+        stats = StreamStats(app, name)
+        if self.health is not None:
+            stats.health = self.health.add_stream(stats.key)
+        self.streams[stats.key] = stats
+        return stats
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port,
+                                                  backlog=4096, limit=READ_SIZE)
+        if self.port == 0:
+            self.port = self._server.sockets[0].getsockname()[1]
+        return self._server
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    def snapshot(self):
+        return [stats.snapshot() for stats in list(self.streams.values())]
+
+    async def _handshake(self, reader, writer):
+        c0c1 = await reader.readexactly(1 + HANDSHAKE_PACKET_SIZE)
+        if c0c1[0] != RTMP_VERSION:
+            raise ConnectionError(f"unsupported RTMP version {c0c1[0]}")
+        # 简单握手: S1 = time + zero + random，S2 原样回显 C1
+        s1 = struct.pack('>II', int(time.monotonic() * 1000) & 0xFFFFFFFF, 0) + os.urandom(HANDSHAKE_PACKET_SIZE - 8)
+        writer.write(bytes([RTMP_VERSION]) + s1 + c0c1[1:])
+        await writer.drain()
+        await reader.readexactly(HANDSHAKE_PACKET_SIZE) # C2
+
+    async def _handle_connection(self, reader, writer):
+        peer = writer.get_extra_info('peername')
+        self.connections += 1
+        session = None
+        try:
+            await self._handshake(reader, writer)
+            session = _RtmpSession(self, writer, peer)
+            while not session.closed:
+                data = await reader.read(READ_SIZE)
+                if not data:
+                    break
+                session.feed(data)
+                if writer.transport.get_write_buffer_size():
+                    await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError) as e:
+            logger.info(f"{peer} disconnected: {e}")
+        except Exception:
+            logger.exception(f"{peer}: error while handling RTMP connection")
+        finally:
+            self.connections -= 1
+            if session is not None and session.stats is not None:
+                session.stats.active = False
+                if self.health is not None and self.health.streams.get(session.stats.key) is session.stats.health:
+                    self.health.remove_stream(session.stats.key)
+                if not self.keep_finished:
+                    self.streams.pop(session.stats.key, None)
+            writer.close()
+
+
+async def _report_loop(server, interval):
+    while True:
+        await asyncio.sleep(interval)
+        for stats in server.snapshot():
+            print(stats, flush=True)
+
+
+def _log_alert(alert):
+    if alert.active:
+        logger.warning(f"ALERT {alert.stream}: {alert.kind} value={alert.value} limit={alert.limit} ts={alert.timestamp}")
+    else:
+        logger.warning(f"RECOVERED {alert.stream}: {alert.kind} value={alert.value} ts={alert.timestamp}")
+
+
+async def _serve(args):
+    thresholds = {name: getattr(args, name) for name in
+                  ('min_fps', 'min_kbps', 'max_kbps', 'max_keyframe_interval_ms', 'max_cts_anomalies')}
+    health = None
+    if any(value is not None for value in thresholds.values()):
+        health = StreamHealthMonitor(args.window, on_alert=_log_alert, **thresholds)
+    server = RtmpProbeServer(args.host, args.port, parse_slice_headers=args.slice_headers, health=health)
+    await server.start()
+    print(f"RTMP probe listening on {args.host}:{server.port}", file=sys.stderr)
+    reporter = asyncio.ensure_future(_report_loop(server, args.interval))
+    try:
+        await asyncio.Event().wait()
+    finally:
+        reporter.cancel()
+        await server.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="RTMP ingest probe: accept publishers and report live stream stats.")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=1935)
+    parser.add_argument("-i", "--interval", type=float, default=5.0, help="stats report interval in seconds")
+    parser.add_argument("--slice-headers", action="store_true", help="also parse every slice header")
+    alerts = parser.add_argument_group("health alerts", "any of these enables the sliding-window health monitor")
+    alerts.add_argument("--window", type=float, default=10.0, help="health window in seconds of stream time")
+    alerts.add_argument("--min-fps", type=float)
+    alerts.add_argument("--min-kbps", type=float)
+    alerts.add_argument("--max-kbps", type=float)
+    alerts.add_argument("--max-keyframe-interval", dest="max_keyframe_interval_ms", type=int, metavar="MS")
+    alerts.add_argument("--max-cts-anomalies", type=int, help="negative / oversized CTS or DTS going backwards, per window")
+    parser.add_argument("-v", "--verbose", action="store_true")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING, format="%(message)s")
+    try:
+        asyncio.run(_serve(args))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,126 @@
+"""
+rtmp_probe 的本机回环压测：在同一个事件循环里启动 RtmpProbeServer，
+再开 N 个推流客户端把合成的 (或指定文件里的) FLV 视频 tag 以最快速度推过去，统计吞吐。
+
+用法: python rtmp_probe_loopback.py [-n 推流数] [-f 每路帧数] [--flv capture.flv] [--slice-headers]
+"""
+import argparse
+import asyncio
+import os
+import struct
+import sys
+import time
+
+from bench_parser import length_prefixed, make_avc_record, make_pps, make_slice, make_sps
+from rtmp_video.amf0 import encode_amf0
+from rtmp_video.flv import FLV_TAG_AUDIO, FLV_TAG_VIDEO, iter_flv_tags
+from rtmp_chunk import RTMP_MSG_COMMAND_AMF0, RTMP_MSG_SET_CHUNK_SIZE, encode_message
+from rtmp_probe import HANDSHAKE_PACKET_SIZE, RTMP_VERSION, RtmpProbeServer
+from rtmp_video.health import StreamHealthMonitor
+
+CLIENT_CHUNK_SIZE = 4096
+
+
+def synthetic_tags(frames, gop=30, key_size=40000, inter_size=5000, fps=30):
+    """
+    生成 (tag_type, timestamp, body) 列表：一个 AVC sequence header 加 frames 个视频帧。
+    SPS / PPS / slice 用 bench_parser 的生成器，slice header 与 SPS 对得上，--slice-headers 时能正常解析。
+    """
+    record = make_avc_record([make_sps(1920, 1080, level_idc=42, fps=fps)], [make_pps()])
+    tags = [(FLV_TAG_VIDEO, 0, b'\x17\x00\x00\x00\x00' + record)]
+    idr = length_prefixed([b'\x09\xf0', make_slice(True, key_size)])
+    inter = length_prefixed([b'\x09\xf0', make_slice(False, inter_size, frame_num=1, poc_lsb=2)])
+    for i in range(frames):
+        timestamp = i * 1000 // fps
+        if i % gop == 0:
+            tags.append((FLV_TAG_VIDEO, timestamp, b'\x17\x01\x00\x00\x00' + idr))
+        else:
+            tags.append((FLV_TAG_VIDEO, timestamp, b'\x27\x01\x00\x00\x00' + inter))
+    return tags
+
+
+def file_tags(path):
+    with open(path, 'rb') as fd:
+        return [(tag['tag_type'], tag['timestamp'], bytes(tag['data']))
+                for tag in iter_flv_tags(fd, tag_types={FLV_TAG_AUDIO, FLV_TAG_VIDEO})]
+
+
+async def _discard(reader):
+    while await reader.read(65536):
+        pass
+
+
+async def publish(host, port, name, chunks):
+    """
+    以一个推流客户端的身份完成握手 / connect / createStream / publish，然后写出预先编码好的 chunks。
+    """
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(bytes([RTMP_VERSION]) + bytes(HANDSHAKE_PACKET_SIZE))
+    s0s1s2 = await reader.readexactly(1 + 2 * HANDSHAKE_PACKET_SIZE)
+    writer.write(s0s1s2[1:1 + HANDSHAKE_PACKET_SIZE]) # C2 = S1
+    drain_task = asyncio.ensure_future(_discard(reader))
+
+    writer.write(encode_message(2, 0, RTMP_MSG_SET_CHUNK_SIZE, 0, struct.pack('>I', CLIENT_CHUNK_SIZE)))
+    for payload, stream_id in (
+            (encode_amf0('connect', 1, {'app': 'live', 'type': 'nonprivate', 'tcUrl': f'rtmp://{host}/live'}), 0),
+            (encode_amf0('createStream', 2, None), 0),
+            (encode_amf0('publish', 3, None, name, 'live'), 1)):
+        writer.write(encode_message(3, 0, RTMP_MSG_COMMAND_AMF0, stream_id, payload, CLIENT_CHUNK_SIZE))
+    for data in chunks:
+        writer.write(data)
+        await writer.drain()
+    # 半关闭后读完服务端的响应再关，直接 close() 会因为接收缓冲区里还有数据而发出 RST
+    writer.write_eof()
+    await drain_task
+    writer.close()
+    await writer.wait_closed()
+
+
+async def run(args):
+    tags = file_tags(args.flv) if args.flv else synthetic_tags(args.frames)
+    chunks = [encode_message(6 if tag_type == FLV_TAG_VIDEO else 4, timestamp, tag_type, 1, body, CLIENT_CHUNK_SIZE)
+              for tag_type, timestamp, body in tags]
+    total_bytes = sum(len(c) for c in chunks) * args.publishers
+    video_frames = sum(1 for tag_type, _, body in tags if tag_type == FLV_TAG_VIDEO and body[1:2] == b'\x01')
+
+    alerts = []
+    health = None
+    if args.health:
+        # 合成流是 30 fps、每秒一个关键帧，正常情况下不应有告警
+        health = StreamHealthMonitor(5, on_alert=alerts.append, min_fps=25, max_keyframe_interval_ms=2000,
+                                     max_cts_anomalies=0)
+    server = RtmpProbeServer('127.0.0.1', 0, parse_slice_headers=args.slice_headers, health=health)
+    await server.start()
+    start = time.perf_counter()
+    await asyncio.gather(*(publish('127.0.0.1', server.port, f'stream{i}', chunks) for i in range(args.publishers)))
+    while server.connections:
+        await asyncio.sleep(0.01)
+    elapsed = time.perf_counter() - start
+    await server.close()
+
+    received = sum(stats.video_frames for stats in server.streams.values())
+    errors = sum(stats.errors for stats in server.streams.values())
+    print(f"{args.publishers} publishers, {video_frames} video frames each, "
+          f"{total_bytes / 1e6:.1f} MB in {elapsed:.2f}s")
+    print(f"  {total_bytes / 1e6 / elapsed:.1f} MB/s, {received / elapsed:.0f} frames/s, "
+          f"{received}/{video_frames * args.publishers} frames seen, {errors} errors")
+    if health is not None:
+        print(f"  health monitor: {len(alerts)} alerts")
+    return 0 if received == video_frames * args.publishers else 1
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Loopback throughput test for rtmp_probe.")
+    parser.add_argument("-n", "--publishers", type=int, default=100)
+    parser.add_argument("-f", "--frames", type=int, default=300, help="synthetic video frames per publisher")
+    parser.add_argument("--flv", help="push the audio/video tags of this FLV file instead of synthetic frames")
+    parser.add_argument("--slice-headers", action="store_true", help="let the probe parse every slice header")
+    parser.add_argument("--health", action="store_true", help="also run the sliding-window health monitor per stream")
+    args = parser.parse_args(argv)
+    if args.flv and not os.path.isfile(args.flv):
+        parser.error(f"{args.flv} does not exist")
+    return asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,81 @@
+"""
+RTMP / FLV 视频数据解析库。
+
+    from rtmp_video import parse_rtmp_video_data, VideoStreamContext
+    from rtmp_video.flv import iter_flv_tags
+
+子模块:
+    bitreader  BitReader (RBSP 比特读取)
+    errors     VideoParseError 和各模块共用的警告收集
+    h264       SPS/PPS/slice header、AVC 配置记录、NALU 切分、parse_rtmp_video_data
+    hevc       H.265 部分，遇到 codec_id 12 时才由 h264 加载
+    audio      AudioData / AAC AudioSpecificConfig
+    script     脚本 tag (onMetaData)
+    amf0       AMF0 编解码
+    flv        FLV 文件逐 tag 读取、parse_flv_file
+    remux      解析结果转封装为 Annex-B / MPEG-TS (AnnexBWriter, TsWriter)
+    health     直播流滑动窗口健康监控与阈值告警 (StreamHealthMonitor)
+    records    解析结果记录类型
+    profiling  分阶段计时 / 计数 (PROFILE，默认关闭)
+    cli        命令行入口 (python -m rtmp_video 文件)
+
+导入本包不会加载任何子模块；下面列出的名字在第一次访问时才导入对应子模块。
+"""
+import importlib
+
+_EXPORTS = {
+    'BitReader': 'bitreader',
+    'VideoParseError': 'errors',
+    'VideoStreamContext': 'h264',
+    'ParameterSetCache': 'h264',
+    'SPS_CACHE': 'h264',
+    'PPS_CACHE': 'h264',
+    'parse_h264_sps': 'h264',
+    'parse_h264_pps': 'h264',
+    'parse_h264_slice_header': 'h264',
+    'parse_avc_decoder_configuration_record': 'h264',
+    'parse_avc_config_parameter_sets': 'h264',
+    'parse_nalu_data': 'h264',
+    'parse_annexb_data': 'h264',
+    'iter_annexb_file': 'h264',
+    'parse_rtmp_video_data': 'h264',
+    'parse_hevc_packet': 'hevc',
+    'parse_hevc_decoder_configuration_record': 'hevc',
+    'AudioStreamContext': 'audio',
+    'parse_rtmp_audio_data': 'audio',
+    'parse_aac_audio_specific_config': 'audio',
+    'parse_script_data': 'script',
+    'decode_amf0': 'amf0',
+    'decode_amf0_all': 'amf0',
+    'encode_amf0': 'amf0',
+    'FLV_TAG_AUDIO': 'flv',
+    'FLV_TAG_VIDEO': 'flv',
+    'FLV_TAG_SCRIPT': 'flv',
+    'FLV_TAG_TYPES': 'flv',
+    'is_flv': 'flv',
+    'iter_flv_tags': 'flv',
+    'iter_flv_tags_mmap': 'flv',
+    'parse_flv_file': 'flv',
+    'AnnexBWriter': 'remux',
+    'TsWriter': 'remux',
+    'StreamHealth': 'health',
+    'StreamHealthMonitor': 'health',
+    'HealthThresholds': 'health',
+    'HealthAlert': 'health',
+    'PROFILE': 'profiling',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f'.{module}', __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
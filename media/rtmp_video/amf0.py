@@ -0,0 +1,176 @@
+"""
+AMF0 编解码，用于 RTMP 命令消息 (connect / createStream / publish ...) 和数据消息 (onMetaData)。
+
+只支持 RTMP 里实际出现的类型：number, boolean, string, object, null, undefined,
+ECMA array, strict array, date, long string。
+"""
+import struct
+
+AMF0_NUMBER = 0x00
+AMF0_BOOLEAN = 0x01
+AMF0_STRING = 0x02
+AMF0_OBJECT = 0x03
+AMF0_NULL = 0x05
+AMF0_UNDEFINED = 0x06
+AMF0_REFERENCE = 0x07
+AMF0_ECMA_ARRAY = 0x08
+AMF0_OBJECT_END = 0x09
+AMF0_STRICT_ARRAY = 0x0A
+AMF0_DATE = 0x0B
+AMF0_LONG_STRING = 0x0C
+
+# strict array 的元素全是 number 时 (例如 onMetaData 里 keyframes 的 times / filepositions，
+# 长录制文件里有上万项)，按 9 字节步长一次 unpack，不逐个走 decode_amf0
+_NUMBER_ARRAY_MIN = 8
+_number_array_structs = {}
+
+_unpack_double = struct.Struct('>d').unpack_from
+_unpack_u16 = struct.Struct('>H').unpack_from
+_unpack_u32 = struct.Struct('>I').unpack_from
+_pack_double = struct.Struct('>d').pack
+
+
+class AMF0Error(ValueError):
+    pass
+
+
+def _read_utf8(data, offset, length_size):
+    if length_size == 2:
+        length = _unpack_u16(data, offset)[0]
+    else:
+        length = _unpack_u32(data, offset)[0]
+    offset += length_size
+    end = offset + length
+    if end > len(data):
+        raise AMF0Error("AMF0 string exceeds data length.")
+    return str(data[offset:end], 'utf-8', 'replace'), end
+
+
+def _read_properties(data, offset, out):
+    # name/value 对，以空 name + object end 标记结束
+    while True:
+        if offset + 3 <= len(data) and data[offset] == 0 and data[offset + 1] == 0 and data[offset + 2] == AMF0_OBJECT_END:
+            return offset + 3
+        if offset + 2 > len(data):
+            raise AMF0Error("AMF0 object is not terminated.")
+        name, offset = _read_utf8(data, offset, 2)
+        out[name], offset = decode_amf0(data, offset)
+
+
+def decode_amf0(data, offset=0):
+    """
+    从 data[offset:] 解码一个 AMF0 值。
+    Returns:
+        tuple: (value, 下一个值的 offset)
+    """
+    try:
+        marker = data[offset]
+        offset += 1
+        if marker == AMF0_NUMBER:
+            return _unpack_double(data, offset)[0], offset + 8
+        if marker == AMF0_BOOLEAN:
+            return data[offset] != 0, offset + 1
+        if marker == AMF0_STRING:
+            return _read_utf8(data, offset, 2)
+        if marker == AMF0_LONG_STRING:
+            return _read_utf8(data, offset, 4)
+        if marker in (AMF0_NULL, AMF0_UNDEFINED):
+            return None, offset
+        if marker == AMF0_OBJECT:
+            value = {}
+            return value, _read_properties(data, offset, value)
+        if marker == AMF0_ECMA_ARRAY:
+            value = {}
+            # 声明的元素个数不可靠 (很多编码器写 0)，以 object end 为准
+            return value, _read_properties(data, offset + 4, value)
+        if marker == AMF0_STRICT_ARRAY:
+            count = _unpack_u32(data, offset)[0]
+            offset += 4
+            if count >= _NUMBER_ARRAY_MIN:
+                end = offset + 9 * count
+                if end <= len(data) and bytes(data[offset:end:9]).count(AMF0_NUMBER) == count:
+                    return list(_unpack_number_array(count)(data, offset)), end
+            value = []
+            for _ in range(count):
+                item, offset = decode_amf0(data, offset)
+                value.append(item)
+            return value, offset
+        if marker == AMF0_DATE:
+            # 毫秒时间戳 + 2 字节时区 (已废弃，忽略)
+            return _unpack_double(data, offset)[0], offset + 10
+        if marker == AMF0_REFERENCE:
+            return None, offset + 2
+    except (IndexError, struct.error) as e:
+        raise AMF0Error(f"Truncated AMF0 data: {e}") from None
+    raise AMF0Error(f"Unsupported AMF0 marker 0x{marker:02x} at offset {offset - 1}.")
+
+
+def _unpack_number_array(count):
+    unpack = _number_array_structs.get(count)
+    if unpack is None:
+        unpack = struct.Struct('>' + 'xd' * count).unpack_from
+        if len(_number_array_structs) < 64:
+            _number_array_structs[count] = unpack
+    return unpack
+
+
+def decode_amf0_all(data):
+    """
+    解码 data 中连续的全部 AMF0 值，返回列表。
+    """
+    values = []
+    offset = 0
+    while offset < len(data):
+        value, offset = decode_amf0(data, offset)
+        values.append(value)
+    return values
+
+
+def _encode_utf8(value, out, long_ok=False):
+    raw = value.encode('utf-8')
+    if len(raw) > 0xFFFF:
+        if not long_ok:
+            raise AMF0Error("AMF0 property name is too long.")
+        out.append(AMF0_LONG_STRING)
+        out += struct.pack('>I', len(raw))
+    else:
+        if long_ok:
+            out.append(AMF0_STRING)
+        out += struct.pack('>H', len(raw))
+    out += raw
+
+
+def _encode_value(value, out):
+    if value is None:
+        out.append(AMF0_NULL)
+    elif isinstance(value, bool):
+        out.append(AMF0_BOOLEAN)
+        out.append(1 if value else 0)
+    elif isinstance(value, (int, float)):
+        out.append(AMF0_NUMBER)
+        out += _pack_double(value)
+    elif isinstance(value, str):
+        _encode_utf8(value, out, long_ok=True)
+    elif isinstance(value, dict):
+        out.append(AMF0_OBJECT)
+        for name, item in value.items():
+            _encode_utf8(name, out)
+            _encode_value(item, out)
+        out += b'\x00\x00\x09'
+    elif isinstance(value, (list, tuple)):
+        out.append(AMF0_STRICT_ARRAY)
+        out += struct.pack('>I', len(value))
+        for item in value:
+            _encode_value(item, out)
+    else:
+        raise AMF0Error(f"Cannot encode {type(value).__name__} as AMF0.")
+
+
+def encode_amf0(*values):
+    """
+    依次编码 values，返回 bytes。dict 编码为 object，list/tuple 编码为 strict array。
+    """
+    out = bytearray()
+    for value in values:
+        _encode_value(value, out)
+    return bytes(out)
@@ -0,0 +1,163 @@
+"""
+RTMP AudioData (FLV 音频 tag body) 与 AAC AudioSpecificConfig 的解析。
+"""
+from .bitreader import BitReader
+from .records import AacConfig, AudioTag
+
+SOUND_FORMAT_AAC = 10
+AAC_SEQUENCE_HEADER = 0
+AAC_RAW = 1
+
+# sound_rate 标志位 -> 采样率 (非 AAC 格式使用)
+FLV_SOUND_RATES = (5512, 11025, 22050, 44100)
+
+AAC_SAMPLING_FREQUENCIES = (96000, 88200, 64000, 48000, 44100, 32000, 24000, 22050,
+                            16000, 12000, 11025, 8000, 7350)
+AAC_OBJECT_SBR = 5
+AAC_OBJECT_PS = 29
+# 使用 GASpecificConfig 的 audio object type
+_GA_OBJECT_TYPES = frozenset((1, 2, 3, 4, 6, 7, 17, 19, 20, 21, 22, 23))
+# 各 sound_format 每帧 (每声道) 采样数，未列出的取决于码流
+_FIXED_FRAME_SAMPLES = {2: 1152, 14: 1152, 11: 320}
+
+
+class AudioStreamContext:
+    """
+    单路音频流的解析状态：AAC sequence header 中的 AudioSpecificConfig 决定之后 raw 帧的采样率和每帧采样数。
+    """
+    def __init__(self):
+        self.aac_config = None
+
+    def parse(self, audio_data_bytes):
+        return parse_rtmp_audio_data(audio_data_bytes, self)
+
+
+def _read_object_type(reader):
+    object_type = reader.read_bits(5)
+    if object_type == 31:
+        object_type = 32 + reader.read_bits(6)
+    return object_type
+
+
+def _read_sampling_frequency(reader):
+    index = reader.read_bits(4)
+    if index == 0x0F:
+        return index, reader.read_bits(24)
+    return index, AAC_SAMPLING_FREQUENCIES[index] if index < len(AAC_SAMPLING_FREQUENCIES) else None
+
+
+def parse_aac_audio_specific_config(config_bytes):
+    """
+    解析 AudioSpecificConfig。支持显式 SBR/PS 信令 (object type 5/29) 和尾部的向后兼容扩展 (sync 0x2b7)。
+    Args:
+        config_bytes (bytes | memoryview): AAC sequence header 中 AACPacketType 之后的字节。
+    Returns:
+        AacConfig: 解析结果；数据被截断或采样率索引无效时返回 None。
+    """
+    reader = BitReader(config_bytes)
+    info = {}
+    try:
+        object_type = _read_object_type(reader)
+        info['sampling_frequency_index'], info['sampling_frequency'] = _read_sampling_frequency(reader)
+        info['channel_configuration'] = reader.read_bits(4)
+        info['extension_audio_object_type'] = None
+        info['extension_sampling_frequency'] = None
+        info['sbr_present'] = False
+        info['ps_present'] = False
+        if object_type in (AAC_OBJECT_SBR, AAC_OBJECT_PS):
+            # 显式分层信令: 外层是 SBR/PS，真正的 core object type 在扩展采样率之后
+            info['extension_audio_object_type'] = AAC_OBJECT_SBR
+            info['sbr_present'] = True
+            info['ps_present'] = object_type == AAC_OBJECT_PS
+            _, info['extension_sampling_frequency'] = _read_sampling_frequency(reader)
+            object_type = _read_object_type(reader)
+        info['audio_object_type'] = object_type
+
+        info['frame_length_flag'] = info['depends_on_core_coder'] = info['extension_flag'] = None
+        if object_type in _GA_OBJECT_TYPES:
+            info['frame_length_flag'] = reader.read_bit()
+            info['depends_on_core_coder'] = reader.read_bit()
+            if info['depends_on_core_coder']:
+                reader.read_bits(14) # coreCoderDelay
+            info['extension_flag'] = reader.read_bit()
+
+        # 隐式信令的 HE-AAC 也可能在末尾带 syncExtensionType 0x2b7
+        if info['extension_audio_object_type'] is None and reader.bits_left() >= 16:
+            if reader.read_bits(11) == 0x2B7:
+                extension_type = _read_object_type(reader)
+                if extension_type == AAC_OBJECT_SBR and reader.read_bit():
+                    info['extension_audio_object_type'] = AAC_OBJECT_SBR
+                    info['sbr_present'] = True
+                    _, info['extension_sampling_frequency'] = _read_sampling_frequency(reader)
+                    if reader.bits_left() >= 12 and reader.read_bits(11) == 0x548:
+                        info['ps_present'] = bool(reader.read_bit())
+    except IndexError:
+        return None
+    if info['sampling_frequency'] is None:
+        return None
+
+    samples_per_frame = 960 if info['frame_length_flag'] else 1024
+    sample_rate = info['sampling_frequency']
+    if info['sbr_present'] and info['extension_sampling_frequency']:
+        # SBR 输出采样率翻倍，每帧采样数也翻倍，帧时长不变
+        samples_per_frame *= info['extension_sampling_frequency'] // sample_rate
+        sample_rate = info['extension_sampling_frequency']
+    info['sample_rate'] = sample_rate
+    info['samples_per_frame'] = samples_per_frame
+    return AacConfig.from_dict(info)
+
+
+def parse_rtmp_audio_data(audio_data_bytes, context=None):
+    """
+    解析 RTMP AudioData 字节流。
+    Args:
+        audio_data_bytes (bytes | memoryview): AudioData (FLV 音频 tag body)。
+        context (AudioStreamContext): 同一路流的解析上下文。提供时记住 AAC sequence header，
+            raw 帧的 sample_rate / channels / samples 据此填写。
+    Returns:
+        AudioTag: 解析结果，数据为空时返回 None。
+    """
+    if not audio_data_bytes:
+        return None
+    audio_data_bytes = memoryview(audio_data_bytes)
+    first_byte = audio_data_bytes[0]
+    sound_format = first_byte >> 4
+    result = AudioTag(sound_format, (first_byte >> 2) & 0x03, (first_byte >> 1) & 0x01, first_byte & 0x01)
+
+    if sound_format != SOUND_FORMAT_AAC:
+        result.frame_size = len(audio_data_bytes) - 1
+        result.sample_rate = FLV_SOUND_RATES[result.sound_rate]
+        result.channels = result.sound_type + 1
+        result.samples = _FIXED_FRAME_SAMPLES.get(sound_format)
+        if result.samples is None and sound_format in (0, 3) and result.frame_size:
+            # 线性 PCM: 字节数 / (声道数 * 采样字节数)
+            result.samples = result.frame_size // (result.channels * (result.sound_size + 1))
+        return result
+
+    if len(audio_data_bytes) < 2:
+        result.errors.append("Error: Incomplete AAC audio data header.")
+        return result
+    packet_type = result.aac_packet_type = audio_data_bytes[1]
+    payload = audio_data_bytes[2:]
+    result.frame_size = len(payload)
+    if packet_type == AAC_SEQUENCE_HEADER:
+        config = parse_aac_audio_specific_config(payload)
+        if config is None:
+            result.errors.append("Warning: Invalid AudioSpecificConfig.")
+            return result
+        result.audio_specific_config = config
+        if context is not None:
+            context.aac_config = config
+    elif packet_type == AAC_RAW:
+        config = context.aac_config if context is not None else None
+        if config is not None:
+            result.samples = config.samples_per_frame
+    else:
+        result.errors.append(f"Warning: Unknown AAC Packet Type: {packet_type}")
+        return result
+
+    if config is not None:
+        result.sample_rate = config.sample_rate
+        # channel_configuration 0 表示声道数在 PCE 里，这里不解析
+        result.channels = 2 if config.ps_present else (config.channel_configuration or None)
+    return result
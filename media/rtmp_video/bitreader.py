@@ -0,0 +1,132 @@
+class BitReader:
+    """
+    按位读取 RBSP 数据的读取器。
+    内部维护一个缓存字 (cache word)，每次按 8 字节批量装载，
+    read_bits 用移位/掩码一次取出多个比特，read_ue/read_se 通过
+    int.bit_length() 直接算出前导零个数，不再逐比特循环。
+
+    rbsp=True 时把 data 当作 NALU 原始字节：装载缓存时在当前窗口内用
+    bytes.find 查找 0x000003，跳过其中的防竞争字节 (emulation_prevention_three_byte)。
+    只有实际读到的字节会被扫描，大的 slice NALU 不会被整体拷贝或去转义。
+    """
+    CACHE_BYTES = 8
+    EMULATION_PATTERN = b'\x00\x00\x03'
+
+    def __init__(self, data, rbsp=False):
+        self.data = data
+        self.rbsp = rbsp
+        self._size = len(data)
+        self._next = 0   # 下一个待装载进缓存的字节位置
+        self._cache = 0  # 尚未消费的比特，低 _bits 位有效
+        self._bits = 0   # 缓存中剩余的有效比特数
+
+    @property
+    def byte_pos(self):
+        return (self._next * 8 - self._bits) >> 3
+
+    @property
+    def bit_pos(self):
+        return (self._next * 8 - self._bits) & 7
+
+    def bits_left(self):
+        # rbsp 模式下尚未装载部分中的防竞争字节也被计算在内，仅为上限
+        return (self._size - self._next) * 8 + self._bits
+
+    def _refill(self):
+        start = self._next
+        if start >= self._size:
+            raise IndexError("End of data reached while reading bit.")
+        end = min(start + self.CACHE_BYTES, self._size)
+        if not self.rbsp:
+            self._cache = (self._cache << ((end - start) << 3)) | int.from_bytes(self.data[start:end], 'big')
+            self._bits += (end - start) << 3
+            self._next = end
+            return
+        # 匹配的起点不早于 start - 2，所以找到的 0x03 一定还没被消费过。
+        # 只拷贝这 10 字节左右的窗口，data 可以是 bytes 也可以是 memoryview。
+        window_start = max(start - 2, 0)
+        window = bytes(self.data[window_start:end])
+        escape = window.find(self.EMULATION_PATTERN)
+        next_pos = end
+        if escape >= 0:
+            end = window_start + escape + 2
+            next_pos = end + 1
+        if end > start:
+            chunk = window[start - window_start : end - window_start]
+            self._cache = (self._cache << ((end - start) << 3)) | int.from_bytes(chunk, 'big')
+            self._bits += (end - start) << 3
+        self._next = next_pos
+
+    def read_bit(self):
+        while self._bits == 0:
+            self._refill()
+        self._bits -= 1
+        bit = self._cache >> self._bits
+        self._cache &= (1 << self._bits) - 1
+        return bit
+
+    def read_bits(self, num_bits):
+        while self._bits < num_bits:
+            self._refill()
+        self._bits -= num_bits
+        result = self._cache >> self._bits
+        self._cache &= (1 << self._bits) - 1
+        return result
+
+    def read_ue(self): # Unsigned Exp-Golomb
+        while self._cache == 0:  # 缓存中全是 0，前导零跨越了缓存字
+            self._refill()
+        leading_zeros = self._bits - self._cache.bit_length()
+        code_len = 2 * leading_zeros + 1
+        while self._bits < code_len:
+            self._refill()
+        # 前缀 1 与后缀拼起来恰好是 codeNum + 1
+        self._bits -= code_len
+        value = self._cache >> self._bits
+        self._cache &= (1 << self._bits) - 1
+        return value - 1
+
+    def read_se(self): # Signed Exp-Golomb
+        val = self.read_ue()
+        if val & 1:
+            return (val + 1) >> 1
+        return -(val >> 1)
+
+    def more_rbsp_data(self):
+        """
+        more_rbsp_data()：当前位置与 rbsp_stop_one_bit (数据中最后一个为 1 的比特) 之间是否还有数据。
+        rbsp=True 时末尾的 cabac_zero_word (NALU 中为 00 00 03) 不是 stop bit 所在的字节，
+        尚未装载的防竞争字节也不计入剩余的比特数。
+        """
+        data = self.data
+        last = self._size - 1
+        while last >= 0:
+            if data[last] == 0: # trailing_zero_8bits 之类的补零
+                last -= 1
+            elif self.rbsp and data[last] == 3 and last >= 2 and data[last - 1] == 0 and data[last - 2] == 0:
+                last -= 3       # cabac_zero_word 0x0000 加上它的防竞争字节
+            else:
+                break
+        if last < 0:
+            return False
+        stop_bits = (data[last] & -data[last]).bit_length() # stop bit 及其后的 alignment 0 占的比特数
+        # 缓存里可能已经装载了 stop bit 之后的补零 (_next > last + 1)，要从剩余比特里减掉
+        end = last + 1
+        remaining = self._bits + (self._payload_bytes(self._next, end) - self._payload_bytes(end, self._next)) * 8
+        return remaining - stop_bits > 0
+
+    def _payload_bytes(self, start, end):
+        # data[start:end] 去掉防竞争字节后的字节数。从 start - 2 开始找，紧跟在 start 之前的
+        # 00 00 也能匹配上；0x000003 的各次匹配互不重叠
+        if end <= start:
+            return 0
+        if not self.rbsp:
+            return end - start
+        return end - start - bytes(self.data[max(start - 2, 0) : end]).count(self.EMULATION_PATTERN)
+
+    def align_byte(self):
+        # 已装载的字节总是按字节对齐的，丢弃不足一个字节的余数即可
+        drop = self._bits & 7
+        if drop:
+            self._bits -= drop
+            self._cache &= (1 << self._bits) - 1
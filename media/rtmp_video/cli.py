@@ -0,0 +1,81 @@
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+
+from .flv import FLV_TAG_TYPES, FLV_TAG_VIDEO, parse_flv_file
+from .h264 import PPS_CACHE, SPS_CACHE, is_annexb, iter_annexb_file
+from .profiling import PROFILE
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Parse RTMP VideoData bodies or FLV recordings.")
+    parser.add_argument("filename", help="an FLV file, a raw Annex-B .h264 stream, "
+                                         "or a single RTMP VideoData body exported from Wireshark")
+    verbosity = parser.add_mutually_exclusive_group()
+    verbosity.add_argument("-v", "--verbose", action="store_true", help="also dump headers and parameter sets (hex)")
+    verbosity.add_argument("-q", "--quiet", action="store_true", help="only report errors, not warnings")
+    parser.add_argument("-a", "--all-tags", action="store_true", help="also parse audio (AAC) and script (onMetaData) tags")
+    parser.add_argument("--profile", nargs="?", const="table", choices=("table", "json", "prometheus"),
+                        help="don't print the parsed tags; print per-stage timings and NALU counts instead")
+    args = parser.parse_args(argv)
+
+    level = logging.DEBUG if args.verbose else logging.ERROR if args.quiet else logging.WARNING
+    logging.basicConfig(level=level, format="%(message)s")
+
+    if os.path.isfile(args.filename) is False:
+        print("File does not exist.")
+        return 1
+    with open(args.filename, "rb") as fd:
+        annexb = is_annexb(fd)
+    if args.profile:
+        return _profile(args.filename, annexb, args.profile)
+    if annexb:
+        print("--- Parsing H.264 Annex-B stream ---")
+        for nalu_info in iter_annexb_file(args.filename):
+            print(nalu_info.to_dict())
+        return 0
+    print("--- Parsing RTMP VideoData ---")
+    for tag, parsed_data in parse_flv_file(args.filename, FLV_TAG_TYPES if args.all_tags else (FLV_TAG_VIDEO,)):
+        if tag is not None:
+            kind = {8: "Audio", 9: "Video", 18: "Script"}[tag['tag_type']]
+            print(f"--- {kind} tag @ offset {tag['offset']}, timestamp {tag['timestamp']} ms, size {tag['data_size']} ---")
+        print(parsed_data.to_dict() if parsed_data is not None else None)
+    return 0
+
+def _profile(filename, annexb, output):
+    """
+    开启 PROFILE 解析整个文件，不输出解析结果，最后按 output 格式打印各阶段计数。
+    """
+    PROFILE.reset()
+    PROFILE.enable()
+    start = time.perf_counter_ns()
+    try:
+        if annexb:
+            for _ in iter_annexb_file(filename):
+                pass
+        else:
+            for _ in parse_flv_file(filename):
+                pass
+    finally:
+        PROFILE.disable()
+    wall_ns = time.perf_counter_ns() - start
+
+    if output == "prometheus":
+        sys.stdout.write(PROFILE.prometheus())
+    elif output == "json":
+        snapshot = PROFILE.snapshot()
+        snapshot['wall_ns'] = wall_ns
+        snapshot['sps_cache'] = SPS_CACHE.stats()
+        snapshot['pps_cache'] = PPS_CACHE.stats()
+        json.dump(snapshot, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+    else:
+        print(PROFILE.format_table(wall_ns))
+        print(f"SPS cache: {SPS_CACHE.stats()}, PPS cache: {PPS_CACHE.stats()}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
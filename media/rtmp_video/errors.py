@@ -0,0 +1,20 @@
+"""
+各解析模块共用的错误类型和警告收集。
+"""
+import logging
+
+# 包内各模块共用这一个 logger。作为库使用时默认不输出任何内容；需要日志时由调用方配置 logging
+logger = logging.getLogger("rtmp_video_parse")
+logger.addHandler(logging.NullHandler())
+
+
+class VideoParseError(ValueError):
+    """strict 模式下解析遇到错误时抛出。"""
+
+
+def _report(errors, message):
+    # 有错误列表时收集到列表里 (最终挂在结果上)，否则记一条 warning 日志
+    if errors is None:
+        logger.warning(message)
+    else:
+        errors.append(message)
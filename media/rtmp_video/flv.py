@@ -0,0 +1,175 @@
+import mmap
+import struct
+
+from .errors import logger
+from .h264 import VideoStreamContext, parse_rtmp_video_data
+
+FLV_SIGNATURE = b'FLV'
+FLV_HEADER_SIZE = 9
+FLV_TAG_HEADER_SIZE = 11
+FLV_PREV_TAG_SIZE = 4
+
+FLV_TAG_AUDIO = 8
+FLV_TAG_VIDEO = 9
+FLV_TAG_SCRIPT = 18
+FLV_TAG_TYPES = (FLV_TAG_AUDIO, FLV_TAG_VIDEO, FLV_TAG_SCRIPT)
+
+
+def is_flv(fd):
+    """
+    判断文件对象是否以 FLV 文件头开始，不改变文件当前位置。
+    """
+    pos = fd.tell()
+    signature = fd.read(3)
+    fd.seek(pos)
+    return signature == FLV_SIGNATURE
+
+
+def parse_flv_header(header_bytes):
+    """
+    解析 9 字节的 FLV 文件头。
+    Args:
+        header_bytes (bytes): 文件开头至少 9 个字节。
+    Returns:
+        dict: {'version', 'has_audio', 'has_video', 'data_offset'}，格式不对时返回 None。
+    """
+    if len(header_bytes) < FLV_HEADER_SIZE or header_bytes[:3] != FLV_SIGNATURE:
+        logger.warning("Error: Not a valid FLV header.")
+        return None
+    flags = header_bytes[4]
+    return {
+        'version': header_bytes[3],
+        'has_audio': (flags >> 2) & 0x01,
+        'has_video': flags & 0x01,
+        'data_offset': struct.unpack_from('>I', header_bytes, 5)[0],
+    }
+
+
+def _parse_tag_header(tag_header, offset):
+    tag_type = tag_header[0] & 0x1F
+    data_size = (tag_header[1] << 16) | (tag_header[2] << 8) | tag_header[3]
+    # 时间戳低 24 位在前，扩展的高 8 位在后
+    timestamp = (tag_header[7] << 24) | (tag_header[4] << 16) | (tag_header[5] << 8) | tag_header[6]
+    stream_id = (tag_header[8] << 16) | (tag_header[9] << 8) | tag_header[10]
+    return {
+        'offset': offset,
+        'tag_type': tag_type,
+        'data_size': data_size,
+        'timestamp': timestamp,
+        'stream_id': stream_id,
+        'data': None,
+    }
+
+
+def iter_flv_tags(fd, tag_types=None):
+    """
+    逐个读取 FLV tag 的生成器，任意时刻只在内存中保留当前这一个 tag。
+    Args:
+        fd: 以二进制模式打开、位于文件开头的文件对象。
+        tag_types (set): 只返回这些类型的 tag (8 音频 / 9 视频 / 18 脚本)，
+                         其他 tag 的 body 直接 seek 跳过，不读入内存。None 表示全部返回。
+    Yields:
+        dict: {'offset', 'tag_type', 'data_size', 'timestamp', 'stream_id', 'data'}，
+              data 为 tag body (对视频 tag 即 RTMP VideoData)。
+    """
+    header = parse_flv_header(fd.read(FLV_HEADER_SIZE))
+    if header is None:
+        return
+    offset = header['data_offset'] + FLV_PREV_TAG_SIZE # Skip PreviousTagSize0
+    fd.seek(offset)
+
+    while True:
+        tag_header = fd.read(FLV_TAG_HEADER_SIZE)
+        if not tag_header:
+            break
+        if len(tag_header) < FLV_TAG_HEADER_SIZE:
+            logger.warning(f"Warning: Truncated FLV tag header at offset {offset}.")
+            break
+
+        tag = _parse_tag_header(tag_header, offset)
+        data_size = tag['data_size']
+        if tag_types is not None and tag['tag_type'] not in tag_types:
+            fd.seek(data_size + FLV_PREV_TAG_SIZE, 1)
+        else:
+            data = fd.read(data_size)
+            if len(data) < data_size:
+                logger.warning(f"Warning: Truncated FLV tag body at offset {offset}. Expected {data_size} bytes, got {len(data)}.")
+                break
+            tag['data'] = data
+            fd.seek(FLV_PREV_TAG_SIZE, 1)
+            yield tag
+        offset += FLV_TAG_HEADER_SIZE + data_size + FLV_PREV_TAG_SIZE
+
+
+def iter_flv_tags_mmap(path, tag_types=None):
+    """
+    与 iter_flv_tags 相同，但通过 mmap 访问文件，tag['data'] 是指向映射区域的 memoryview，
+    不产生拷贝。驻留内存由操作系统按页换入换出，不随文件大小增长。
+    如需在文件关闭后长期保留 data，请自行 bytes() 拷贝。
+    """
+    with open(path, 'rb') as fd:
+        if fd.seek(0, 2) < FLV_HEADER_SIZE:
+            logger.warning("Error: Not a valid FLV header.")
+            return
+        mm = mmap.mmap(fd.fileno(), 0, access=mmap.ACCESS_READ)
+    view = memoryview(mm)
+    try:
+        header = parse_flv_header(view[:FLV_HEADER_SIZE])
+        if header is None:
+            return
+        size = len(mm)
+        offset = header['data_offset'] + FLV_PREV_TAG_SIZE
+        while offset < size:
+            if offset + FLV_TAG_HEADER_SIZE > size:
+                logger.warning(f"Warning: Truncated FLV tag header at offset {offset}.")
+                break
+            tag = _parse_tag_header(view[offset : offset + FLV_TAG_HEADER_SIZE], offset)
+            body_start = offset + FLV_TAG_HEADER_SIZE
+            body_end = body_start + tag['data_size']
+            if body_end > size:
+                logger.warning(f"Warning: Truncated FLV tag body at offset {offset}. Expected {tag['data_size']} bytes, got {size - body_start}.")
+                break
+            if tag_types is None or tag['tag_type'] in tag_types:
+                tag['data'] = view[body_start:body_end]
+                yield tag
+            offset = body_end + FLV_PREV_TAG_SIZE
+    finally:
+        view.release()
+        try:
+            mm.close()
+        except BufferError:
+            pass # 调用方仍持有 data 视图，映射在这些视图释放后由 GC 回收
+
+
+def parse_flv_file(path, tag_types=(FLV_TAG_VIDEO,)):
+    """
+    以流式方式解析 FLV 录制文件 (或单个 RTMP VideoData body)。
+    FLV 文件按 tag 逐个读取，视频 tag 交给 parse_rtmp_video_data，音频 tag 交给 parse_rtmp_audio_data，
+    脚本 tag 交给 parse_script_data，各自使用同一文件内共享的解析上下文。
+    峰值内存只与单个 tag 大小有关，与文件大小无关。
+    Args:
+        tag_types (iterable[int]): 要解析的 tag 类型，默认只有视频；FLV_TAG_TYPES 为全部三种。
+    Yields:
+        (dict, Record): (FLV tag 信息, 解析结果 VideoTag / AudioTag / ScriptTag)，按 tag['tag_type'] 区分。
+                        输入不是 FLV 时，把整个文件当作一个 VideoData body，tag 信息为 None。
+    """
+    tag_types = frozenset(tag_types)
+    with open(path, "rb") as fd:
+        if not is_flv(fd):
+            yield None, parse_rtmp_video_data(fd.read())
+            return
+        video_context = VideoStreamContext()
+        audio_context = None
+        if FLV_TAG_AUDIO in tag_types:
+            from .audio import AudioStreamContext
+            audio_context = AudioStreamContext()
+        if FLV_TAG_SCRIPT in tag_types:
+            from .script import parse_script_data
+        for tag in iter_flv_tags(fd, tag_types=tag_types):
+            tag_type = tag['tag_type']
+            if tag_type == FLV_TAG_VIDEO:
+                yield tag, video_context.parse(tag['data'])
+            elif tag_type == FLV_TAG_AUDIO:
+                yield tag, audio_context.parse(tag['data'])
+            else:
+                yield tag, parse_script_data(tag['data'])
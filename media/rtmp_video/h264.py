@@ -0,0 +1,924 @@
+import logging
+import mmap
+import os
+import struct
+from collections import OrderedDict
+from types import MappingProxyType
+
+from .bitreader import BitReader
+from .errors import VideoParseError, _report, logger
+from .profiling import PROFILE, perf_counter_ns
+from .records import NaluInfo, PpsInfo, SliceHeader, SpsInfo, VideoTag
+
+# 字段描述符 (name, kind)：kind > 0 为 u(kind)，_UE / _SE 为 Exp-Golomb。
+# 语法中无条件连续出现的字段用描述符表按顺序读取，条件分支仍按标准的语法结构写在代码里。
+# 表在模块加载时由 _compile_fields 预处理：相邻的定长字段合并成一次 read_bits，再按移位/掩码拆开。
+_UE = 0
+_SE = -1
+
+def _compile_fields(fields):
+    """
+    Returns:
+        tuple: 读取步骤 ((total_bits, ((name, shift, mask), ...)) 或 (_UE/_SE, name), ...)。
+    """
+    steps = []
+    run = []
+    def flush():
+        if run:
+            shift = sum(bits for _, bits in run)
+            layout = []
+            for name, bits in run:
+                shift -= bits
+                layout.append((name, shift, (1 << bits) - 1))
+            steps.append((sum(bits for _, bits in run), tuple(layout)))
+            run.clear()
+    for name, kind in fields:
+        if kind > 0:
+            run.append((name, kind))
+        else:
+            flush()
+            steps.append((kind, name))
+    flush()
+    return tuple(steps)
+
+def _read_fields(reader, steps, out):
+    for kind, arg in steps:
+        if kind > 0:
+            value = reader.read_bits(kind)
+            for name, shift, mask in arg:
+                out[name] = (value >> shift) & mask
+        elif kind == _UE:
+            out[arg] = reader.read_ue()
+        else:
+            out[arg] = reader.read_se()
+    return out
+
+_SPS_HEADER_FIELDS = _compile_fields((
+    ('profile_idc', 8), ('constraint_set0_flag', 1), ('constraint_set1_flag', 1), ('constraint_set2_flag', 1),
+    ('constraint_set3_flag', 1), ('constraint_set4_flag', 1), ('constraint_set5_flag', 1),
+    ('reserved_zero_2bits', 2), ('level_idc', 8), ('seq_parameter_set_id', _UE),
+))
+_SPS_CHROMA_FIELDS = _compile_fields((
+    ('bit_depth_luma_minus8', _UE), ('bit_depth_chroma_minus8', _UE),
+    ('qpprime_y_zero_transform_bypass_flag', 1), ('seq_scaling_matrix_present_flag', 1),
+))
+_SPS_POC_TYPE1_FIELDS = _compile_fields((
+    ('delta_pic_order_always_zero_flag', 1), ('offset_for_non_ref_pic', _SE),
+    ('offset_for_top_to_bottom_field', _SE), ('num_ref_frames_in_pic_order_cnt_cycle', _UE),
+))
+_SPS_FRAME_FIELDS = _compile_fields((
+    ('num_ref_frames', _UE), ('gaps_in_frame_num_value_allowed_flag', 1),
+    ('pic_width_in_mbs_minus1', _UE), ('pic_height_in_map_units_minus1', _UE), ('frame_mbs_only_flag', 1),
+))
+_SPS_CROP_FIELDS = _compile_fields((
+    ('frame_crop_left_offset', _UE), ('frame_crop_right_offset', _UE),
+    ('frame_crop_top_offset', _UE), ('frame_crop_bottom_offset', _UE),
+))
+_VUI_COLOUR_FIELDS = _compile_fields((('colour_primaries', 8), ('transfer_characteristics', 8), ('matrix_coefficients', 8)))
+_VUI_CHROMA_LOC_FIELDS = _compile_fields((('chroma_sample_loc_type_top_field', _UE), ('chroma_sample_loc_type_bottom_field', _UE)))
+_VUI_TIMING_FIELDS = _compile_fields((('num_units_in_tick', 32), ('time_scale', 32), ('fixed_frame_rate_flag', 1)))
+_VUI_BITSTREAM_RESTRICTION_FIELDS = _compile_fields((
+    ('motion_vectors_over_pic_boundaries_flag', 1), ('max_bytes_per_pic_denom', _UE),
+    ('max_bits_per_mb_denom', _UE), ('log2_max_mv_length_horizontal', _UE),
+    ('log2_max_mv_length_vertical', _UE), ('max_num_reorder_frames', _UE), ('max_dec_frame_buffering', _UE),
+))
+_HRD_HEADER_FIELDS = _compile_fields((('cpb_cnt_minus1', _UE), ('bit_rate_scale', 4), ('cpb_size_scale', 4)))
+_HRD_CPB_FIELDS = _compile_fields((('bit_rate_value_minus1', _UE), ('cpb_size_value_minus1', _UE), ('cbr_flag', 1)))
+_HRD_TRAILER_FIELDS = _compile_fields((
+    ('initial_cpb_removal_delay_length_minus1', 5), ('cpb_removal_delay_length_minus1', 5),
+    ('dpb_output_delay_length_minus1', 5), ('time_offset_length', 5),
+))
+_PPS_HEADER_FIELDS = _compile_fields((
+    ('pic_parameter_set_id', _UE), ('seq_parameter_set_id', _UE), ('entropy_coding_mode_flag', 1),
+    ('bottom_field_pic_order_in_frame_present_flag', 1), ('num_slice_groups_minus1', _UE),
+))
+_PPS_BODY_FIELDS = _compile_fields((
+    ('num_ref_idx_l0_active_minus1', _UE), ('num_ref_idx_l1_active_minus1', _UE), ('weighted_pred_flag', 1),
+    ('weighted_bipred_idc', 2), ('pic_init_qp_minus26', _SE), ('pic_init_qs_minus26', _SE),
+    ('chroma_qp_index_offset', _SE), ('deblocking_filter_control_present_flag', 1),
+    ('constrained_intra_pred_flag', 1), ('redundant_pic_cnt_present_flag', 1),
+))
+
+_HIGH_PROFILES = frozenset((100, 110, 122, 244, 44, 83, 86, 118, 128, 138, 139, 134, 135))
+
+def _read_scaling_list(reader, size):
+    """
+    scaling_list() (7.3.2.1.1.1)。
+    Returns:
+        tuple | str: 按 zigzag 顺序的 size 个系数；useDefaultScalingMatrixFlag 为 1 时返回 'default'。
+    """
+    read_se = reader.read_se
+    values = []
+    last_scale = next_scale = 8
+    for j in range(size):
+        if next_scale != 0:
+            next_scale = (last_scale + read_se()) & 0xFF
+            if j == 0 and next_scale == 0:
+                return 'default'
+        last_scale = next_scale or last_scale
+        values.append(last_scale)
+    return tuple(values)
+
+def _read_scaling_lists(reader, count):
+    """
+    读取 count 个 scaling list (前 6 个 4x4，其余 8x8)。未出现的列表为 None (使用 fall-back 规则)。
+    """
+    lists = []
+    for i in range(count):
+        if reader.read_bit():
+            lists.append(_read_scaling_list(reader, 16 if i < 6 else 64))
+        else:
+            lists.append(None)
+    return tuple(lists)
+
+def _read_hrd_parameters(reader):
+    # 嵌套在 vui_parameters 里，FrozenRecord 只包装顶层 dict，这里直接生成只读映射
+    hrd = _read_fields(reader, _HRD_HEADER_FIELDS, {})
+    hrd['cpb'] = tuple(MappingProxyType(_read_fields(reader, _HRD_CPB_FIELDS, {}))
+                       for _ in range(hrd['cpb_cnt_minus1'] + 1))
+    return MappingProxyType(_read_fields(reader, _HRD_TRAILER_FIELDS, hrd))
+
+def _read_vui_parameters(reader):
+    read_bit = reader.read_bit
+    vui_info = {}
+    vui_info['aspect_ratio_info_present_flag'] = read_bit()
+    if vui_info['aspect_ratio_info_present_flag']:
+        vui_info['aspect_ratio_idc'] = reader.read_bits(8)
+        if vui_info['aspect_ratio_idc'] == 255: # Extended_SAR
+            vui_info['sar_width'] = reader.read_bits(16)
+            vui_info['sar_height'] = reader.read_bits(16)
+
+    vui_info['overscan_info_present_flag'] = read_bit()
+    if vui_info['overscan_info_present_flag']:
+        vui_info['overscan_appropriate_flag'] = read_bit()
+
+    vui_info['video_signal_type_present_flag'] = read_bit()
+    if vui_info['video_signal_type_present_flag']:
+        vui_info['video_format'] = reader.read_bits(3)
+        vui_info['video_full_range_flag'] = read_bit()
+        vui_info['colour_description_present_flag'] = read_bit()
+        if vui_info['colour_description_present_flag']:
+            _read_fields(reader, _VUI_COLOUR_FIELDS, vui_info)
+
+    vui_info['chroma_loc_info_present_flag'] = read_bit()
+    if vui_info['chroma_loc_info_present_flag']:
+        _read_fields(reader, _VUI_CHROMA_LOC_FIELDS, vui_info)
+
+    vui_info['timing_info_present_flag'] = read_bit()
+    if vui_info['timing_info_present_flag']:
+        _read_fields(reader, _VUI_TIMING_FIELDS, vui_info)
+
+    vui_info['nal_hrd_parameters_present_flag'] = read_bit()
+    if vui_info['nal_hrd_parameters_present_flag']:
+        vui_info['nal_hrd_parameters'] = _read_hrd_parameters(reader)
+    vui_info['vcl_hrd_parameters_present_flag'] = read_bit()
+    if vui_info['vcl_hrd_parameters_present_flag']:
+        vui_info['vcl_hrd_parameters'] = _read_hrd_parameters(reader)
+    if vui_info['nal_hrd_parameters_present_flag'] or vui_info['vcl_hrd_parameters_present_flag']:
+        vui_info['low_delay_hrd_flag'] = read_bit()
+    vui_info['pic_struct_present_flag'] = read_bit()
+
+    vui_info['bitstream_restriction_flag'] = read_bit()
+    if vui_info['bitstream_restriction_flag']:
+        _read_fields(reader, _VUI_BITSTREAM_RESTRICTION_FIELDS, vui_info)
+    return vui_info
+
+def parse_h264_sps(sps_nalu_data):
+    """
+    解析 H.264 SPS NALU 的数据部分 (7.3.2.1.1，含 scaling list、VUI 的 HRD 与 bitstream_restriction)。
+    Args:
+        sps_nalu_data (bytes | memoryview): SPS NALU 的原始数据，**包含 NALU header 字节 (0x67)**。
+    Returns:
+        SpsInfo: 包含解析出的 SPS 参数 (只读记录，to_dict() 可得到旧的 dict 结构)。
+    """
+    # Verify NALU type (0x67 for SPS)
+    if not sps_nalu_data or (sps_nalu_data[0] & 0x1F) != 7:
+        logger.warning("Error: Not a valid SPS NALU data provided.")
+        return None
+
+    reader = BitReader(sps_nalu_data, rbsp=True)
+    sps_info = {}
+
+    try:
+        reader.read_bits(8) # Skip the NALU header byte (nal_unit_type + nal_ref_idc)
+        _read_fields(reader, _SPS_HEADER_FIELDS, sps_info)
+
+        if sps_info['profile_idc'] in _HIGH_PROFILES:
+            sps_info['chroma_format_idc'] = reader.read_ue()
+            if sps_info['chroma_format_idc'] == 3:
+                sps_info['separate_colour_plane_flag'] = reader.read_bit()
+            _read_fields(reader, _SPS_CHROMA_FIELDS, sps_info)
+            if sps_info['seq_scaling_matrix_present_flag']:
+                sps_info['scaling_lists'] = _read_scaling_lists(reader, 8 if sps_info['chroma_format_idc'] != 3 else 12)
+
+        sps_info['log2_max_frame_num_minus4'] = reader.read_ue()
+        sps_info['pic_order_cnt_type'] = reader.read_ue()
+
+        if sps_info['pic_order_cnt_type'] == 0:
+            sps_info['log2_max_pic_order_cnt_lsb_minus4'] = reader.read_ue()
+        elif sps_info['pic_order_cnt_type'] == 1:
+            _read_fields(reader, _SPS_POC_TYPE1_FIELDS, sps_info)
+            sps_info['offset_for_ref_frame'] = tuple(
+                reader.read_se() for _ in range(sps_info['num_ref_frames_in_pic_order_cnt_cycle']))
+
+        _read_fields(reader, _SPS_FRAME_FIELDS, sps_info)
+        if not sps_info['frame_mbs_only_flag']:
+            sps_info['mb_adaptive_frame_field_flag'] = reader.read_bit()
+        sps_info['direct_8x8_inference_flag'] = reader.read_bit()
+        sps_info['frame_cropping_flag'] = reader.read_bit()
+        if sps_info['frame_cropping_flag']:
+            _read_fields(reader, _SPS_CROP_FIELDS, sps_info)
+
+        sps_info['vui_parameters_present_flag'] = reader.read_bit()
+        if sps_info['vui_parameters_present_flag']:
+            sps_info['vui_parameters'] = _read_vui_parameters(reader)
+
+        # Calculate resolution
+        sps_info['width'] = (sps_info['pic_width_in_mbs_minus1'] + 1) * 16
+        sps_info['height'] = (2 - sps_info['frame_mbs_only_flag']) * \
+                             (sps_info['pic_height_in_map_units_minus1'] + 1) * 16
+
+        if sps_info['frame_cropping_flag']:
+            # CropUnitX/Y (7.4.2.1.1)；非 High 系列 profile 不携带 chroma_format_idc，按 4:2:0 推断
+            chroma_format_idc = sps_info.get('chroma_format_idc', 1)
+            if chroma_format_idc == 0 or sps_info.get('separate_colour_plane_flag'):
+                crop_unit_x = 1
+                crop_unit_y = 2 - sps_info['frame_mbs_only_flag']
+            else:
+                sub_width_c, sub_height_c = {1: (2, 2), 2: (2, 1), 3: (1, 1)}[chroma_format_idc]
+                crop_unit_x = sub_width_c
+                crop_unit_y = sub_height_c * (2 - sps_info['frame_mbs_only_flag'])
+
+            sps_info['cropped_width'] = sps_info['width'] - \
+                                        (sps_info['frame_crop_left_offset'] + sps_info['frame_crop_right_offset']) * crop_unit_x
+            sps_info['cropped_height'] = sps_info['height'] - \
+                                         (sps_info['frame_crop_top_offset'] + sps_info['frame_crop_bottom_offset']) * crop_unit_y
+        else:
+            sps_info['cropped_width'] = sps_info['width']
+            sps_info['cropped_height'] = sps_info['height']
+
+        if 'vui_parameters' in sps_info and sps_info['vui_parameters'].get('timing_info_present_flag'):
+            num_units_in_tick = sps_info['vui_parameters']['num_units_in_tick']
+            time_scale = sps_info['vui_parameters']['time_scale']
+            if num_units_in_tick > 0 and time_scale > 0:
+                sps_info['frame_rate'] = time_scale / (2.0 * num_units_in_tick)
+            else:
+                sps_info['frame_rate'] = None
+        else:
+            sps_info['frame_rate'] = None
+
+    except IndexError as e:
+        logger.warning(f"Error reading SPS bitstream: {e}. Data might be truncated.")
+        return None
+    except Exception as e:
+        logger.warning(f"An error occurred during SPS parsing: {e}")
+        return None
+
+    return SpsInfo.from_dict(sps_info)
+
+def parse_h264_pps(pps_nalu_data, chroma_format_idc=1):
+    """
+    解析 H.264 PPS NALU 的数据部分 (7.3.2.2，含 slice group map 和 High profile 扩展字段)。
+    Args:
+        pps_nalu_data (bytes | memoryview): PPS NALU 的原始数据，**包含 NALU header 字节 (0x68)**。
+        chroma_format_idc (int): 所引用 SPS 的 chroma_format_idc，只影响 pic_scaling_matrix 的列表个数。
+            PPS 通常先于 slice 单独解析，默认按 4:2:0。
+    Returns:
+        PpsInfo: 包含解析出的 PPS 参数 (只读记录，to_dict() 可得到旧的 dict 结构)。
+    """
+    # Verify NALU type (0x68 for PPS)
+    if not pps_nalu_data or (pps_nalu_data[0] & 0x1F) != 8:
+        logger.warning("Error: Not a valid PPS NALU data provided.")
+        return None
+
+    reader = BitReader(pps_nalu_data, rbsp=True)
+    pps_info = {}
+
+    try:
+        reader.read_bits(8) # Skip NALU header byte (nal_unit_type + nal_ref_idc)
+        _read_fields(reader, _PPS_HEADER_FIELDS, pps_info)
+
+        num_slice_groups = pps_info['num_slice_groups_minus1'] + 1
+        if num_slice_groups > 1:
+            map_type = pps_info['slice_group_map_type'] = reader.read_ue()
+            if map_type == 0:
+                pps_info['run_length_minus1'] = tuple(reader.read_ue() for _ in range(num_slice_groups))
+            elif map_type == 2:
+                top_left, bottom_right = [], []
+                for _ in range(num_slice_groups - 1):
+                    top_left.append(reader.read_ue())
+                    bottom_right.append(reader.read_ue())
+                pps_info['top_left'] = tuple(top_left)
+                pps_info['bottom_right'] = tuple(bottom_right)
+            elif map_type in (3, 4, 5):
+                pps_info['slice_group_change_direction_flag'] = reader.read_bit()
+                pps_info['slice_group_change_rate_minus1'] = reader.read_ue()
+            elif map_type == 6:
+                pps_info['pic_size_in_map_units_minus1'] = reader.read_ue()
+                id_bits = (num_slice_groups - 1).bit_length() # Ceil(Log2(num_slice_groups_minus1 + 1))
+                pps_info['slice_group_id'] = tuple(
+                    reader.read_bits(id_bits) for _ in range(pps_info['pic_size_in_map_units_minus1'] + 1))
+
+        _read_fields(reader, _PPS_BODY_FIELDS, pps_info)
+
+        if reader.more_rbsp_data():
+            pps_info['transform_8x8_mode_flag'] = reader.read_bit()
+            pps_info['pic_scaling_matrix_present_flag'] = reader.read_bit()
+            if pps_info['pic_scaling_matrix_present_flag']:
+                count = 6 + (2 if chroma_format_idc != 3 else 6) * pps_info['transform_8x8_mode_flag']
+                pps_info['scaling_lists'] = _read_scaling_lists(reader, count)
+            pps_info['second_chroma_qp_index_offset'] = reader.read_se()
+
+    except IndexError as e:
+        logger.warning(f"Error reading PPS bitstream: {e}. Data might be truncated.")
+        return None
+    except Exception as e:
+        logger.warning(f"An error occurred during PPS parsing: {e}")
+        return None
+
+    return PpsInfo.from_dict(pps_info)
+
+class ParameterSetCache:
+    """
+    以参数集原始字节为 key 的有界 LRU 缓存。
+    直播流每个关键帧都会重复同样的 SPS/PPS，命中时直接返回之前的解析结果。
+    缓存的结果是只读的 SpsInfo / PpsInfo 记录，多路流之间可以安全共享。
+    parse() 的额外参数原样传给 parser，并且是 key 的一部分 (PPS 的解析依赖所引用 SPS 的 chroma_format_idc)。
+    stage 不为 None 且 PROFILE 开启时，每次 parse (含命中) 的耗时记在该阶段上。
+    """
+    def __init__(self, parser, maxsize=256, stage=None):
+        self.parser = parser
+        self.maxsize = maxsize
+        self.stage = stage
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def parse(self, nalu_data, *args):
+        if self.stage is not None and PROFILE.enabled:
+            start = perf_counter_ns()
+            info = self._parse(nalu_data, args)
+            PROFILE.add(self.stage, perf_counter_ns() - start, len(nalu_data))
+            return info
+        return self._parse(nalu_data, args)
+
+    def _parse(self, nalu_data, args):
+        key = (bytes(nalu_data),) + args if args else bytes(nalu_data)
+        entries = self._entries
+        if key in entries:
+            self.hits += 1
+            entries.move_to_end(key)
+            return entries[key]
+        self.misses += 1
+        info = self.parser(nalu_data, *args)
+        entries[key] = info
+        if len(entries) > self.maxsize:
+            entries.popitem(last=False)
+        return info
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self._entries), 'maxsize': self.maxsize}
+
+    def clear(self):
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+SPS_CACHE = ParameterSetCache(parse_h264_sps, stage='sps')
+PPS_CACHE = ParameterSetCache(parse_h264_pps, stage='pps')
+
+def _pps_chroma_format_idc(pps_nalu_data, sps_by_id):
+    """
+    PPS 解析所需的 chroma_format_idc：所引用的 SPS 为 4:4:4 时返回 3，否则返回 1
+    (parse_h264_pps 只区分这两种情况，归一化后同一个 PPS 在缓存里只有一份)。
+    已知的 SPS 都不是 4:4:4 时不必读 PPS 里的 seq_parameter_set_id。
+    """
+    if all(sps.get('chroma_format_idc', 1) != 3 for sps in sps_by_id.values()):
+        return 1
+    reader = BitReader(pps_nalu_data, rbsp=True)
+    try:
+        reader.read_bits(8)
+        reader.read_ue() # pic_parameter_set_id
+        sps = sps_by_id.get(reader.read_ue())
+    except IndexError:
+        return 1
+    return 3 if sps is not None and sps.get('chroma_format_idc', 1) == 3 else 1
+
+def parse_avc_config_parameter_sets(record_info, sps_by_id, pps_by_id):
+    """
+    通过 SPS_CACHE / PPS_CACHE 解析 AVCDecoderConfigurationRecord 里的全部 SPS 和 PPS，
+    有效的结果按 id 存进 sps_by_id / pps_by_id (PPS 按其引用的 SPS 解析)。
+    Returns:
+        (list, list): 与 sps_nalus / pps_nalus 一一对应的 SpsInfo / PpsInfo，无效的为 None。
+    """
+    parsed_sps = []
+    for sps_data in record_info['sps_nalus']:
+        sps = SPS_CACHE.parse(sps_data)
+        if sps is not None:
+            sps_by_id[sps.seq_parameter_set_id] = sps
+        parsed_sps.append(sps)
+    parsed_pps = []
+    for pps_data in record_info['pps_nalus']:
+        pps = PPS_CACHE.parse(pps_data, _pps_chroma_format_idc(pps_data, sps_by_id))
+        if pps is not None:
+            pps_by_id[pps.pic_parameter_set_id] = pps
+        parsed_pps.append(pps)
+    return parsed_sps, parsed_pps
+
+def parse_h264_slice_header(slice_nalu_data, sps_by_id, pps_by_id):
+    """
+    只解析 slice header 的开头几个字段 (first_mb_in_slice, slice_type, pps_id, frame_num,
+    pic_order_cnt_lsb 等)，读到 POC 为止，不触及宏块数据。
+    Args:
+        slice_nalu_data (bytes | memoryview): slice NALU (nal_unit_type 1 或 5)，**包含 NALU header**。
+        sps_by_id (dict): 当前生效的 SPS，seq_parameter_set_id -> SpsInfo。
+        pps_by_id (dict): 当前生效的 PPS，pic_parameter_set_id -> PpsInfo。
+    Returns:
+        SliceHeader: 解析结果；引用的 PPS/SPS 不存在或数据被截断时返回 None。
+    """
+    reader = BitReader(slice_nalu_data, rbsp=True)
+    try:
+        nal_unit_type = reader.read_bits(8) & 0x1F
+        first_mb_in_slice = reader.read_ue()
+        slice_type = reader.read_ue()
+        pic_parameter_set_id = reader.read_ue()
+        pps = pps_by_id.get(pic_parameter_set_id)
+        sps = sps_by_id.get(pps.seq_parameter_set_id) if pps is not None else None
+        if sps is None:
+            return None
+
+        if getattr(sps, 'separate_colour_plane_flag', 0):
+            reader.read_bits(2) # colour_plane_id
+        header = SliceHeader(first_mb_in_slice, slice_type, pic_parameter_set_id,
+                             reader.read_bits(sps.log2_max_frame_num_minus4 + 4))
+        field_pic_flag = 0
+        if not sps.frame_mbs_only_flag:
+            field_pic_flag = header.field_pic_flag = reader.read_bit()
+            if field_pic_flag:
+                header.bottom_field_flag = reader.read_bit()
+        if nal_unit_type == 5:
+            header.idr_pic_id = reader.read_ue()
+        if sps.pic_order_cnt_type == 0:
+            header.pic_order_cnt_lsb = reader.read_bits(sps.log2_max_pic_order_cnt_lsb_minus4 + 4)
+            if pps.bottom_field_pic_order_in_frame_present_flag and not field_pic_flag:
+                header.delta_pic_order_cnt_bottom = reader.read_se()
+    except IndexError:
+        return None
+    return header
+
+def parse_avc_decoder_configuration_record(record_bytes, errors=None):
+    """
+    解析 AVCDecoderConfigurationRecord 字节流，提取 SPS 和 PPS NALU 数据。
+
+    Args:
+        record_bytes (bytes | memoryview): AVCDecoderConfigurationRecord 的原始字节流。
+        errors (list): 提供时错误信息追加到该列表，否则记录为 warning 日志。
+
+    Returns:
+        dict: 包含 SPS 和 PPS NALU 数据的字典。
+              {
+                  'profile_idc': int,
+                  'level_idc': int,
+                  'length_size_minus_one': int,
+                  'sps_nalus': [memoryview, ...],
+                  'pps_nalus': [memoryview, ...]
+              }
+              SPS/PPS 都是指向 record_bytes 的视图，需要 bytes 时请自行 bytes() 转换。
+    """
+    if not record_bytes or len(record_bytes) < 7:
+        _report(errors, "Error: Invalid AVCDecoderConfigurationRecord data (too short).")
+        return None
+
+    record_bytes = memoryview(record_bytes)
+    record_info = {}
+    offset = 0
+
+    record_info['configurationVersion'] = record_bytes[offset]
+    offset += 1
+    record_info['AVCProfileIndication'] = record_bytes[offset]
+    offset += 1
+    record_info['profile_compatibility'] = record_bytes[offset]
+    offset += 1
+    record_info['AVCLevelIndication'] = record_bytes[offset]
+    offset += 1
+    record_info['lengthSizeMinusOne'] = record_bytes[offset] & 0x03 # Lower 2 bits
+    offset += 1
+
+    # Number of SPS NALUs
+    numOfSequenceParameterSets = record_bytes[offset] & 0x1F # Lower 5 bits
+    offset += 1
+    record_info['sps_nalus'] = []
+
+    for _ in range(numOfSequenceParameterSets):
+        if offset + 2 > len(record_bytes):
+            _report(errors, "Error: Incomplete SPS length field in AVCDecoderConfigurationRecord.")
+            return None
+        sps_length = struct.unpack_from('>H', record_bytes, offset)[0]
+        offset += 2
+        if offset + sps_length > len(record_bytes):
+            _report(errors, "Error: Incomplete SPS data in AVCDecoderConfigurationRecord.")
+            return None
+        sps_nalu_data = record_bytes[offset : offset + sps_length]
+        record_info['sps_nalus'].append(sps_nalu_data)
+        offset += sps_length
+
+    # Number of PPS NALUs
+    numOfPictureParameterSets = record_bytes[offset] & 0xFF
+    offset += 1
+    record_info['pps_nalus'] = []
+
+    for _ in range(numOfPictureParameterSets):
+        if offset + 2 > len(record_bytes):
+            _report(errors, "Error: Incomplete PPS length field in AVCDecoderConfigurationRecord.")
+            return None
+        pps_length = struct.unpack_from('>H', record_bytes, offset)[0]
+        offset += 2
+        if offset + pps_length > len(record_bytes):
+            _report(errors, "Error: Incomplete PPS data in AVCDecoderConfigurationRecord.")
+            return None
+        pps_nalu_data = record_bytes[offset : offset + pps_length]
+        record_info['pps_nalus'].append(pps_nalu_data)
+        offset += pps_length
+
+    return record_info
+
+def _make_nalu_splitter(length_size):
+    """
+    生成按固定长度前缀 (1~4 字节) 切分 AVCC NALU 的函数。
+    每种宽度各自绑定预编译的 struct.Struct，循环里没有按宽度的分支。
+    Returns:
+        function(view, errors) -> [(offset, size), ...]，offset 为 NALU 负载在 view 中的起始位置。
+    """
+    if length_size == 3:
+        unpack_hi_lo = struct.Struct('>BH').unpack_from
+        def read_length(view, offset):
+            hi, lo = unpack_hi_lo(view, offset)
+            return (hi << 16) | lo
+    else:
+        unpack = struct.Struct({1: '>B', 2: '>H', 4: '>I'}[length_size]).unpack_from
+        def read_length(view, offset):
+            return unpack(view, offset)[0]
+
+    def split(view, errors=None):
+        spans = []
+        offset = 0
+        total = len(view)
+        while offset < total:
+            if offset + length_size > total:
+                _report(errors, f"Warning: Incomplete NALU length field at offset {offset}. Remaining bytes: {total - offset}")
+                break
+
+            nalu_length = read_length(view, offset)
+            offset += length_size
+
+            if offset + nalu_length > total:
+                _report(errors, f"Warning: Incomplete NALU data at offset {offset}. Expected {nalu_length} bytes, but only {total - offset} available. Skipping.")
+                break
+
+            if nalu_length == 0:
+                _report(errors, f"Warning: Empty NALU at offset {offset - length_size}. Skipping.")
+                continue
+
+            spans.append((offset, nalu_length))
+            offset += nalu_length
+        return spans
+
+    return split
+
+NALU_SPLITTERS = {length_size: _make_nalu_splitter(length_size) for length_size in (1, 2, 3, 4)}
+
+def parse_nalu_data(nalu_bytes, length_size=4, errors=None, context=None):
+    """
+    从 H.264 NALU 字节流中解析出 NALU 单元。
+    并尝试解析 SPS/PPS NALU 的内容。
+
+    切分过程不拷贝负载：每个 NALU 的 'nalu_data' 是指向 nalu_bytes 的 memoryview，
+    'offset'/'size' 给出它在 nalu_bytes 中的位置，需要 bytes 时请 bytes(nalu_info.nalu_data)。
+    SPS/PPS 的解析结果来自 SPS_CACHE / PPS_CACHE，是只读的共享对象。
+    Args:
+        nalu_bytes (bytes | memoryview): 长度前缀格式 (AVCC) 的 NALU 序列。
+        length_size (int): 长度前缀字节数，即 AVCDecoderConfigurationRecord 的 lengthSizeMinusOne + 1。
+        errors (list): 提供时警告信息追加到该列表，否则记录为 warning 日志。
+        context (VideoStreamContext): 提供时把带内 SPS/PPS 登记为当前参数集，
+            并在 context.parse_slice_headers 为 True 时用它们解析 slice header。
+    """
+    splitter = NALU_SPLITTERS.get(length_size)
+    if splitter is None:
+        _report(errors, f"Error: Unsupported NALU length size {length_size}.")
+        return []
+
+    nalu_bytes = memoryview(nalu_bytes)
+    if PROFILE.enabled:
+        start = perf_counter_ns()
+        spans = splitter(nalu_bytes, errors)
+        PROFILE.add('nalu_split', perf_counter_ns() - start, len(nalu_bytes))
+    else:
+        spans = splitter(nalu_bytes, errors)
+    return [_nalu_info(nalu_bytes, offset, nalu_length, errors, context)
+            for offset, nalu_length in spans]
+
+def _nalu_info(view, offset, nalu_length, errors, context):
+    """
+    为 view[offset:offset+nalu_length] 处的 NALU 生成 NaluInfo，并解析其中的 SPS/PPS/slice header。
+    AVCC 与 Annex-B 两种切分方式共用。
+    """
+    current_nalu_data = view[offset : offset + nalu_length]
+    nalu_header = current_nalu_data[0]
+    nal_unit_type = nalu_header & 0x1F
+    nalu_info = NaluInfo(nal_unit_type, (nalu_header >> 5) & 0x03, (nalu_header >> 7) & 0x01,
+                         offset, nalu_length, current_nalu_data)
+    profiling = PROFILE.enabled
+    if profiling:
+        PROFILE.count_nalu('h264', nal_unit_type, nalu_length)
+
+    if nal_unit_type == 1 or nal_unit_type == 5: # Coded slice
+        if context is not None and context.parse_slice_headers:
+            if profiling:
+                start = perf_counter_ns()
+            slice_header = parse_h264_slice_header(current_nalu_data, context.sps_by_id, context.pps_by_id)
+            if profiling:
+                PROFILE.add('slice_header', perf_counter_ns() - start, nalu_length)
+            if slice_header is not None:
+                nalu_info.slice_header = slice_header
+            else:
+                _report(errors, f"Warning: Cannot parse slice header at offset {offset} (missing SPS/PPS or truncated).")
+    # --- 新增的 SPS/PPS 解析 ---
+    elif nal_unit_type == 7: # SPS
+        parsed_sps = SPS_CACHE.parse(current_nalu_data)
+        if parsed_sps:
+            nalu_info.parsed_sps_info = parsed_sps
+            if context is not None:
+                context.sps_by_id[parsed_sps.seq_parameter_set_id] = parsed_sps
+        else:
+            _report(errors, f"Warning: Invalid SPS NALU at offset {offset}.")
+    elif nal_unit_type == 8: # PPS
+        sps_by_id = context.sps_by_id if context is not None else {}
+        parsed_pps = PPS_CACHE.parse(current_nalu_data, _pps_chroma_format_idc(current_nalu_data, sps_by_id))
+        if parsed_pps:
+            nalu_info.parsed_pps_info = parsed_pps
+            if context is not None:
+                context.pps_by_id[parsed_pps.pic_parameter_set_id] = parsed_pps
+        else:
+            _report(errors, f"Warning: Invalid PPS NALU at offset {offset}.")
+    # --- 结束新增 ---
+    return nalu_info
+
+ANNEXB_START_CODE = b'\x00\x00\x01'
+
+def _iter_annexb_spans(buf, errors=None):
+    """
+    在 Annex-B 字节流中查找 0x000001 起始码 (0x00000001 的第一个 0 被当作前一个 NALU 的尾部零字节去掉)。
+    查找由 buf.find 完成 (bytes / bytearray / mmap 都支持)，Python 层只在 NALU 边界上循环一次。
+    Yields:
+        (offset, size): NALU (含 NAL header，不含起始码) 在 buf 中的位置。
+    """
+    find = buf.find
+    total = len(buf)
+    pos = find(ANNEXB_START_CODE)
+    if pos < 0:
+        if total:
+            _report(errors, "Warning: No Annex-B start code found.")
+        return
+    if pos and buf[:pos].count(0) != pos:
+        _report(errors, f"Warning: Skipped {pos} bytes before the first start code.")
+
+    start = pos + 3
+    while start < total:
+        next_pos = find(ANNEXB_START_CODE, start)
+        end = total if next_pos < 0 else next_pos
+        # NALU 以 rbsp_trailing_bits 结尾，最后一个字节不会是 0；末尾的 0 属于下一个 4 字节起始码或 trailing_zero_8bits
+        while end > start and buf[end - 1] == 0:
+            end -= 1
+        if end > start:
+            yield start, end - start
+        else:
+            _report(errors, f"Warning: Empty NALU at offset {start}. Skipping.")
+        if next_pos < 0:
+            break
+        start = next_pos + 3
+
+def parse_annexb_data(data, errors=None, context=None):
+    """
+    从 Annex-B 格式 (起始码分隔) 的 H.264 字节流中解析出 NALU 单元，例如裸 .h264 文件或从 MPEG-TS 中取出的 PES 负载。
+    返回值与 parse_nalu_data 相同，'offset' 为 NALU 在 data 中的位置 (起始码之后)。
+    Args:
+        data (bytes | bytearray | mmap | memoryview): Annex-B 字节流。memoryview 会先拷贝成 bytes 再查找。
+        errors (list): 提供时警告信息追加到该列表，否则记录为 warning 日志。
+        context (VideoStreamContext): 同 parse_nalu_data。
+    """
+    if isinstance(data, memoryview):
+        data = data.tobytes()
+    view = memoryview(data)
+    spans = _iter_annexb_spans(data, errors)
+    if PROFILE.enabled:
+        spans = PROFILE.timed_spans('annexb_split', spans)
+    return [_nalu_info(view, offset, nalu_length, errors, context)
+            for offset, nalu_length in spans]
+
+def iter_annexb_file(path, context=None, errors=None):
+    """
+    以流式方式逐个解析 Annex-B 裸流文件中的 NALU。文件通过 mmap 访问，
+    每个 NaluInfo 的 'nalu_data' 是指向映射区域的 memoryview，驻留内存不随文件大小增长。
+    Args:
+        context (VideoStreamContext): 默认新建一个，使带内 SPS/PPS 能用于后续 slice header 的解析。
+    Yields:
+        NaluInfo
+    """
+    if context is None:
+        context = VideoStreamContext()
+    with open(path, 'rb') as fd:
+        if fd.seek(0, os.SEEK_END) == 0:
+            return
+        mm = mmap.mmap(fd.fileno(), 0, access=mmap.ACCESS_READ)
+    view = memoryview(mm)
+    spans = _iter_annexb_spans(mm, errors)
+    if PROFILE.enabled:
+        spans = PROFILE.timed_spans('annexb_split', spans)
+    try:
+        for offset, nalu_length in spans:
+            yield _nalu_info(view, offset, nalu_length, errors, context)
+    finally:
+        view.release()
+        try:
+            mm.close()
+        except BufferError:
+            # 调用方仍持有 nalu_data，映射在其释放后由 GC 关闭
+            pass
+
+def is_annexb(fd):
+    """
+    判断文件是否以 Annex-B 起始码开头。读取后恢复文件位置。
+    RTMP VideoData body 的第一个字节是 FrameType/CodecID，不会是 0，因此不会被误判。
+    """
+    pos = fd.tell()
+    head = fd.read(4)
+    fd.seek(pos)
+    return head[:3] == ANNEXB_START_CODE or head == b'\x00' + ANNEXB_START_CODE
+
+class VideoStreamContext:
+    """
+    单路视频流的解析状态。
+    AVC/HEVC sequence header 只在流开始 (或参数变化) 时出现一次，其中的 lengthSizeMinusOne
+    决定之后所有 NALU 包的长度前缀宽度，所以需要跨 VideoData 保存下来。
+    同样，解析 slice header 需要按 id 查找当前生效的 SPS/PPS (来自 sequence header 或带内参数集)。
+    """
+    def __init__(self, parse_slice_headers=True):
+        self.avc_decoder_config_record = None
+        self.hevc_decoder_config_record = None
+        self.nalu_length_size = 4
+        self.parse_slice_headers = parse_slice_headers
+        self.sps_by_id = {}
+        self.pps_by_id = {}
+
+    def update_avc_config(self, record_info):
+        """
+        Returns:
+            (list, list): 见 parse_avc_config_parameter_sets。
+        """
+        self.avc_decoder_config_record = record_info
+        self.nalu_length_size = record_info['lengthSizeMinusOne'] + 1
+        return parse_avc_config_parameter_sets(record_info, self.sps_by_id, self.pps_by_id)
+
+    def update_hevc_config(self, record_info):
+        self.hevc_decoder_config_record = record_info
+        self.nalu_length_size = record_info['lengthSizeMinusOne'] + 1
+
+    def parse(self, video_data_bytes, strict=False):
+        return parse_rtmp_video_data(video_data_bytes, self, strict)
+
+def parse_rtmp_video_data(video_data_bytes, context=None, strict=False):
+    """
+    解析 RTMP VideoData 字节流，并尝试解析 H.264 / H.265 NALU 数据。
+    Args:
+        video_data_bytes (bytes | memoryview): RTMP VideoData 的字节流。
+        context (VideoStreamContext): 同一路流的解析上下文。提供时会记住最近一次的
+            sequence header，按其中的 NALU 长度前缀宽度切分之后的 NALU 包；
+            不提供时按 4 字节前缀处理。
+        strict (bool): 为 True 时遇到任何错误都抛出 VideoParseError；
+            否则非致命的警告收集在结果的 errors 列表里，致命错误记日志并返回 None。
+    Returns:
+        VideoTag: 解析结果记录 (to_dict() 可得到旧的 dict 结构)。
+                  NALU / SPS / PPS 数据都是指向 video_data_bytes 的 memoryview。
+                  HEVC 的 packet type 同样放在 avc_packet_type 字段，NALU 为 HevcNaluInfo。
+
+    解析过程中不打印任何内容，头部信息和十六进制 dump 只在 logger 开启 DEBUG 时输出。
+    PROFILE 开启时各阶段耗时记入 rtmp_video.profiling.PROFILE。
+    """
+    if not video_data_bytes:
+        return _fail("Error: Empty video_data_bytes.", strict)
+
+    profiling = PROFILE.enabled
+    if profiling:
+        start = perf_counter_ns()
+    try:
+        video_data_bytes = memoryview(video_data_bytes)
+        first_byte = video_data_bytes[0]
+        frame_type = (first_byte >> 4) & 0x0F
+        codec_id = first_byte & 0x0F
+
+        result = VideoTag(frame_type, codec_id)
+        errors = result.errors
+        debug = logger.isEnabledFor(logging.DEBUG)
+
+        # Process H.264 (AVC) video data
+        if codec_id == 7:
+            if len(video_data_bytes) < 5:
+                return _fail("Error: Incomplete H.264 video data header.", strict)
+
+            avc_packet_type = video_data_bytes[1]
+            result.avc_packet_type = avc_packet_type
+            result.composition_time = _composition_time(video_data_bytes)
+
+            if avc_packet_type == 0:  # AVC sequence header (AVCDecoderConfigurationRecord)
+                avc_config_record_data = video_data_bytes[5:]
+                if debug:
+                    logger.debug(f"  - AVC Sequence Header (AVCDecoderConfigurationRecord) - Length: {len(avc_config_record_data)} bytes")
+
+                # Parse the AVCDecoderConfigurationRecord
+                if profiling:
+                    config_start = perf_counter_ns()
+                parsed_config = parse_avc_decoder_configuration_record(avc_config_record_data, errors)
+                if profiling:
+                    PROFILE.add('avc_config', perf_counter_ns() - config_start, len(avc_config_record_data))
+                result.avc_decoder_config_record = parsed_config
+
+                # 每个 SPS/PPS 只经过缓存一次，有效性和 debug 输出都用这次的结果
+                parsed_sps_list = parsed_pps_list = ()
+                if parsed_config:
+                    if context is not None:
+                        parsed_sps_list, parsed_pps_list = context.update_avc_config(parsed_config)
+                    else:
+                        parsed_sps_list, parsed_pps_list = parse_avc_config_parameter_sets(parsed_config, {}, {})
+                    for parsed_sps_info in parsed_sps_list:
+                        if parsed_sps_info is None:
+                            _report(errors, "Warning: Invalid SPS in AVCDecoderConfigurationRecord.")
+                    for parsed_pps_info in parsed_pps_list:
+                        if parsed_pps_info is None:
+                            _report(errors, "Warning: Invalid PPS in AVCDecoderConfigurationRecord.")
+
+                if parsed_config and debug:
+                    logger.debug("  --- Parsed AVCDecoderConfigurationRecord ---")
+                    logger.debug(f"    Profile: {parsed_config.get('AVCProfileIndication')} (Level: {parsed_config.get('AVCLevelIndication')})")
+                    for i, (sps_data, parsed_sps_info) in enumerate(zip(parsed_config['sps_nalus'], parsed_sps_list)):
+                        logger.debug(f"    SPS NALU {i+1} (Length: {len(sps_data)} bytes): {sps_data.hex()}")
+                        if parsed_sps_info:
+                            logger.debug("      --- Parsed SPS Info ---")
+                            for k, v in parsed_sps_info.to_dict().items():
+                                logger.debug(f"        {k}: {v}")
+                    for i, (pps_data, parsed_pps_info) in enumerate(zip(parsed_config['pps_nalus'], parsed_pps_list)):
+                        logger.debug(f"    PPS NALU {i+1} (Length: {len(pps_data)} bytes): {pps_data.hex()}")
+                        if parsed_pps_info:
+                            logger.debug("      --- Parsed PPS Info ---")
+                            for k, v in parsed_pps_info.to_dict().items():
+                                logger.debug(f"        {k}: {v}")
+            elif avc_packet_type == 1:  # AVC NALU
+                nalu_data_raw = video_data_bytes[5:]
+                if debug:
+                    logger.debug(f"  - AVC NALU Raw Data - Length: {len(nalu_data_raw)} bytes")
+                length_size = context.nalu_length_size if context is not None else 4
+                result.parsed_nalus = parse_nalu_data(nalu_data_raw, length_size, errors, context)
+            elif avc_packet_type == 2:  # AVC end of sequence
+                if debug:
+                    logger.debug("  - AVC End of Sequence")
+            else:
+                _report(errors, f"Warning: Unknown AVC Packet Type: {avc_packet_type}")
+        # Process H.265 (HEVC) video data, same 5-byte header layout as AVC
+        elif codec_id == 12:
+            if len(video_data_bytes) < 5:
+                return _fail("Error: Incomplete HEVC video data header.", strict)
+
+            result.avc_packet_type = video_data_bytes[1]
+            result.composition_time = _composition_time(video_data_bytes)
+            from .hevc import parse_hevc_packet # 只有遇到 HEVC 流时才加载
+            if profiling:
+                hevc_start = perf_counter_ns()
+            parse_hevc_packet(result, video_data_bytes[5:], context, errors)
+            if profiling:
+                PROFILE.add('hevc', perf_counter_ns() - hevc_start, len(video_data_bytes) - 5)
+        elif debug:
+            logger.debug(f"  - Codec '{result.codec_id_str}' parsing not implemented in this example.")
+
+    except VideoParseError:
+        raise # strict 模式下 _fail 抛出的错误，不再包一层
+    except Exception as e:
+        return _fail(f"Error parsing video data: {e}", strict)
+    finally:
+        if profiling:
+            PROFILE.add('video_data', perf_counter_ns() - start, len(video_data_bytes))
+
+    if strict and errors:
+        raise VideoParseError("; ".join(errors))
+    return result
+
+def _composition_time(video_data_bytes):
+    # SI24, big-endian
+    composition_time = (video_data_bytes[2] << 16) | (video_data_bytes[3] << 8) | video_data_bytes[4]
+    if composition_time & 0x800000:
+        composition_time -= 0x1000000
+    return composition_time
+
+def _fail(message, strict):
+    if strict:
+        raise VideoParseError(message)
+    logger.warning(message)
+    return None
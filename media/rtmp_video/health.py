@@ -0,0 +1,359 @@
+"""
+直播流健康度的滑动窗口监控。
+
+    monitor = StreamHealthMonitor(window_s=10, on_alert=print, min_fps=20, max_keyframe_interval_ms=4000)
+    health = monitor.add_stream('live/test')
+    ... health.on_video(timestamp, len(video_data), parse_rtmp_video_data(video_data, context)) ...
+    print(health.window())
+
+每路流按流时间戳 (RTMP / FLV 的 ms 时间戳) 分成固定长度的桶，只保留最近 window_s 秒的桶
+(固定大小的 array 环形缓冲区)，并维护窗口内各计数的累加和：
+    - 每个包 O(1)：只累加当前桶；跨桶时把当前桶提交进环形缓冲区、减去被挤出的桶。
+      时间戳大跳变时最多清空整个环形缓冲区一次。
+    - 读窗口 (window()) O(1)：直接用累加和计算 fps / 码率 / 关键帧数 / 时间戳异常数。
+    - 每路流占用的内存固定，与流的时长和码率无关。
+阈值 (fps / 码率 / 关键帧间隔 / 时间戳异常数) 在桶提交时检查，越过阈值和恢复时各回调一次
+(HealthAlert.active 为 True / False)，不会每个包回调一次；分辨率和 SPS 变化每次变化都回调。
+"""
+from array import array
+
+from .h264 import SPS_CACHE
+from .records import Record
+
+# 告警类型
+ALERT_FPS_LOW = 'fps_low'
+ALERT_BITRATE_LOW = 'bitrate_low'
+ALERT_BITRATE_HIGH = 'bitrate_high'
+ALERT_KEYFRAME_INTERVAL = 'keyframe_interval'
+ALERT_CTS_ANOMALIES = 'cts_anomalies'
+ALERT_RESOLUTION_CHANGE = 'resolution_change'
+ALERT_SPS_CHANGE = 'sps_change'
+
+DEFAULT_MAX_CTS_MS = 2000 # CTS 超过这个值 (或为负) 视为异常
+
+
+class HealthThresholds:
+    """
+    告警阈值，为 None 的项不检查。多路流共享同一个对象。
+
+    Args:
+        min_fps (float): 窗口内平均帧率低于该值时告警。
+        min_kbps / max_kbps (float): 窗口内视频码率 (kbps) 的上下限。
+        max_keyframe_interval_ms (int): 两个关键帧的间隔 (或距上一个关键帧已过去的时间) 超过该值时告警。
+        max_cts_anomalies (int): 窗口内时间戳异常的个数超过该值时告警。
+        max_cts_ms (int): 单帧 composition time 的合理上限，超过即计为一次异常。
+    """
+    __slots__ = ('min_fps', 'min_kbps', 'max_kbps', 'max_keyframe_interval_ms', 'max_cts_anomalies', 'max_cts_ms')
+
+    def __init__(self, min_fps=None, min_kbps=None, max_kbps=None, max_keyframe_interval_ms=None,
+                 max_cts_anomalies=None, max_cts_ms=DEFAULT_MAX_CTS_MS):
+        self.min_fps = min_fps
+        self.min_kbps = min_kbps
+        self.max_kbps = max_kbps
+        self.max_keyframe_interval_ms = max_keyframe_interval_ms
+        self.max_cts_anomalies = max_cts_anomalies
+        self.max_cts_ms = max_cts_ms
+
+
+class HealthAlert(Record):
+    """
+    一次告警状态变化。active 为 False 表示该告警已恢复；分辨率 / SPS 变化没有恢复事件。
+    """
+    __slots__ = ('stream', 'kind', 'active', 'timestamp', 'value', 'limit')
+    _dict_fields = __slots__
+
+    def __init__(self, stream, kind, active, timestamp, value, limit):
+        self.stream = stream
+        self.kind = kind
+        self.active = active
+        self.timestamp = timestamp
+        self.value = value
+        self.limit = limit
+
+
+class StreamHealth:
+    """
+    单路流的滑动窗口统计。只接受 parse_rtmp_video_data 的结果，不保存任何帧数据。
+
+    Args:
+        key: 流标识，原样带在 HealthAlert.stream 里。
+        buckets (int): 窗口包含的桶数。
+        bucket_ms (int): 每个桶覆盖的流时间 (ms)。
+        thresholds (HealthThresholds): 告警阈值。
+        on_alert (callable): on_alert(HealthAlert)，为 None 时只记录 active_alerts 不回调。
+    """
+    __slots__ = ('key', 'thresholds', 'on_alert', 'bucket_ms',
+                 '_frames', '_bytes', '_keyframes', '_anomalies', '_pos', '_filled', '_bucket',
+                 '_cur_frames', '_cur_bytes', '_cur_keyframes', '_cur_anomalies',
+                 'window_frames', 'window_bytes', 'window_keyframes', 'window_anomalies',
+                 'frames', 'bytes', 'errors', 'cts_anomalies', 'last_ts', 'last_keyframe_ts',
+                 'keyframe_interval', 'codec_id', 'width', 'height', 'sps', 'resolution_changes', 'sps_changes',
+                 'active_alerts')
+
+    def __init__(self, key, buckets=10, bucket_ms=1000, thresholds=None, on_alert=None):
+        if buckets < 1 or bucket_ms < 1:
+            raise ValueError("buckets and bucket_ms must be positive")
+        self.key = key
+        self.thresholds = thresholds if thresholds is not None else HealthThresholds()
+        self.on_alert = on_alert
+        self.bucket_ms = bucket_ms
+        # 环形缓冲区：已提交的桶，_pos 指向下一个要写入 (也就是最旧) 的位置
+        self._frames = array('l', [0]) * buckets
+        self._bytes = array('q', [0]) * buckets
+        self._keyframes = array('l', [0]) * buckets
+        self._anomalies = array('l', [0]) * buckets
+        self._pos = 0
+        self._filled = 0        # 已提交的桶数，最多为 buckets
+        self._bucket = None     # 当前 (未提交) 桶的编号 = timestamp // bucket_ms
+        self._cur_frames = self._cur_bytes = self._cur_keyframes = self._cur_anomalies = 0
+        # 环形缓冲区内各列的累加和
+        self.window_frames = self.window_bytes = self.window_keyframes = self.window_anomalies = 0
+
+        self.frames = 0
+        self.bytes = 0
+        self.errors = 0
+        self.cts_anomalies = 0
+        self.last_ts = None
+        self.last_keyframe_ts = None
+        self.keyframe_interval = None # 最近两个关键帧的间隔 (ms)
+        self.codec_id = None
+        self.width = self.height = None
+        self.sps = None               # 最近一次 sequence header 里第一个 SPS 的原始字节
+        self.resolution_changes = 0
+        self.sps_changes = 0
+        self.active_alerts = {}       # kind -> HealthAlert
+
+    def on_video(self, timestamp, size, parsed):
+        """
+        Args:
+            timestamp (int): tag / 消息时间戳 (ms，DTS)。
+            size (int): VideoData 字节数。
+            parsed (VideoTag | None): parse_rtmp_video_data 的结果，None 表示解析失败。
+        """
+        bucket = timestamp // self.bucket_ms
+        if bucket != self._bucket:
+            self._advance(bucket, timestamp)
+        self.bytes += size
+        self._cur_bytes += size
+        if parsed is None:
+            self.errors += 1
+            return
+        if parsed.errors:
+            self.errors += len(parsed.errors)
+        self.codec_id = parsed.codec_id
+        packet_type = parsed.avc_packet_type
+        if packet_type == 0:
+            self._on_sequence_header(parsed, timestamp)
+            return
+        if packet_type != 1:
+            return
+
+        self.frames += 1
+        self._cur_frames += 1
+        # 时间戳异常：CTS 为负或过大，或 DTS 倒退
+        cts = parsed.composition_time
+        last_ts = self.last_ts
+        if (cts is not None and (cts < 0 or cts > self.thresholds.max_cts_ms)) or \
+                (last_ts is not None and timestamp < last_ts):
+            self.cts_anomalies += 1
+            self._cur_anomalies += 1
+        self.last_ts = timestamp
+
+        if parsed.frame_type == 1:
+            self._cur_keyframes += 1
+            if self.last_keyframe_ts is not None:
+                interval = self.keyframe_interval = timestamp - self.last_keyframe_ts
+                limit = self.thresholds.max_keyframe_interval_ms
+                if limit is not None:
+                    self._set_alert(ALERT_KEYFRAME_INTERVAL, interval > limit, timestamp, interval, limit)
+            self.last_keyframe_ts = timestamp
+
+    def _advance(self, bucket, timestamp):
+        """
+        当前桶结束：提交到环形缓冲区，中间没有数据的桶按空桶提交，然后检查窗口阈值。
+        时间戳倒退超过一个窗口 (推流端重置时间戳) 时清空窗口重新开始；小幅倒退仍计入当前桶。
+        """
+        previous = self._bucket
+        if previous is not None and bucket < previous:
+            if previous - bucket < len(self._frames):
+                return
+            self._bucket = bucket
+            self._reset_window()
+            return
+        self._bucket = bucket
+        if previous is None:
+            return
+        self._commit(self._cur_frames, self._cur_bytes, self._cur_keyframes, self._cur_anomalies)
+        self._cur_frames = self._cur_bytes = self._cur_keyframes = self._cur_anomalies = 0
+        for _ in range(min(bucket - previous - 1, len(self._frames))):
+            self._commit(0, 0, 0, 0)
+        self._check_window(timestamp)
+
+    def _commit(self, frames, size, keyframes, anomalies):
+        pos = self._pos
+        self.window_frames += frames - self._frames[pos]
+        self.window_bytes += size - self._bytes[pos]
+        self.window_keyframes += keyframes - self._keyframes[pos]
+        self.window_anomalies += anomalies - self._anomalies[pos]
+        self._frames[pos] = frames
+        self._bytes[pos] = size
+        self._keyframes[pos] = keyframes
+        self._anomalies[pos] = anomalies
+        self._pos = (pos + 1) % len(self._frames)
+        if self._filled < len(self._frames):
+            self._filled += 1
+
+    def _reset_window(self):
+        for column in (self._frames, self._bytes, self._keyframes, self._anomalies):
+            for i in range(len(column)):
+                column[i] = 0
+        self._pos = self._filled = 0
+        self._cur_frames = self._cur_bytes = self._cur_keyframes = self._cur_anomalies = 0
+        self.window_frames = self.window_bytes = self.window_keyframes = self.window_anomalies = 0
+        # last_ts 保留，这一帧会按 DTS 倒退计一次异常
+        self.last_keyframe_ts = None
+
+    def _check_window(self, timestamp):
+        t = self.thresholds
+        # 窗口没填满之前不检查速率类阈值，避免刚开始推流时误报
+        if self._filled == len(self._frames):
+            seconds = self._filled * self.bucket_ms / 1000
+            if t.min_fps is not None:
+                fps = self.window_frames / seconds
+                self._set_alert(ALERT_FPS_LOW, fps < t.min_fps, timestamp, fps, t.min_fps)
+            if t.min_kbps is not None or t.max_kbps is not None:
+                kbps = self.window_bytes * 8 / seconds / 1000
+                if t.min_kbps is not None:
+                    self._set_alert(ALERT_BITRATE_LOW, kbps < t.min_kbps, timestamp, kbps, t.min_kbps)
+                if t.max_kbps is not None:
+                    self._set_alert(ALERT_BITRATE_HIGH, kbps > t.max_kbps, timestamp, kbps, t.max_kbps)
+        if t.max_cts_anomalies is not None:
+            self._set_alert(ALERT_CTS_ANOMALIES, self.window_anomalies > t.max_cts_anomalies, timestamp,
+                            self.window_anomalies, t.max_cts_anomalies)
+        # 关键帧丢失时不会等到下一个关键帧才告警
+        limit = t.max_keyframe_interval_ms
+        if limit is not None and self.last_keyframe_ts is not None and timestamp - self.last_keyframe_ts > limit:
+            self._set_alert(ALERT_KEYFRAME_INTERVAL, True, timestamp, timestamp - self.last_keyframe_ts, limit)
+
+    def _set_alert(self, kind, active, timestamp, value, limit):
+        if active == (kind in self.active_alerts):
+            return
+        alert = HealthAlert(self.key, kind, active, timestamp, value, limit)
+        if active:
+            self.active_alerts[kind] = alert
+        else:
+            del self.active_alerts[kind]
+        if self.on_alert is not None:
+            self.on_alert(alert)
+
+    def _on_sequence_header(self, parsed, timestamp):
+        if parsed.avc_decoder_config_record and parsed.avc_decoder_config_record['sps_nalus']:
+            sps_data = bytes(parsed.avc_decoder_config_record['sps_nalus'][0])
+            cache = SPS_CACHE
+        elif parsed.hevc_decoder_config_record and parsed.hevc_decoder_config_record['sps_nalus']:
+            from .hevc import HEVC_SPS_CACHE
+            sps_data = bytes(parsed.hevc_decoder_config_record['sps_nalus'][0])
+            cache = HEVC_SPS_CACHE
+        else:
+            return
+        if sps_data == self.sps:
+            return # 推流端重发相同的 sequence header
+        changed = self.sps is not None
+        self.sps = sps_data
+        if changed:
+            self.sps_changes += 1
+            self._event(ALERT_SPS_CHANGE, timestamp, len(sps_data))
+        sps = cache.parse(sps_data)
+        if sps is None:
+            return
+        if cache is SPS_CACHE:
+            size = (sps.cropped_width, sps.cropped_height)
+        else:
+            size = (sps.width, sps.height)
+        if size != (self.width, self.height):
+            if self.width is not None:
+                self.resolution_changes += 1
+                self._event(ALERT_RESOLUTION_CHANGE, timestamp, size, (self.width, self.height))
+            self.width, self.height = size
+
+    def _event(self, kind, timestamp, value, previous=None):
+        if self.on_alert is not None:
+            self.on_alert(HealthAlert(self.key, kind, True, timestamp, value, previous))
+
+    def window(self):
+        """
+        当前窗口的统计 (不含还没结束的当前桶)。窗口为空时速率类字段为 None。
+
+        Returns:
+            dict: fps, kbps, keyframes, cts_anomalies, window_s，以及 keyframe_interval_ms、
+                  width / height、累计的 frames / errors / resolution_changes / sps_changes 和
+                  当前生效的告警类型列表 alerts。
+        """
+        seconds = self._filled * self.bucket_ms / 1000
+        return {
+            'stream': self.key,
+            'window_s': seconds,
+            'fps': round(self.window_frames / seconds, 2) if seconds else None,
+            'kbps': round(self.window_bytes * 8 / seconds / 1000, 1) if seconds else None,
+            'keyframes': self.window_keyframes,
+            'cts_anomalies': self.window_anomalies,
+            'keyframe_interval_ms': self.keyframe_interval,
+            'width': self.width,
+            'height': self.height,
+            'frames': self.frames,
+            'errors': self.errors,
+            'resolution_changes': self.resolution_changes,
+            'sps_changes': self.sps_changes,
+            'alerts': list(self.active_alerts),
+        }
+
+
+class StreamHealthMonitor:
+    """
+    多路流的 StreamHealth 集合，所有流共享同一组阈值和回调。
+
+    Args:
+        window_s (float): 滑动窗口长度 (秒)。
+        bucket_ms (int): 桶长度 (ms)，决定窗口的时间精度和阈值检查的频率。
+        on_alert (callable): on_alert(HealthAlert)。
+        **thresholds: 传给 HealthThresholds。
+    """
+    def __init__(self, window_s=10, bucket_ms=1000, on_alert=None, **thresholds):
+        self.buckets = max(1, round(window_s * 1000 / bucket_ms))
+        self.bucket_ms = bucket_ms
+        self.on_alert = on_alert
+        self.thresholds = HealthThresholds(**thresholds)
+        self.streams = {}
+
+    def add_stream(self, key):
+        """
+        开始监控一路流 (同名流重新推流时重新开始统计)。
+        """
+        health = self.streams[key] = StreamHealth(key, self.buckets, self.bucket_ms, self.thresholds, self.on_alert)
+        return health
+
+    def remove_stream(self, key):
+        return self.streams.pop(key, None)
+
+    def on_video(self, key, timestamp, size, parsed):
+        health = self.streams.get(key)
+        if health is None:
+            health = self.add_stream(key)
+        health.on_video(timestamp, size, parsed)
+
+    def __len__(self):
+        return len(self.streams)
+
+    def window(self, key):
+        health = self.streams.get(key)
+        return health.window() if health is not None else None
+
+    def snapshot(self):
+        return [health.window() for health in list(self.streams.values())]
+
+    def alerting(self):
+        """
+        当前有未恢复告警的流。需要遍历所有流，适合定时调用而不是每个包调用。
+        """
+        return {key: list(health.active_alerts.values())
+                for key, health in self.streams.items() if health.active_alerts}
@@ -0,0 +1,496 @@
+import logging
+
+from .bitreader import BitReader
+from .errors import _report, logger
+from .h264 import NALU_SPLITTERS, ParameterSetCache
+from .profiling import PROFILE
+from .records import HevcNaluInfo, HevcPpsInfo, HevcSpsInfo, HevcVpsInfo
+
+HEVC_NAL_VPS = 32
+HEVC_NAL_SPS = 33
+HEVC_NAL_PPS = 34
+
+HEVC_CONFIG_RECORD_FIXED_SIZE = 23
+
+
+def _parse_profile_tier_level(reader, info, max_sub_layers_minus1):
+    """
+    profile_tier_level(1, maxNumSubLayersMinus1)，只保留 general 部分，子层部分直接跳过。
+    """
+    info['general_profile_space'] = reader.read_bits(2)
+    info['general_tier_flag'] = reader.read_bit()
+    info['general_profile_idc'] = reader.read_bits(5)
+    info['general_profile_compatibility_flags'] = reader.read_bits(32)
+    info['general_progressive_source_flag'] = reader.read_bit()
+    info['general_interlaced_source_flag'] = reader.read_bit()
+    reader.read_bits(46) # non_packed / frame_only / 43 bits constraint flags / inbld
+    info['general_level_idc'] = reader.read_bits(8)
+
+    sub_layer_flags = [reader.read_bits(2) for _ in range(max_sub_layers_minus1)]
+    if max_sub_layers_minus1 > 0:
+        reader.read_bits(2 * (8 - max_sub_layers_minus1)) # reserved_zero_2bits
+    for flags in sub_layer_flags:
+        if flags & 0x02: # sub_layer_profile_present_flag
+            reader.read_bits(88)
+        if flags & 0x01: # sub_layer_level_present_flag
+            reader.read_bits(8)
+
+
+def _parse_sub_layer_ordering_info(reader, info, prefix, max_sub_layers_minus1):
+    present = reader.read_bit()
+    info[f'{prefix}_sub_layer_ordering_info_present_flag'] = present
+    # 只保留最高子层的值，它决定整个码流的缓冲/重排需求
+    for _ in range(0 if present else max_sub_layers_minus1, max_sub_layers_minus1 + 1):
+        info[f'{prefix}_max_dec_pic_buffering_minus1'] = reader.read_ue()
+        info[f'{prefix}_max_num_reorder_pics'] = reader.read_ue()
+        info[f'{prefix}_max_latency_increase_plus1'] = reader.read_ue()
+
+
+def _skip_scaling_list_data(reader):
+    for size_id in range(4):
+        for _ in range(0, 6, 3 if size_id == 3 else 1):
+            if not reader.read_bit(): # scaling_list_pred_mode_flag
+                reader.read_ue()      # scaling_list_pred_matrix_id_delta
+                continue
+            coef_num = min(64, 1 << (4 + (size_id << 1)))
+            if size_id > 1:
+                reader.read_se()      # scaling_list_dc_coef_minus8
+            for _ in range(coef_num):
+                reader.read_se()      # scaling_list_delta_coef
+
+
+def _skip_st_ref_pic_sets(reader, num_short_term_ref_pic_sets):
+    """
+    跳过 SPS 中的 st_ref_pic_set(i)，需要记录每个集合的 NumDeltaPocs 供后面的帧间预测引用。
+    """
+    num_delta_pocs = []
+    for idx in range(num_short_term_ref_pic_sets):
+        inter_ref_pic_set_prediction_flag = reader.read_bit() if idx != 0 else 0
+        if inter_ref_pic_set_prediction_flag:
+            reader.read_bit() # delta_rps_sign
+            reader.read_ue()  # abs_delta_rps_minus1
+            count = 0
+            for _ in range(num_delta_pocs[idx - 1] + 1):
+                used_by_curr_pic_flag = reader.read_bit()
+                use_delta_flag = 1 if used_by_curr_pic_flag else reader.read_bit()
+                count += use_delta_flag
+            num_delta_pocs.append(count)
+        else:
+            num_negative_pics = reader.read_ue()
+            num_positive_pics = reader.read_ue()
+            for _ in range(num_negative_pics + num_positive_pics):
+                reader.read_ue()  # delta_poc_sX_minus1
+                reader.read_bit() # used_by_curr_pic_sX_flag
+            num_delta_pocs.append(num_negative_pics + num_positive_pics)
+
+
+def _parse_vui(reader):
+    vui_info = {}
+    vui_info['aspect_ratio_info_present_flag'] = reader.read_bit()
+    if vui_info['aspect_ratio_info_present_flag']:
+        vui_info['aspect_ratio_idc'] = reader.read_bits(8)
+        if vui_info['aspect_ratio_idc'] == 255:
+            vui_info['sar_width'] = reader.read_bits(16)
+            vui_info['sar_height'] = reader.read_bits(16)
+
+    vui_info['overscan_info_present_flag'] = reader.read_bit()
+    if vui_info['overscan_info_present_flag']:
+        vui_info['overscan_appropriate_flag'] = reader.read_bit()
+
+    vui_info['video_signal_type_present_flag'] = reader.read_bit()
+    if vui_info['video_signal_type_present_flag']:
+        vui_info['video_format'] = reader.read_bits(3)
+        vui_info['video_full_range_flag'] = reader.read_bit()
+        vui_info['colour_description_present_flag'] = reader.read_bit()
+        if vui_info['colour_description_present_flag']:
+            vui_info['colour_primaries'] = reader.read_bits(8)
+            vui_info['transfer_characteristics'] = reader.read_bits(8)
+            vui_info['matrix_coeffs'] = reader.read_bits(8)
+
+    vui_info['chroma_loc_info_present_flag'] = reader.read_bit()
+    if vui_info['chroma_loc_info_present_flag']:
+        vui_info['chroma_sample_loc_type_top_field'] = reader.read_ue()
+        vui_info['chroma_sample_loc_type_bottom_field'] = reader.read_ue()
+
+    vui_info['neutral_chroma_indication_flag'] = reader.read_bit()
+    vui_info['field_seq_flag'] = reader.read_bit()
+    vui_info['frame_field_info_present_flag'] = reader.read_bit()
+    vui_info['default_display_window_flag'] = reader.read_bit()
+    if vui_info['default_display_window_flag']:
+        for _ in range(4):
+            reader.read_ue() # def_disp_win_*_offset
+
+    vui_info['vui_timing_info_present_flag'] = reader.read_bit()
+    if vui_info['vui_timing_info_present_flag']:
+        vui_info['vui_num_units_in_tick'] = reader.read_bits(32)
+        vui_info['vui_time_scale'] = reader.read_bits(32)
+    # 后面的 HRD / bitstream_restriction 目前用不到，不再解析
+    return vui_info
+
+
+def parse_hevc_vps(vps_nalu_data):
+    """
+    解析 H.265 VPS NALU，提取层/子层信息和 timing 信息。
+    Args:
+        vps_nalu_data (bytes | memoryview): VPS NALU 的原始数据，**包含 2 字节 NALU header**。
+    Returns:
+        HevcVpsInfo: 解析出的 VPS 参数；数据无效时返回 None。
+    """
+    if not vps_nalu_data or len(vps_nalu_data) < 2 or ((vps_nalu_data[0] >> 1) & 0x3F) != HEVC_NAL_VPS:
+        logger.warning("Error: Not a valid VPS NALU data provided.")
+        return None
+
+    reader = BitReader(vps_nalu_data, rbsp=True)
+    vps_info = {}
+    try:
+        reader.read_bits(16) # Skip the 2-byte NALU header
+        vps_info['vps_video_parameter_set_id'] = reader.read_bits(4)
+        vps_info['vps_base_layer_internal_flag'] = reader.read_bit()
+        vps_info['vps_base_layer_available_flag'] = reader.read_bit()
+        vps_info['vps_max_layers_minus1'] = reader.read_bits(6)
+        vps_info['vps_max_sub_layers_minus1'] = reader.read_bits(3)
+        vps_info['vps_temporal_id_nesting_flag'] = reader.read_bit()
+        reader.read_bits(16) # vps_reserved_0xffff_16bits
+        _parse_profile_tier_level(reader, vps_info, vps_info['vps_max_sub_layers_minus1'])
+        _parse_sub_layer_ordering_info(reader, vps_info, 'vps', vps_info['vps_max_sub_layers_minus1'])
+
+        vps_info['vps_max_layer_id'] = reader.read_bits(6)
+        vps_info['vps_num_layer_sets_minus1'] = reader.read_ue()
+        for _ in range(vps_info['vps_num_layer_sets_minus1']):
+            reader.read_bits(vps_info['vps_max_layer_id'] + 1) # layer_id_included_flag[i][j]
+
+        vps_info['vps_timing_info_present_flag'] = reader.read_bit()
+        vps_info['frame_rate'] = None
+        if vps_info['vps_timing_info_present_flag']:
+            vps_info['vps_num_units_in_tick'] = reader.read_bits(32)
+            vps_info['vps_time_scale'] = reader.read_bits(32)
+            if vps_info['vps_num_units_in_tick'] > 0 and vps_info['vps_time_scale'] > 0:
+                vps_info['frame_rate'] = vps_info['vps_time_scale'] / vps_info['vps_num_units_in_tick']
+
+    except IndexError as e:
+        logger.warning(f"Error reading VPS bitstream: {e}. Data might be truncated.")
+        return None
+    except Exception as e:
+        logger.warning(f"An error occurred during VPS parsing: {e}")
+        return None
+
+    return HevcVpsInfo.from_dict(vps_info)
+
+
+def parse_hevc_sps(sps_nalu_data):
+    """
+    解析 H.265 SPS NALU，提取分辨率、位深和帧率。
+    Args:
+        sps_nalu_data (bytes | memoryview): SPS NALU 的原始数据，**包含 2 字节 NALU header**。
+    Returns:
+        HevcSpsInfo: 解析出的 SPS 参数；数据无效时返回 None。
+    """
+    if not sps_nalu_data or len(sps_nalu_data) < 2 or ((sps_nalu_data[0] >> 1) & 0x3F) != HEVC_NAL_SPS:
+        logger.warning("Error: Not a valid HEVC SPS NALU data provided.")
+        return None
+
+    reader = BitReader(sps_nalu_data, rbsp=True)
+    sps_info = {}
+    try:
+        reader.read_bits(16) # Skip the 2-byte NALU header
+        sps_info['sps_video_parameter_set_id'] = reader.read_bits(4)
+        sps_info['sps_max_sub_layers_minus1'] = reader.read_bits(3)
+        sps_info['sps_temporal_id_nesting_flag'] = reader.read_bit()
+        _parse_profile_tier_level(reader, sps_info, sps_info['sps_max_sub_layers_minus1'])
+
+        sps_info['sps_seq_parameter_set_id'] = reader.read_ue()
+        sps_info['chroma_format_idc'] = reader.read_ue()
+        if sps_info['chroma_format_idc'] == 3:
+            sps_info['separate_colour_plane_flag'] = reader.read_bit()
+        sps_info['pic_width_in_luma_samples'] = reader.read_ue()
+        sps_info['pic_height_in_luma_samples'] = reader.read_ue()
+        sps_info['conformance_window_flag'] = reader.read_bit()
+        if sps_info['conformance_window_flag']:
+            sps_info['conf_win_left_offset'] = reader.read_ue()
+            sps_info['conf_win_right_offset'] = reader.read_ue()
+            sps_info['conf_win_top_offset'] = reader.read_ue()
+            sps_info['conf_win_bottom_offset'] = reader.read_ue()
+        sps_info['bit_depth_luma_minus8'] = reader.read_ue()
+        sps_info['bit_depth_chroma_minus8'] = reader.read_ue()
+        sps_info['log2_max_pic_order_cnt_lsb_minus4'] = reader.read_ue()
+        _parse_sub_layer_ordering_info(reader, sps_info, 'sps', sps_info['sps_max_sub_layers_minus1'])
+
+        sps_info['log2_min_luma_coding_block_size_minus3'] = reader.read_ue()
+        sps_info['log2_diff_max_min_luma_coding_block_size'] = reader.read_ue()
+        sps_info['log2_min_luma_transform_block_size_minus2'] = reader.read_ue()
+        sps_info['log2_diff_max_min_luma_transform_block_size'] = reader.read_ue()
+        sps_info['max_transform_hierarchy_depth_inter'] = reader.read_ue()
+        sps_info['max_transform_hierarchy_depth_intra'] = reader.read_ue()
+        sps_info['scaling_list_enabled_flag'] = reader.read_bit()
+        if sps_info['scaling_list_enabled_flag']:
+            sps_info['sps_scaling_list_data_present_flag'] = reader.read_bit()
+            if sps_info['sps_scaling_list_data_present_flag']:
+                _skip_scaling_list_data(reader)
+        sps_info['amp_enabled_flag'] = reader.read_bit()
+        sps_info['sample_adaptive_offset_enabled_flag'] = reader.read_bit()
+        sps_info['pcm_enabled_flag'] = reader.read_bit()
+        if sps_info['pcm_enabled_flag']:
+            reader.read_bits(8) # pcm_sample_bit_depth_luma_minus1 / chroma_minus1
+            reader.read_ue()    # log2_min_pcm_luma_coding_block_size_minus3
+            reader.read_ue()    # log2_diff_max_min_pcm_luma_coding_block_size
+            reader.read_bit()   # pcm_loop_filter_disabled_flag
+
+        sps_info['num_short_term_ref_pic_sets'] = reader.read_ue()
+        _skip_st_ref_pic_sets(reader, sps_info['num_short_term_ref_pic_sets'])
+        sps_info['long_term_ref_pics_present_flag'] = reader.read_bit()
+        if sps_info['long_term_ref_pics_present_flag']:
+            sps_info['num_long_term_ref_pics_sps'] = reader.read_ue()
+            poc_lsb_bits = sps_info['log2_max_pic_order_cnt_lsb_minus4'] + 4
+            for _ in range(sps_info['num_long_term_ref_pics_sps']):
+                reader.read_bits(poc_lsb_bits + 1) # lt_ref_pic_poc_lsb_sps + used_by_curr_pic_lt_sps_flag
+        sps_info['sps_temporal_mvp_enabled_flag'] = reader.read_bit()
+        sps_info['strong_intra_smoothing_enabled_flag'] = reader.read_bit()
+        sps_info['vui_parameters_present_flag'] = reader.read_bit()
+        if sps_info['vui_parameters_present_flag']:
+            sps_info['vui_parameters'] = _parse_vui(reader)
+
+    except IndexError as e:
+        logger.warning(f"Error reading HEVC SPS bitstream: {e}. Data might be truncated.")
+        return None
+    except Exception as e:
+        logger.warning(f"An error occurred during HEVC SPS parsing: {e}")
+        return None
+
+    # Calculate resolution (conformance window offsets are in chroma sample units)
+    chroma_format_idc = sps_info['chroma_format_idc']
+    sub_width_c = 2 if chroma_format_idc in (1, 2) else 1
+    sub_height_c = 2 if chroma_format_idc == 1 else 1
+    width = sps_info['pic_width_in_luma_samples']
+    height = sps_info['pic_height_in_luma_samples']
+    if sps_info['conformance_window_flag']:
+        width -= sub_width_c * (sps_info['conf_win_left_offset'] + sps_info['conf_win_right_offset'])
+        height -= sub_height_c * (sps_info['conf_win_top_offset'] + sps_info['conf_win_bottom_offset'])
+    sps_info['width'] = width
+    sps_info['height'] = height
+    sps_info['bit_depth_luma'] = sps_info['bit_depth_luma_minus8'] + 8
+    sps_info['bit_depth_chroma'] = sps_info['bit_depth_chroma_minus8'] + 8
+
+    sps_info['frame_rate'] = None
+    vui_info = sps_info.get('vui_parameters')
+    if vui_info and vui_info.get('vui_timing_info_present_flag'):
+        if vui_info['vui_num_units_in_tick'] > 0 and vui_info['vui_time_scale'] > 0:
+            sps_info['frame_rate'] = vui_info['vui_time_scale'] / vui_info['vui_num_units_in_tick']
+
+    return HevcSpsInfo.from_dict(sps_info)
+
+
+def parse_hevc_pps(pps_nalu_data):
+    """
+    解析 H.265 PPS NALU 的前半部分 (到 entropy_coding_sync_enabled_flag 为止)。
+    Args:
+        pps_nalu_data (bytes | memoryview): PPS NALU 的原始数据，**包含 2 字节 NALU header**。
+    Returns:
+        HevcPpsInfo: 解析出的 PPS 参数；数据无效时返回 None。
+    """
+    if not pps_nalu_data or len(pps_nalu_data) < 2 or ((pps_nalu_data[0] >> 1) & 0x3F) != HEVC_NAL_PPS:
+        logger.warning("Error: Not a valid HEVC PPS NALU data provided.")
+        return None
+
+    reader = BitReader(pps_nalu_data, rbsp=True)
+    pps_info = {}
+    try:
+        reader.read_bits(16) # Skip the 2-byte NALU header
+        pps_info['pps_pic_parameter_set_id'] = reader.read_ue()
+        pps_info['pps_seq_parameter_set_id'] = reader.read_ue()
+        pps_info['dependent_slice_segments_enabled_flag'] = reader.read_bit()
+        pps_info['output_flag_present_flag'] = reader.read_bit()
+        pps_info['num_extra_slice_header_bits'] = reader.read_bits(3)
+        pps_info['sign_data_hiding_enabled_flag'] = reader.read_bit()
+        pps_info['cabac_init_present_flag'] = reader.read_bit()
+        pps_info['num_ref_idx_l0_default_active_minus1'] = reader.read_ue()
+        pps_info['num_ref_idx_l1_default_active_minus1'] = reader.read_ue()
+        pps_info['init_qp_minus26'] = reader.read_se()
+        pps_info['constrained_intra_pred_flag'] = reader.read_bit()
+        pps_info['transform_skip_enabled_flag'] = reader.read_bit()
+        pps_info['cu_qp_delta_enabled_flag'] = reader.read_bit()
+        if pps_info['cu_qp_delta_enabled_flag']:
+            pps_info['diff_cu_qp_delta_depth'] = reader.read_ue()
+        pps_info['pps_cb_qp_offset'] = reader.read_se()
+        pps_info['pps_cr_qp_offset'] = reader.read_se()
+        pps_info['pps_slice_chroma_qp_offsets_present_flag'] = reader.read_bit()
+        pps_info['weighted_pred_flag'] = reader.read_bit()
+        pps_info['weighted_bipred_flag'] = reader.read_bit()
+        pps_info['transquant_bypass_enabled_flag'] = reader.read_bit()
+        pps_info['tiles_enabled_flag'] = reader.read_bit()
+        pps_info['entropy_coding_sync_enabled_flag'] = reader.read_bit()
+
+    except IndexError as e:
+        logger.warning(f"Error reading HEVC PPS bitstream: {e}. Data might be truncated.")
+        return None
+    except Exception as e:
+        logger.warning(f"An error occurred during HEVC PPS parsing: {e}")
+        return None
+
+    return HevcPpsInfo.from_dict(pps_info)
+
+
+HEVC_VPS_CACHE = ParameterSetCache(parse_hevc_vps)
+HEVC_SPS_CACHE = ParameterSetCache(parse_hevc_sps)
+HEVC_PPS_CACHE = ParameterSetCache(parse_hevc_pps)
+
+_PARAMETER_SET_CACHES = {
+    HEVC_NAL_VPS: (HEVC_VPS_CACHE, 'parsed_vps_info', 'VPS'),
+    HEVC_NAL_SPS: (HEVC_SPS_CACHE, 'parsed_sps_info', 'SPS'),
+    HEVC_NAL_PPS: (HEVC_PPS_CACHE, 'parsed_pps_info', 'PPS'),
+}
+
+
+def parse_hevc_decoder_configuration_record(record_bytes, errors=None):
+    """
+    解析 HEVCDecoderConfigurationRecord，提取 VPS / SPS / PPS NALU 数据。
+
+    Args:
+        record_bytes (bytes | memoryview): HEVCDecoderConfigurationRecord 的原始字节流。
+        errors (list): 提供时错误信息追加到该列表，否则记录为 warning 日志。
+
+    Returns:
+        dict: 记录头部字段以及
+              {
+                  'vps_nalus': [memoryview, ...],
+                  'sps_nalus': [memoryview, ...],
+                  'pps_nalus': [memoryview, ...],
+                  'other_nalus': [memoryview, ...]   # SEI 等其他数组
+              }
+    """
+    if not record_bytes or len(record_bytes) < HEVC_CONFIG_RECORD_FIXED_SIZE:
+        _report(errors, "Error: Invalid HEVCDecoderConfigurationRecord data (too short).")
+        return None
+
+    record_bytes = memoryview(record_bytes)
+    reader = BitReader(record_bytes[:HEVC_CONFIG_RECORD_FIXED_SIZE - 1])
+    record_info = {}
+    record_info['configurationVersion'] = reader.read_bits(8)
+    record_info['general_profile_space'] = reader.read_bits(2)
+    record_info['general_tier_flag'] = reader.read_bit()
+    record_info['general_profile_idc'] = reader.read_bits(5)
+    record_info['general_profile_compatibility_flags'] = reader.read_bits(32)
+    record_info['general_constraint_indicator_flags'] = reader.read_bits(48)
+    record_info['general_level_idc'] = reader.read_bits(8)
+    reader.read_bits(4)
+    record_info['min_spatial_segmentation_idc'] = reader.read_bits(12)
+    reader.read_bits(6)
+    record_info['parallelismType'] = reader.read_bits(2)
+    reader.read_bits(6)
+    record_info['chromaFormat'] = reader.read_bits(2)
+    reader.read_bits(5)
+    record_info['bitDepthLumaMinus8'] = reader.read_bits(3)
+    reader.read_bits(5)
+    record_info['bitDepthChromaMinus8'] = reader.read_bits(3)
+    record_info['avgFrameRate'] = reader.read_bits(16)
+    record_info['constantFrameRate'] = reader.read_bits(2)
+    record_info['numTemporalLayers'] = reader.read_bits(3)
+    record_info['temporalIdNested'] = reader.read_bit()
+    record_info['lengthSizeMinusOne'] = reader.read_bits(2)
+
+    arrays = {HEVC_NAL_VPS: [], HEVC_NAL_SPS: [], HEVC_NAL_PPS: []}
+    other_nalus = []
+    num_of_arrays = record_bytes[HEVC_CONFIG_RECORD_FIXED_SIZE - 1]
+    offset = HEVC_CONFIG_RECORD_FIXED_SIZE
+    total = len(record_bytes)
+
+    for _ in range(num_of_arrays):
+        if offset + 3 > total:
+            _report(errors, "Error: Incomplete NALU array header in HEVCDecoderConfigurationRecord.")
+            return None
+        nal_unit_type = record_bytes[offset] & 0x3F
+        num_nalus = (record_bytes[offset + 1] << 8) | record_bytes[offset + 2]
+        offset += 3
+        target = arrays.get(nal_unit_type, other_nalus)
+        for _ in range(num_nalus):
+            if offset + 2 > total:
+                _report(errors, "Error: Incomplete NALU length field in HEVCDecoderConfigurationRecord.")
+                return None
+            nalu_length = (record_bytes[offset] << 8) | record_bytes[offset + 1]
+            offset += 2
+            if offset + nalu_length > total:
+                _report(errors, "Error: Incomplete NALU data in HEVCDecoderConfigurationRecord.")
+                return None
+            target.append(record_bytes[offset : offset + nalu_length])
+            offset += nalu_length
+
+    record_info['vps_nalus'] = arrays[HEVC_NAL_VPS]
+    record_info['sps_nalus'] = arrays[HEVC_NAL_SPS]
+    record_info['pps_nalus'] = arrays[HEVC_NAL_PPS]
+    record_info['other_nalus'] = other_nalus
+    return record_info
+
+
+def parse_hevc_nalu_data(nalu_bytes, length_size=4, errors=None):
+    """
+    从长度前缀格式的 H.265 NALU 序列中切分 NALU (2 字节 NALU header)，并解析其中的 VPS/SPS/PPS。
+    与 parse_nalu_data 一样不拷贝负载，参数集解析结果来自 HEVC_*_CACHE。
+    """
+    splitter = NALU_SPLITTERS.get(length_size)
+    if splitter is None:
+        _report(errors, f"Error: Unsupported NALU length size {length_size}.")
+        return []
+
+    nalu_bytes = memoryview(nalu_bytes)
+    parsed_nalus = []
+
+    for offset, nalu_length in splitter(nalu_bytes, errors):
+        if nalu_length < 2:
+            _report(errors, f"Warning: HEVC NALU at offset {offset} is shorter than its header. Skipping.")
+            continue
+        current_nalu_data = nalu_bytes[offset : offset + nalu_length]
+        header = (current_nalu_data[0] << 8) | current_nalu_data[1]
+        nal_unit_type = (header >> 9) & 0x3F
+        nalu_info = HevcNaluInfo(nal_unit_type, (header >> 3) & 0x3F, header & 0x07, header >> 15,
+                                 offset, nalu_length, current_nalu_data)
+        if PROFILE.enabled:
+            PROFILE.count_nalu('hevc', nal_unit_type, nalu_length)
+
+        parameter_set = _PARAMETER_SET_CACHES.get(nal_unit_type)
+        if parameter_set is not None:
+            cache, field, name = parameter_set
+            parsed = cache.parse(current_nalu_data)
+            if parsed:
+                setattr(nalu_info, field, parsed)
+            else:
+                _report(errors, f"Warning: Invalid {name} NALU at offset {offset}.")
+
+        parsed_nalus.append(nalu_info)
+    return parsed_nalus
+
+
+def parse_hevc_packet(result, payload, context=None, errors=None):
+    """
+    解析 codec_id 12 的 VideoData 中 5 字节头部之后的部分，结果写入 result (VideoTag)。
+    packet type 与 AVC 相同: 0 为 HEVCDecoderConfigurationRecord，1 为 NALU，2 为序列结束。
+    """
+    packet_type = result.avc_packet_type
+    debug = logger.isEnabledFor(logging.DEBUG)
+
+    if packet_type == 0:
+        if debug:
+            logger.debug(f"  - HEVC Sequence Header (HEVCDecoderConfigurationRecord) - Length: {len(payload)} bytes")
+        parsed_config = parse_hevc_decoder_configuration_record(payload, errors)
+        result.hevc_decoder_config_record = parsed_config
+        if parsed_config is None:
+            return
+        if context is not None:
+            context.update_hevc_config(parsed_config)
+        for nal_unit_type, (cache, _, name) in _PARAMETER_SET_CACHES.items():
+            for nalu_data in parsed_config[f'{name.lower()}_nalus']:
+                parsed = cache.parse(nalu_data)
+                if parsed is None:
+                    _report(errors, f"Warning: Invalid {name} in HEVCDecoderConfigurationRecord.")
+                elif debug:
+                    logger.debug(f"    {name} NALU (Length: {len(nalu_data)} bytes): {nalu_data.hex()}")
+                    for k, v in parsed.to_dict().items():
+                        logger.debug(f"        {k}: {v}")
+    elif packet_type == 1:
+        if debug:
+            logger.debug(f"  - HEVC NALU Raw Data - Length: {len(payload)} bytes")
+        length_size = context.nalu_length_size if context is not None else 4
+        result.parsed_nalus = parse_hevc_nalu_data(payload, length_size, errors)
+    elif packet_type == 2:
+        if debug:
+            logger.debug("  - HEVC End of Sequence")
+    else:
+        _report(errors, f"Warning: Unknown HEVC Packet Type: {packet_type}")
@@ -0,0 +1,140 @@
+"""
+解析流水线的分阶段计时 / 计数 (默认关闭)。
+
+    from rtmp_video.profiling import PROFILE
+    PROFILE.enable()
+    ... parse_rtmp_video_data(...) ...
+    print(PROFILE.snapshot())        # dict
+    print(PROFILE.prometheus())      # Prometheus 文本格式
+
+关闭时各埋点只多一次 PROFILE.enabled 的判断；开启后每个阶段多两次 perf_counter_ns() 调用。
+SPS / PPS / slice header 阶段的时间基本都花在 BitReader 上，BitReader 本身不单独计时，
+以免在每次 read_bits 上加开销。
+"""
+import time
+
+perf_counter_ns = time.perf_counter_ns
+
+# 阶段名 -> 说明，顺序即输出顺序
+STAGES = {
+    'video_data': 'parse_rtmp_video_data, whole call',
+    'avc_config': 'AVCDecoderConfigurationRecord',
+    'nalu_split': 'AVCC length-prefix splitting',
+    'annexb_split': 'Annex-B start code search',
+    'sps': 'SPS parsing (cache lookup included)',
+    'pps': 'PPS parsing (cache lookup included)',
+    'slice_header': 'slice header parsing',
+    'hevc': 'HEVC packet parsing',
+}
+
+
+class ParseProfile:
+    """
+    按阶段累计调用次数、纳秒数和处理的字节数，并按 (codec, nal_unit_type) 统计 NALU 个数与字节数。
+    各计数器都只增不减，适合直接作为 Prometheus counter 导出。
+    """
+    def __init__(self):
+        self.enabled = False
+        self.reset()
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def reset(self):
+        self.stage_calls = dict.fromkeys(STAGES, 0)
+        self.stage_ns = dict.fromkeys(STAGES, 0)
+        self.stage_bytes = dict.fromkeys(STAGES, 0)
+        self.nalu_counts = {}
+        self.nalu_bytes = {}
+
+    def add(self, stage, elapsed_ns, size=0):
+        self.stage_calls[stage] += 1
+        self.stage_ns[stage] += elapsed_ns
+        self.stage_bytes[stage] += size
+
+    def count_nalu(self, codec, nal_unit_type, size):
+        key = (codec, nal_unit_type)
+        self.nalu_counts[key] = self.nalu_counts.get(key, 0) + 1
+        self.nalu_bytes[key] = self.nalu_bytes.get(key, 0) + size
+
+    def timed_spans(self, stage, spans):
+        """
+        包装一个产生 (offset, size) 的迭代器，把每次取下一个 span 的耗时记到 stage 上。
+        """
+        spans = iter(spans)
+        while True:
+            start = perf_counter_ns()
+            try:
+                offset, size = next(spans)
+            except StopIteration:
+                self.stage_ns[stage] += perf_counter_ns() - start
+                return
+            self.add(stage, perf_counter_ns() - start, size)
+            yield offset, size
+
+    def snapshot(self):
+        """
+        Returns:
+            dict: 'stages' 为 {阶段: {'calls', 'ns', 'bytes', 'avg_ns'}} (只含调用过的阶段)，
+                  'nalus' 为 {codec: {nal_unit_type: {'count', 'bytes'}}}。
+        """
+        stages = {}
+        for stage in STAGES:
+            calls = self.stage_calls[stage]
+            if calls:
+                stages[stage] = {'calls': calls, 'ns': self.stage_ns[stage], 'bytes': self.stage_bytes[stage],
+                                 'avg_ns': self.stage_ns[stage] // calls}
+        nalus = {}
+        for (codec, nal_unit_type), count in sorted(self.nalu_counts.items()):
+            nalus.setdefault(codec, {})[nal_unit_type] = {
+                'count': count, 'bytes': self.nalu_bytes[(codec, nal_unit_type)]}
+        return {'stages': stages, 'nalus': nalus}
+
+    def prometheus(self, prefix='rtmp_video'):
+        """
+        以 Prometheus 文本格式 (0.0.4) 导出全部计数器。
+        """
+        lines = []
+        def counter(name, help_text, samples):
+            lines.append(f"# HELP {prefix}_{name} {help_text}")
+            lines.append(f"# TYPE {prefix}_{name} counter")
+            for labels, value in samples:
+                label_text = ','.join(f'{k}="{v}"' for k, v in labels)
+                lines.append(f"{prefix}_{name}{{{label_text}}} {value}")
+
+        counter('stage_calls_total', 'Calls per parse stage.',
+                [((('stage', s),), self.stage_calls[s]) for s in STAGES])
+        counter('stage_seconds_total', 'Time spent per parse stage.',
+                [((('stage', s),), f'{self.stage_ns[s] / 1e9:.9f}') for s in STAGES])
+        counter('stage_bytes_total', 'Bytes processed per parse stage.',
+                [((('stage', s),), self.stage_bytes[s]) for s in STAGES])
+        keys = sorted(self.nalu_counts)
+        counter('nalus_total', 'NAL units seen, by codec and nal_unit_type.',
+                [((('codec', c), ('type', t)), self.nalu_counts[(c, t)]) for c, t in keys])
+        counter('nalu_bytes_total', 'NAL unit bytes, by codec and nal_unit_type.',
+                [((('codec', c), ('type', t)), self.nalu_bytes[(c, t)]) for c, t in keys])
+        return '\n'.join(lines) + '\n'
+
+    def format_table(self, wall_ns=None):
+        """
+        生成给人看的分阶段耗时表。wall_ns 为整个运行的墙钟时间，提供时额外给出占比。
+        """
+        snap = self.snapshot()
+        lines = [f"{'stage':<14}{'calls':>10}{'total ms':>12}{'avg ns':>10}{'MB':>10}" + ("  % wall" if wall_ns else "")]
+        for stage, s in snap['stages'].items():
+            line = f"{stage:<14}{s['calls']:>10,}{s['ns'] / 1e6:>12.2f}{s['avg_ns']:>10,}{s['bytes'] / 1e6:>10.2f}"
+            if wall_ns:
+                line += f"{100.0 * s['ns'] / wall_ns:>8.1f}"
+            lines.append(line)
+        if wall_ns:
+            lines.append(f"{'wall':<14}{'':>10}{wall_ns / 1e6:>12.2f}")
+        for codec, types in snap['nalus'].items():
+            lines.append(f"{codec} NALUs: " + ", ".join(
+                f"type {t}: {v['count']:,} ({v['bytes'] / 1e6:.2f} MB)" for t, v in types.items()))
+        return '\n'.join(lines)
+
+
+PROFILE = ParseProfile()
@@ -0,0 +1,379 @@
+from types import MappingProxyType
+
+NALU_TYPE_NAMES = {
+    1: "Coded slice of a non-IDR picture (P/B Frame)",
+    5: "Coded slice of an IDR picture (I Frame)",
+    6: "Supplemental enhancement information (SEI)",
+    7: "Sequence parameter set (SPS)",
+    8: "Picture parameter set (PPS)",
+    9: "Access unit delimiter",
+    10: "End of sequence",
+    11: "End of stream",
+}
+FRAME_TYPE_NAMES = {
+    1: "Keyframe",
+    2: "Interframe (Non-Keyframe)",
+    3: "Disposable Interframe",
+    4: "Generated Keyframe",
+}
+CODEC_ID_NAMES = {
+    7: "AVC (H.264)",
+    12: "HEVC (H.265)",
+}
+
+# 按取值直接下标访问的名称表，解析时不再拼接字符串
+NALU_TYPE_STRS = tuple(NALU_TYPE_NAMES.get(t, f"Unknown ({t})") for t in range(32))
+FRAME_TYPE_STRS = tuple(FRAME_TYPE_NAMES.get(t, f"Unknown ({t})") for t in range(16))
+CODEC_ID_STRS = tuple(CODEC_ID_NAMES.get(c, f"Unknown ({c})") for c in range(16))
+# slice_type 0~4 与 5~9 含义相同 (后者表示整幅图像的 slice 类型一致)
+SLICE_TYPE_STRS = ("P", "B", "I", "SP", "SI") * 2
+
+
+class Record:
+    """
+    解析结果记录的基类，使用 __slots__ 存储字段，避免每条记录一个 dict。
+    未赋值的字段视为不存在，保留了原先 dict 结果里 "可选 key" 的语义。
+    同时提供 r['key'] / r.get('key') 两种兼容旧 dict 用法的访问方式，
+    to_dict() 返回与旧版本相同结构的 dict。
+    """
+    __slots__ = ()
+    _dict_fields = ()
+
+    def __getitem__(self, name):
+        try:
+            return getattr(self, name)
+        except AttributeError:
+            raise KeyError(name) from None
+
+    def get(self, name, default=None):
+        return getattr(self, name, default)
+
+    def __contains__(self, name):
+        return hasattr(self, name)
+
+    def to_dict(self):
+        out = {}
+        for name in self._dict_fields:
+            try:
+                value = getattr(self, name)
+            except AttributeError:
+                continue
+            out[name] = _to_plain(value)
+        return out
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+
+def _to_plain(value):
+    if isinstance(value, Record):
+        return value.to_dict()
+    if isinstance(value, memoryview):
+        # 零拷贝切分出的 NALU / 参数集数据，输出时与旧版本一样给出 bytes
+        return value.tobytes()
+    if isinstance(value, list):
+        return [_to_plain(v) for v in value]
+    if isinstance(value, tuple):
+        return tuple(_to_plain(v) for v in value)
+    if isinstance(value, (dict, MappingProxyType)):
+        return {k: _to_plain(v) for k, v in value.items()}
+    return value
+
+
+class FrozenRecord(Record):
+    """
+    只读记录。用于会被缓存并在多路流之间共享的参数集解析结果。
+    """
+    __slots__ = ()
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is read-only")
+
+    @classmethod
+    def from_dict(cls, info):
+        record = object.__new__(cls)
+        for name, value in info.items():
+            if isinstance(value, dict):
+                value = MappingProxyType(value)
+            object.__setattr__(record, name, value)
+        return record
+
+
+class NaluInfo(Record):
+    __slots__ = ('nalu_type', 'nal_ref_idc', 'forbidden_zero_bit', 'offset', 'size', 'nalu_data',
+                 'parsed_sps_info', 'parsed_pps_info', 'slice_header')
+    _dict_fields = ('nalu_type', 'nalu_type_str', 'nal_ref_idc', 'forbidden_zero_bit', 'offset', 'size',
+                    'nalu_data', 'parsed_sps_info', 'parsed_pps_info', 'slice_header')
+
+    def __init__(self, nalu_type, nal_ref_idc, forbidden_zero_bit, offset, size, nalu_data):
+        self.nalu_type = nalu_type
+        self.nal_ref_idc = nal_ref_idc
+        self.forbidden_zero_bit = forbidden_zero_bit
+        self.offset = offset
+        self.size = size
+        self.nalu_data = nalu_data
+
+    @property
+    def nalu_type_str(self):
+        return NALU_TYPE_STRS[self.nalu_type]
+
+
+class SliceHeader(Record):
+    """
+    H.264 slice header 的开头部分 (到 pic_order_cnt 为止)，足以区分 I/P/B 并做重排分析。
+    """
+    __slots__ = ('first_mb_in_slice', 'slice_type', 'pic_parameter_set_id', 'frame_num', 'field_pic_flag',
+                 'bottom_field_flag', 'idr_pic_id', 'pic_order_cnt_lsb', 'delta_pic_order_cnt_bottom')
+    _dict_fields = ('first_mb_in_slice', 'slice_type', 'slice_type_str') + __slots__[2:]
+
+    def __init__(self, first_mb_in_slice, slice_type, pic_parameter_set_id, frame_num):
+        self.first_mb_in_slice = first_mb_in_slice
+        self.slice_type = slice_type
+        self.pic_parameter_set_id = pic_parameter_set_id
+        self.frame_num = frame_num
+
+    @property
+    def slice_type_str(self):
+        return SLICE_TYPE_STRS[self.slice_type] if self.slice_type < 10 else f"Unknown ({self.slice_type})"
+
+
+class VideoTag(Record):
+    __slots__ = ('frame_type', 'codec_id', 'avc_packet_type', 'composition_time', 'parsed_nalus',
+                 'avc_decoder_config_record', 'hevc_decoder_config_record', 'errors')
+    _dict_fields = ('frame_type', 'codec_id', 'frame_type_str', 'codec_id_str', 'avc_packet_type',
+                    'composition_time', 'parsed_nalus', 'avc_decoder_config_record',
+                    'hevc_decoder_config_record', 'errors')
+
+    def __init__(self, frame_type, codec_id):
+        self.frame_type = frame_type
+        self.codec_id = codec_id
+        self.avc_packet_type = None
+        self.composition_time = None
+        self.parsed_nalus = []
+        self.avc_decoder_config_record = None
+        self.hevc_decoder_config_record = None
+        self.errors = []  # 解析过程中的非致命警告
+
+    @property
+    def frame_type_str(self):
+        return FRAME_TYPE_STRS[self.frame_type]
+
+    @property
+    def codec_id_str(self):
+        return CODEC_ID_STRS[self.codec_id]
+
+
+class SpsInfo(FrozenRecord):
+    __slots__ = (
+        'profile_idc', 'constraint_set0_flag', 'constraint_set1_flag', 'constraint_set2_flag',
+        'constraint_set3_flag', 'constraint_set4_flag', 'constraint_set5_flag', 'reserved_zero_2bits',
+        'level_idc', 'seq_parameter_set_id',
+        'chroma_format_idc', 'separate_colour_plane_flag', 'bit_depth_luma_minus8', 'bit_depth_chroma_minus8',
+        'qpprime_y_zero_transform_bypass_flag', 'seq_scaling_matrix_present_flag',
+        'log2_max_frame_num_minus4', 'pic_order_cnt_type', 'log2_max_pic_order_cnt_lsb_minus4',
+        'delta_pic_order_always_zero_flag', 'offset_for_non_ref_pic', 'offset_for_top_to_bottom_field',
+        'num_ref_frames_in_pic_order_cnt_cycle', 'offset_for_ref_frame', 'scaling_lists',
+        'num_ref_frames', 'gaps_in_frame_num_value_allowed_flag',
+        'pic_width_in_mbs_minus1', 'pic_height_in_map_units_minus1', 'frame_mbs_only_flag',
+        'mb_adaptive_frame_field_flag', 'direct_8x8_inference_flag', 'frame_cropping_flag',
+        'frame_crop_left_offset', 'frame_crop_right_offset', 'frame_crop_top_offset', 'frame_crop_bottom_offset',
+        'vui_parameters_present_flag', 'vui_parameters',
+        'width', 'height', 'cropped_width', 'cropped_height', 'frame_rate',
+    )
+    _dict_fields = __slots__
+
+
+class PpsInfo(FrozenRecord):
+    __slots__ = (
+        'pic_parameter_set_id', 'seq_parameter_set_id', 'entropy_coding_mode_flag',
+        'bottom_field_pic_order_in_frame_present_flag', 'num_slice_groups_minus1',
+        'num_ref_idx_l0_active_minus1', 'num_ref_idx_l1_active_minus1', 'weighted_pred_flag',
+        'weighted_bipred_idc', 'pic_init_qp_minus26', 'pic_init_qs_minus26', 'chroma_qp_index_offset',
+        'deblocking_filter_control_present_flag', 'constrained_intra_pred_flag',
+        'redundant_pic_cnt_present_flag',
+        'slice_group_map_type', 'run_length_minus1', 'top_left', 'bottom_right',
+        'slice_group_change_direction_flag', 'slice_group_change_rate_minus1',
+        'pic_size_in_map_units_minus1', 'slice_group_id',
+        'transform_8x8_mode_flag', 'pic_scaling_matrix_present_flag', 'scaling_lists',
+        'second_chroma_qp_index_offset',
+    )
+    _dict_fields = __slots__
+
+
+HEVC_NALU_TYPE_NAMES = {
+    0: "Coded slice segment of a non-TSA, non-STSA trailing picture (TRAIL_N)",
+    1: "Coded slice segment of a non-TSA, non-STSA trailing picture (TRAIL_R)",
+    2: "Coded slice segment of a TSA picture (TSA_N)",
+    3: "Coded slice segment of a TSA picture (TSA_R)",
+    4: "Coded slice segment of an STSA picture (STSA_N)",
+    5: "Coded slice segment of an STSA picture (STSA_R)",
+    6: "Coded slice segment of a RADL picture (RADL_N)",
+    7: "Coded slice segment of a RADL picture (RADL_R)",
+    8: "Coded slice segment of a RASL picture (RASL_N)",
+    9: "Coded slice segment of a RASL picture (RASL_R)",
+    16: "Coded slice segment of a BLA picture (BLA_W_LP)",
+    17: "Coded slice segment of a BLA picture (BLA_W_RADL)",
+    18: "Coded slice segment of a BLA picture (BLA_N_LP)",
+    19: "Coded slice segment of an IDR picture (IDR_W_RADL)",
+    20: "Coded slice segment of an IDR picture (IDR_N_LP)",
+    21: "Coded slice segment of a CRA picture (CRA_NUT)",
+    32: "Video parameter set (VPS)",
+    33: "Sequence parameter set (SPS)",
+    34: "Picture parameter set (PPS)",
+    35: "Access unit delimiter",
+    36: "End of sequence",
+    37: "End of bitstream",
+    38: "Filler data",
+    39: "Supplemental enhancement information (SEI prefix)",
+    40: "Supplemental enhancement information (SEI suffix)",
+}
+HEVC_NALU_TYPE_STRS = tuple(HEVC_NALU_TYPE_NAMES.get(t, f"Unknown ({t})") for t in range(64))
+
+
+class HevcNaluInfo(Record):
+    __slots__ = ('nalu_type', 'nuh_layer_id', 'nuh_temporal_id_plus1', 'forbidden_zero_bit', 'offset', 'size',
+                 'nalu_data', 'parsed_vps_info', 'parsed_sps_info', 'parsed_pps_info')
+    _dict_fields = ('nalu_type', 'nalu_type_str', 'nuh_layer_id', 'nuh_temporal_id_plus1', 'forbidden_zero_bit',
+                    'offset', 'size', 'nalu_data', 'parsed_vps_info', 'parsed_sps_info', 'parsed_pps_info')
+
+    def __init__(self, nalu_type, nuh_layer_id, nuh_temporal_id_plus1, forbidden_zero_bit, offset, size, nalu_data):
+        self.nalu_type = nalu_type
+        self.nuh_layer_id = nuh_layer_id
+        self.nuh_temporal_id_plus1 = nuh_temporal_id_plus1
+        self.forbidden_zero_bit = forbidden_zero_bit
+        self.offset = offset
+        self.size = size
+        self.nalu_data = nalu_data
+
+    @property
+    def nalu_type_str(self):
+        return HEVC_NALU_TYPE_STRS[self.nalu_type]
+
+
+_HEVC_PROFILE_TIER_LEVEL_FIELDS = (
+    'general_profile_space', 'general_tier_flag', 'general_profile_idc',
+    'general_profile_compatibility_flags', 'general_progressive_source_flag',
+    'general_interlaced_source_flag', 'general_level_idc',
+)
+
+
+class HevcVpsInfo(FrozenRecord):
+    __slots__ = (
+        'vps_video_parameter_set_id', 'vps_base_layer_internal_flag', 'vps_base_layer_available_flag',
+        'vps_max_layers_minus1', 'vps_max_sub_layers_minus1', 'vps_temporal_id_nesting_flag',
+    ) + _HEVC_PROFILE_TIER_LEVEL_FIELDS + (
+        'vps_sub_layer_ordering_info_present_flag', 'vps_max_dec_pic_buffering_minus1',
+        'vps_max_num_reorder_pics', 'vps_max_latency_increase_plus1',
+        'vps_max_layer_id', 'vps_num_layer_sets_minus1', 'vps_timing_info_present_flag',
+        'vps_num_units_in_tick', 'vps_time_scale', 'frame_rate',
+    )
+    _dict_fields = __slots__
+
+
+class HevcSpsInfo(FrozenRecord):
+    __slots__ = (
+        'sps_video_parameter_set_id', 'sps_max_sub_layers_minus1', 'sps_temporal_id_nesting_flag',
+    ) + _HEVC_PROFILE_TIER_LEVEL_FIELDS + (
+        'sps_seq_parameter_set_id', 'chroma_format_idc', 'separate_colour_plane_flag',
+        'pic_width_in_luma_samples', 'pic_height_in_luma_samples', 'conformance_window_flag',
+        'conf_win_left_offset', 'conf_win_right_offset', 'conf_win_top_offset', 'conf_win_bottom_offset',
+        'bit_depth_luma_minus8', 'bit_depth_chroma_minus8', 'log2_max_pic_order_cnt_lsb_minus4',
+        'sps_sub_layer_ordering_info_present_flag', 'sps_max_dec_pic_buffering_minus1',
+        'sps_max_num_reorder_pics', 'sps_max_latency_increase_plus1',
+        'log2_min_luma_coding_block_size_minus3', 'log2_diff_max_min_luma_coding_block_size',
+        'log2_min_luma_transform_block_size_minus2', 'log2_diff_max_min_luma_transform_block_size',
+        'max_transform_hierarchy_depth_inter', 'max_transform_hierarchy_depth_intra',
+        'scaling_list_enabled_flag', 'sps_scaling_list_data_present_flag',
+        'amp_enabled_flag', 'sample_adaptive_offset_enabled_flag', 'pcm_enabled_flag',
+        'num_short_term_ref_pic_sets', 'long_term_ref_pics_present_flag', 'num_long_term_ref_pics_sps',
+        'sps_temporal_mvp_enabled_flag', 'strong_intra_smoothing_enabled_flag',
+        'vui_parameters_present_flag', 'vui_parameters',
+        'width', 'height', 'bit_depth_luma', 'bit_depth_chroma', 'frame_rate',
+    )
+    _dict_fields = __slots__
+
+
+class HevcPpsInfo(FrozenRecord):
+    __slots__ = (
+        'pps_pic_parameter_set_id', 'pps_seq_parameter_set_id', 'dependent_slice_segments_enabled_flag',
+        'output_flag_present_flag', 'num_extra_slice_header_bits', 'sign_data_hiding_enabled_flag',
+        'cabac_init_present_flag', 'num_ref_idx_l0_default_active_minus1', 'num_ref_idx_l1_default_active_minus1',
+        'init_qp_minus26', 'constrained_intra_pred_flag', 'transform_skip_enabled_flag',
+        'cu_qp_delta_enabled_flag', 'diff_cu_qp_delta_depth', 'pps_cb_qp_offset', 'pps_cr_qp_offset',
+        'pps_slice_chroma_qp_offsets_present_flag', 'weighted_pred_flag', 'weighted_bipred_flag',
+        'transquant_bypass_enabled_flag', 'tiles_enabled_flag', 'entropy_coding_sync_enabled_flag',
+    )
+    _dict_fields = __slots__
+
+
+SOUND_FORMAT_NAMES = {
+    0: "Linear PCM, platform endian",
+    1: "ADPCM",
+    2: "MP3",
+    3: "Linear PCM, little endian",
+    4: "Nellymoser 16 kHz mono",
+    5: "Nellymoser 8 kHz mono",
+    6: "Nellymoser",
+    7: "G.711 A-law",
+    8: "G.711 mu-law",
+    10: "AAC",
+    11: "Speex",
+    14: "MP3 8 kHz",
+    15: "Device-specific sound",
+}
+SOUND_FORMAT_STRS = tuple(SOUND_FORMAT_NAMES.get(f, f"Unknown ({f})") for f in range(16))
+
+
+class AudioTag(Record):
+    """
+    RTMP AudioData / FLV 音频 tag 的解析结果。
+    sound_rate / sound_size / sound_type 是 tag 头里的原始标志位；AAC 的实际采样率和声道数以
+    AudioSpecificConfig 为准，解析器会把它们填到 sample_rate / channels。
+    """
+    __slots__ = ('sound_format', 'sound_rate', 'sound_size', 'sound_type', 'aac_packet_type',
+                 'audio_specific_config', 'sample_rate', 'channels', 'samples', 'frame_size', 'errors')
+    _dict_fields = ('sound_format', 'sound_format_str', 'sound_rate', 'sound_size', 'sound_type', 'aac_packet_type',
+                    'audio_specific_config', 'sample_rate', 'channels', 'samples', 'frame_size', 'errors')
+
+    def __init__(self, sound_format, sound_rate, sound_size, sound_type):
+        self.sound_format = sound_format
+        self.sound_rate = sound_rate
+        self.sound_size = sound_size
+        self.sound_type = sound_type
+        self.aac_packet_type = None
+        self.audio_specific_config = None
+        self.sample_rate = None
+        self.channels = None
+        self.samples = None     # 这一帧的采样数 (每声道)，已知时才有
+        self.frame_size = 0     # 音频负载字节数 (不含 tag 头)
+        self.errors = []
+
+    @property
+    def sound_format_str(self):
+        return SOUND_FORMAT_STRS[self.sound_format]
+
+
+class AacConfig(FrozenRecord):
+    """
+    AudioSpecificConfig (ISO/IEC 14496-3 1.6.2.1) 中与时间轴相关的字段。
+    HE-AAC (SBR / PS) 时 sample_rate / samples_per_frame 为解码输出的采样率和每帧采样数。
+    """
+    __slots__ = ('audio_object_type', 'sampling_frequency_index', 'sampling_frequency', 'channel_configuration',
+                 'frame_length_flag', 'depends_on_core_coder', 'extension_flag',
+                 'extension_audio_object_type', 'extension_sampling_frequency', 'sbr_present', 'ps_present',
+                 'sample_rate', 'samples_per_frame')
+    _dict_fields = __slots__
+
+
+class ScriptTag(Record):
+    """
+    脚本数据 tag (AMF0)，例如 onMetaData。'@setDataFrame' 前缀已去掉。
+    """
+    __slots__ = ('name', 'value', 'values', 'errors')
+    _dict_fields = __slots__
+
+    def __init__(self, name, value, values):
+        self.name = name        # 第一个值 (通常是字符串，如 'onMetaData')
+        self.value = value      # 第二个值 (onMetaData 的属性 dict)，没有时为 None
+        self.values = values    # 全部解码出的值
+        self.errors = []
@@ -0,0 +1,462 @@
+"""
+把解析过的 RTMP/FLV 音视频 tag 重新封装成 Annex-B 裸流 (.h264 / .h265) 或 MPEG-TS，不经过 ffmpeg。
+
+    with AnnexBWriter(open('out.h264', 'wb')) as writer:
+        for tag, parsed in parse_flv_file('capture.flv'):
+            writer.write_video(parsed)
+
+Annex-B: 每个 NALU 前加 4 字节起始码，IDR (HEVC 为 IRAP) 所在的访问单元如果没有带内参数集，
+在第一个 slice 之前插入 sequence header 里的 SPS/PPS (HEVC 还有 VPS)。
+输出不拷贝 NALU：起始码和 NALU memoryview 作为 iovec 攒起来，超过 flush_bytes 后一次 os.writev。
+
+MPEG-TS: 视频 PID 0x100 (H.264 / H.265)，音频 PID 0x101 (AAC，加 ADTS 头)，
+每个关键帧前重复 PAT/PMT，视频 PES 带 PCR。TS 包直接写进预分配的输出缓冲区，满了才写文件。
+"""
+import os
+import struct
+
+from .audio import AAC_RAW, AAC_SEQUENCE_HEADER, SOUND_FORMAT_AAC
+
+ANNEXB_START_CODE_4 = b'\x00\x00\x00\x01'
+try:
+    IOV_MAX = os.sysconf('SC_IOV_MAX')
+except (AttributeError, ValueError, OSError):
+    IOV_MAX = 1024
+DEFAULT_FLUSH_BYTES = 1 << 20
+
+H264_NAL_IDR = 5
+H264_NAL_SPS = 7
+H264_NAL_PPS = 8
+H264_NAL_AUD = 9
+HEVC_NAL_IRAP = range(16, 24)
+HEVC_NAL_VPS = 32
+HEVC_NAL_SPS = 33
+HEVC_NAL_PPS = 34
+HEVC_NAL_AUD = 35
+
+TS_PACKET_SIZE = 188
+TS_PAYLOAD_SIZE = 184
+TS_PID_PAT = 0x0000
+TS_PID_PMT = 0x1000
+TS_PID_VIDEO = 0x0100
+TS_PID_AUDIO = 0x0101
+
+TS_STREAM_TYPE_H264 = 0x1B
+TS_STREAM_TYPE_HEVC = 0x24
+TS_STREAM_TYPE_AAC = 0x0F
+TS_CLOCK_OFFSET = 90000 # PTS/DTS 整体加 1 秒，避免 CTS 为负或 PCR 早于 DTS 时出现负值
+TS_BUFFER_PACKETS = 5577 # 预分配的输出缓冲区约 1 MB (TS 包大小的整数倍)
+
+_pack_u16 = struct.Struct('>H').pack
+_FULL_PACKET = struct.Struct(f'>4s{TS_PAYLOAD_SIZE}s') # 满包: 4 字节包头 + 184 字节负载
+
+
+class _IovecWriter:
+    """
+    攒 iovec 批量写出。buffers 只保存引用，调用方在 flush 之前不能修改它们的内容。
+    文件对象没有 fileno (例如 BytesIO) 或平台没有 os.writev 时退化为 join 后 write。
+    """
+    def __init__(self, out, flush_bytes=DEFAULT_FLUSH_BYTES):
+        self.out = out
+        self.flush_bytes = flush_bytes
+        self.bytes_written = 0
+        self._iov = []
+        self._pending = 0
+        try:
+            self._fd = out.fileno() if hasattr(os, 'writev') else None
+        except (AttributeError, OSError, ValueError):
+            self._fd = None
+        if self._fd is not None:
+            out.flush() # 之前经 Python 缓冲写入的内容要先落盘，保证顺序
+
+    def add(self, buf):
+        self._iov.append(buf)
+        self._pending += len(buf)
+        if self._pending >= self.flush_bytes or len(self._iov) >= IOV_MAX:
+            self.flush()
+
+    def flush(self):
+        iov = self._iov
+        if not iov:
+            return
+        if self._fd is None:
+            self.out.write(b''.join(iov))
+        else:
+            remaining = self._pending
+            while iov:
+                written = os.writev(self._fd, iov)
+                remaining -= written
+                if not remaining:
+                    break
+                # 部分写入: 跳过已写完的 iovec，截掉写了一半的那个
+                while written >= len(iov[0]):
+                    written -= len(iov[0])
+                    iov = iov[1:]
+                if written:
+                    iov = [memoryview(iov[0])[written:]] + iov[1:]
+        self.bytes_written += self._pending
+        self._iov = []
+        self._pending = 0
+
+
+def _parameter_sets(parsed):
+    """
+    从 sequence header 的解析结果中取出参数集 NALU (bytes)，按 VPS / SPS / PPS 的顺序。
+    """
+    record = parsed.avc_decoder_config_record or parsed.hevc_decoder_config_record
+    if not record:
+        return None
+    names = ('vps_nalus', 'sps_nalus', 'pps_nalus') if parsed.hevc_decoder_config_record else ('sps_nalus', 'pps_nalus')
+    return [bytes(nalu) for name in names for nalu in record.get(name, ())]
+
+
+class _AccessUnitBuilder:
+    """
+    把一个 VideoTag 的 NALU 组装成 Annex-B 访问单元 (起始码 + NALU 片段的列表)，需要时插入参数集。
+    AnnexBWriter 和 TsWriter 共用。
+    """
+    def __init__(self):
+        self.parameter_sets = None
+        self.hevc = False
+
+    def on_sequence_header(self, parsed):
+        parameter_sets = _parameter_sets(parsed)
+        if parameter_sets:
+            self.parameter_sets = parameter_sets
+            self.hevc = parsed.hevc_decoder_config_record is not None
+
+    def pieces(self, parsed):
+        """
+        Returns:
+            (list, bool): (按顺序拼接即为访问单元的 bytes / memoryview 片段, 是否为关键帧访问单元)
+        """
+        nalus = parsed.parsed_nalus
+        if self.hevc:
+            param_types, random_access, aud_type = (HEVC_NAL_VPS, HEVC_NAL_SPS, HEVC_NAL_PPS), HEVC_NAL_IRAP, HEVC_NAL_AUD
+        else:
+            param_types, random_access, aud_type = (H264_NAL_SPS, H264_NAL_PPS), (H264_NAL_IDR,), H264_NAL_AUD
+        keyframe = any(n.nalu_type in random_access for n in nalus)
+        insert = keyframe and self.parameter_sets and not any(n.nalu_type in param_types for n in nalus)
+
+        pieces = []
+        for nalu in nalus:
+            if insert and nalu.nalu_type != aud_type:
+                # 参数集放在 AUD 之后、第一个其他 NALU 之前
+                for parameter_set in self.parameter_sets:
+                    pieces.append(ANNEXB_START_CODE_4)
+                    pieces.append(parameter_set)
+                insert = False
+            pieces.append(ANNEXB_START_CODE_4)
+            pieces.append(nalu.nalu_data)
+        return pieces, keyframe or parsed.frame_type == 1
+
+
+class AnnexBWriter:
+    """
+    Annex-B 裸流输出。
+    Args:
+        out: 以二进制写模式打开的文件对象。
+        flush_bytes (int): 攒够这么多字节才调用一次 os.writev。
+    """
+    def __init__(self, out, flush_bytes=DEFAULT_FLUSH_BYTES):
+        self._writer = _IovecWriter(out, flush_bytes)
+        self._builder = _AccessUnitBuilder()
+        self.access_units = 0
+        self.inserted_parameter_sets = 0
+
+    @property
+    def bytes_written(self):
+        return self._writer.bytes_written + self._writer._pending
+
+    def write_video(self, parsed):
+        """
+        Args:
+            parsed (VideoTag): parse_rtmp_video_data 的结果 (AVC 或 HEVC)。其余类型忽略。
+        """
+        if parsed is None or parsed.avc_packet_type is None:
+            return
+        if parsed.avc_packet_type == 0:
+            self._builder.on_sequence_header(parsed)
+            return
+        if parsed.avc_packet_type != 1 or not parsed.parsed_nalus:
+            return
+        pieces, _ = self._builder.pieces(parsed)
+        if len(pieces) > 2 * len(parsed.parsed_nalus):
+            self.inserted_parameter_sets += 1
+        add = self._writer.add
+        for piece in pieces:
+            add(piece)
+        self.access_units += 1
+
+    def flush(self):
+        self._writer.flush()
+
+    def close(self):
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+        self._writer.out.close()
+
+
+def _crc32_mpeg2_table():
+    table = []
+    for i in range(256):
+        crc = i << 24
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0x04C11DB7) if crc & 0x80000000 else (crc << 1)
+        table.append(crc & 0xFFFFFFFF)
+    return table
+
+_CRC32_MPEG2_TABLE = _crc32_mpeg2_table()
+
+def crc32_mpeg2(data):
+    crc = 0xFFFFFFFF
+    for byte in data:
+        crc = ((crc << 8) & 0xFFFFFFFF) ^ _CRC32_MPEG2_TABLE[(crc >> 24) ^ byte]
+    return crc
+
+
+def _psi_packet(pid, table_id, table_id_extension, body):
+    """
+    生成一个只含单个 section 的 PSI TS 包 (不含 continuity counter，写出时再填)。
+    """
+    section = bytes([table_id]) + _pack_u16(0xB000 | (len(body) + 9)) + _pack_u16(table_id_extension) + \
+        b'\xc1\x00\x00' + body
+    section += struct.pack('>I', crc32_mpeg2(section))
+    payload = b'\x00' + section # pointer_field
+    return bytearray(bytes([0x47, 0x40 | (pid >> 8), pid & 0xFF, 0x10]) + payload +
+                     b'\xff' * (TS_PAYLOAD_SIZE - len(payload)))
+
+
+def _encode_timestamp(marker, value):
+    # 33 位 PTS/DTS 分三段，每段后跟 marker bit
+    value &= 0x1FFFFFFFF
+    return bytes([(marker << 4) | ((value >> 29) & 0x0E) | 1,
+                  (value >> 22) & 0xFF, ((value >> 14) & 0xFE) | 1,
+                  (value >> 7) & 0xFF, ((value << 1) & 0xFE) | 1])
+
+
+def _pes_header(stream_id, pts, dts, payload_size):
+    if dts is None or dts == pts:
+        optional = b'\x80\x05' + _encode_timestamp(0x2, pts)
+    else:
+        optional = b'\xc0\x0a' + _encode_timestamp(0x3, pts) + _encode_timestamp(0x1, dts)
+    # 视频 PES 长度超过 65535 时按规范写 0 (不限长度)
+    length = 3 + len(optional) - 2 + payload_size
+    if stream_id >= 0xE0 and length > 0xFFFF:
+        length = 0
+    return b'\x00\x00\x01' + bytes([stream_id]) + _pack_u16(length) + b'\x84' + optional
+
+
+def _adts_header(config, frame_size):
+    # protection_absent = 1，没有 CRC；profile 取 core object type (HE-AAC 时为 LC)
+    length = frame_size + 7
+    profile = min(config.audio_object_type, 4) - 1
+    channels = config.channel_configuration
+    return bytes([0xFF, 0xF1,
+                  (profile << 6) | (config.sampling_frequency_index << 2) | (channels >> 2),
+                  ((channels & 0x03) << 6) | (length >> 11),
+                  (length >> 3) & 0xFF,
+                  ((length & 0x07) << 5) | 0x1F,
+                  0xFC])
+
+
+class TsWriter:
+    """
+    MPEG-TS 输出。TS 包写进预分配的 bytearray，写满 (约 1 MB) 后整块写出。
+    Args:
+        out: 以二进制写模式打开的文件对象。
+        buffer_packets (int): 输出缓冲区能容纳的 TS 包个数。
+    """
+    def __init__(self, out, buffer_packets=TS_BUFFER_PACKETS):
+        self.out = out
+        self._buffer = bytearray(buffer_packets * TS_PACKET_SIZE)
+        self._view = memoryview(self._buffer)
+        self._pos = 0
+        self._builder = _AccessUnitBuilder()
+        self._au = bytearray() # 复用的访问单元缓冲区
+        self._continuity = {}
+        self._packet_headers = {}
+        self._psi = None
+        self._video_stream_type = None
+        self.aac_config = None
+        self.bytes_written = 0
+        self.packets = 0
+        self.video_frames = 0
+        self.audio_frames = 0
+
+    # --- PSI ---
+    def _build_psi(self):
+        pat = _psi_packet(TS_PID_PAT, 0x00, 1, _pack_u16(1) + _pack_u16(0xE000 | TS_PID_PMT))
+        streams = b''
+        if self._video_stream_type is not None:
+            streams += bytes([self._video_stream_type]) + _pack_u16(0xE000 | TS_PID_VIDEO) + b'\xf0\x00'
+        if self.aac_config is not None:
+            streams += bytes([TS_STREAM_TYPE_AAC]) + _pack_u16(0xE000 | TS_PID_AUDIO) + b'\xf0\x00'
+        pcr_pid = TS_PID_VIDEO if self._video_stream_type is not None else TS_PID_AUDIO
+        pmt = _psi_packet(TS_PID_PMT, 0x02, 1, _pack_u16(0xE000 | pcr_pid) + b'\xf0\x00' + streams)
+        self._psi = (pat, pmt)
+
+    def _write_psi(self):
+        if self._psi is None:
+            self._build_psi()
+        for packet in self._psi:
+            pid = ((packet[1] & 0x1F) << 8) | packet[2]
+            counter = self._continuity.get(pid, 0)
+            packet[3] = 0x10 | counter
+            self._continuity[pid] = (counter + 1) & 0x0F
+            self._reserve()
+            self._buffer[self._pos : self._pos + TS_PACKET_SIZE] = packet
+            self._pos += TS_PACKET_SIZE
+            self.packets += 1
+
+    # --- 输出缓冲 ---
+    def _reserve(self):
+        if self._pos + TS_PACKET_SIZE > len(self._buffer):
+            self.flush()
+
+    def flush(self):
+        if self._pos:
+            self.out.write(self._view[:self._pos])
+            self.bytes_written += self._pos
+            self._pos = 0
+
+    def close(self):
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+        self._view.release()
+        self.out.close()
+
+    # --- PES 打包 ---
+    def _put_packet(self, pid, start, counter, adaptation, header, data):
+        """
+        写一个 TS 包: header 和 data 依次作为负载，不足 184 字节时在 adaptation field 里填充。
+        """
+        stuffing = TS_PAYLOAD_SIZE - len(adaptation) - len(header) - len(data)
+        if stuffing:
+            if adaptation:
+                adaptation = bytes([adaptation[0] + stuffing]) + adaptation[1:] + b'\xff' * stuffing
+            elif stuffing == 1:
+                adaptation = b'\x00'
+            else:
+                adaptation = bytes([stuffing - 1, 0x00]) + b'\xff' * (stuffing - 2)
+        self._reserve()
+        pos = self._pos
+        self._buffer[pos : pos + TS_PACKET_SIZE] = b''.join((
+            bytes([0x47, start | (pid >> 8), pid & 0xFF, (0x30 if adaptation else 0x10) | counter]),
+            adaptation, header, data))
+        self._pos = pos + TS_PACKET_SIZE
+        self.packets += 1
+        return (counter + 1) & 0x0F
+
+    def _write_pes(self, pid, header, payload, pcr=None):
+        """
+        把 header + payload 切成 TS 包写进输出缓冲区。payload 为 bytes / bytearray / memoryview。
+        第一个包带 payload_unit_start_indicator (和可选的 PCR)，最后一个包不满时用 adaptation field 填充。
+        中间的满包每个只做一次 pack_into，包头按 continuity counter 预先生成。
+        """
+        # struct 的 's' 只接受 bytes：整体复制一次 (memcpy)，比逐包切 memoryview 再赋值快一倍多
+        payload = bytes(payload)
+        size = len(payload)
+        counter = self._continuity.get(pid, 0)
+
+        adaptation = b''
+        if pcr is not None:
+            base, extension = pcr // 300, pcr % 300
+            adaptation = b'\x07\x10' + struct.pack('>IH', (base >> 1) & 0xFFFFFFFF,
+                                                   ((base & 1) << 15) | 0x7E00 | extension)
+        offset = min(size, TS_PAYLOAD_SIZE - len(adaptation) - len(header))
+        counter = self._put_packet(pid, 0x40, counter, adaptation, header, payload[:offset])
+
+        headers = self._packet_headers.get(pid)
+        if headers is None:
+            headers = self._packet_headers[pid] = [bytes([0x47, pid >> 8, pid & 0xFF, 0x10 | c]) for c in range(16)]
+        buffer = self._buffer
+        pack_packet = _FULL_PACKET.pack_into
+        full = (size - offset) // TS_PAYLOAD_SIZE
+        while full:
+            pos = self._pos
+            batch = min(full, (len(buffer) - pos) // TS_PACKET_SIZE)
+            if not batch:
+                self.flush()
+                continue
+            for _ in range(batch):
+                pack_packet(buffer, pos, headers[counter], payload[offset : offset + TS_PAYLOAD_SIZE])
+                pos += TS_PACKET_SIZE
+                offset += TS_PAYLOAD_SIZE
+                counter = (counter + 1) & 0x0F
+            self._pos = pos
+            self.packets += batch
+            full -= batch
+
+        if offset < size:
+            counter = self._put_packet(pid, 0, counter, b'', b'', payload[offset:])
+        self._continuity[pid] = counter
+        return len(header) + size
+
+    def write_video(self, timestamp, parsed):
+        """
+        Args:
+            timestamp (int): tag 时间戳 (ms，DTS)。
+            parsed (VideoTag): parse_rtmp_video_data 的结果。
+        """
+        if parsed is None or parsed.avc_packet_type is None:
+            return
+        if parsed.avc_packet_type == 0:
+            self._builder.on_sequence_header(parsed)
+            stream_type = TS_STREAM_TYPE_HEVC if self._builder.hevc else TS_STREAM_TYPE_H264
+            if stream_type != self._video_stream_type:
+                self._video_stream_type = stream_type
+                self._psi = None
+            return
+        if parsed.avc_packet_type != 1 or not parsed.parsed_nalus or self._video_stream_type is None:
+            return
+        pieces, keyframe = self._builder.pieces(parsed)
+        au = self._au
+        au.clear()
+        for piece in pieces:
+            au += piece
+        if keyframe or self._psi is None:
+            self._write_psi()
+        dts = timestamp * 90 + TS_CLOCK_OFFSET
+        pts = dts + (parsed.composition_time or 0) * 90
+        header = _pes_header(0xE0, pts, dts, len(au))
+        self._write_pes(TS_PID_VIDEO, header, au, pcr=(dts - TS_CLOCK_OFFSET // 2) * 300)
+        self.video_frames += 1
+
+    def write_audio(self, timestamp, parsed, audio_data_bytes):
+        """
+        Args:
+            timestamp (int): tag 时间戳 (ms)。
+            parsed (AudioTag): parse_rtmp_audio_data 的结果。只处理 AAC。
+            audio_data_bytes (bytes | memoryview): 该 tag 的 AudioData (含 2 字节 AAC 头)。
+        """
+        if parsed is None or parsed.sound_format != SOUND_FORMAT_AAC:
+            return
+        if parsed.aac_packet_type == AAC_SEQUENCE_HEADER:
+            if parsed.audio_specific_config is not None and parsed.audio_specific_config != self.aac_config:
+                had_audio = self.aac_config is not None
+                self.aac_config = parsed.audio_specific_config
+                if not had_audio:
+                    self._psi = None
+            return
+        if parsed.aac_packet_type != AAC_RAW or self.aac_config is None:
+            return
+        if self._psi is None:
+            self._write_psi()
+        raw = memoryview(audio_data_bytes)[2:]
+        adts = _adts_header(self.aac_config, len(raw))
+        pts = timestamp * 90 + TS_CLOCK_OFFSET
+        header = _pes_header(0xC0, pts, None, len(adts) + len(raw)) + adts
+        pcr = None if self._video_stream_type is not None else (pts - TS_CLOCK_OFFSET // 2) * 300
+        self._write_pes(TS_PID_AUDIO, header, raw, pcr=pcr)
+        self.audio_frames += 1
@@ -0,0 +1,46 @@
+"""
+FLV 脚本数据 tag / RTMP 数据消息 (AMF0) 的解析，主要是 onMetaData。
+"""
+from .amf0 import AMF0Error, decode_amf0
+from .records import ScriptTag
+
+
+def parse_script_data(script_data_bytes):
+    """
+    Args:
+        script_data_bytes (bytes | memoryview): 脚本 tag body 或 RTMP type 18 消息负载。
+    Returns:
+        ScriptTag: 解析结果；AMF0 解码失败时 values 为已解出的部分，错误记在 errors 里。
+    """
+    data = memoryview(script_data_bytes)
+    values = []
+    error = None
+    offset = 0
+    # 逐个解码，出错时保留前面已经解出的值 (例如 onMetaData 后面跟了几个垃圾字节)
+    while offset < len(data):
+        try:
+            value, offset = decode_amf0(data, offset)
+        except AMF0Error as e:
+            error = f"Warning: Bad AMF0 script data: {e}"
+            break
+        values.append(value)
+    # RTMP 推流时元数据以 @setDataFrame 包装，写进 FLV 时被去掉
+    if values and values[0] == '@setDataFrame':
+        values = values[1:]
+    result = ScriptTag(values[0] if values else None, values[1] if len(values) > 1 else None, values)
+    if error is not None:
+        result.errors.append(error)
+    return result
+
+
+def metadata_value(metadata, *names):
+    """
+    取 onMetaData 里第一个存在且为数值的属性 (不同编码器用的名字不同，如 framerate / videoframerate)。
+    """
+    if not isinstance(metadata, dict):
+        return None
+    for name in names:
+        value = metadata.get(name)
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return value
+    return None
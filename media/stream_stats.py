@@ -0,0 +1,353 @@
+"""
+视频流的列式统计：解析时把每个视频 tag 的时间戳、大小、帧类型、composition_time
+以及每个 NALU 的类型和大小追加到 array.array 中 (每帧十几个字节，不保留解析结果对象)，
+统计时零拷贝转成 NumPy 数组，用 diff / bincount / percentile 一次性算出
+GOP、关键帧间隔、逐秒码率、NALU 大小分布和 CTS 抖动。
+同一遍读取中也收集音频 tag (AAC 每帧采样数) 和 onMetaData，算出音视频时间戳偏移 / 漂移、
+音频时钟漂移，以及元数据声明值与实际值的不一致。
+
+用法: python stream_stats.py capture.flv [capture2.flv ...]
+
+收集部分只用标准库；计算部分需要 numpy (pip install numpy)，在 compute() 时才导入。
+"""
+import argparse
+import json
+import sys
+from array import array
+
+from rtmp_video.flv import FLV_TAG_AUDIO, FLV_TAG_SCRIPT, FLV_TAG_TYPES, FLV_TAG_VIDEO, parse_flv_file
+from rtmp_video.h264 import SPS_CACHE
+from rtmp_video.script import metadata_value
+
+PERCENTILES = (50, 90, 99)
+# 元数据与实际值的相对误差超过这些比例才算不一致
+FPS_TOLERANCE = 0.05
+BITRATE_TOLERANCE = 0.25
+DURATION_TOLERANCE = 0.02
+
+
+def _numpy():
+    try:
+        import numpy
+    except ImportError:
+        raise ImportError("stream_stats.compute() requires numpy (pip install numpy)") from None
+    return numpy
+
+
+class StreamStatsCollector:
+    """
+    逐 tag 收集列数据。每一列是一个 array.array，第 i 项对应第 i 个视频 tag。
+    Args:
+        collect_nalus (bool): 是否记录每个 NALU 的类型与大小 (NALU 大小分布需要)。
+    """
+    def __init__(self, collect_nalus=True):
+        self.timestamps = array('I')
+        self.sizes = array('I')
+        self.frame_types = array('B')
+        self.packet_types = array('B') # 255 表示非 AVC/HEVC 或解析失败
+        self.composition_times = array('i')
+        self.collect_nalus = collect_nalus
+        self.nalu_types = array('B')
+        self.nalu_sizes = array('I')
+        self.width = self.height = None  # 最近一个 sequence header 的分辨率
+        self.codec_id = None
+        # 音频列: 每个音频帧 (不含 AAC sequence header) 一项
+        self.audio_timestamps = array('I')
+        self.audio_sizes = array('I')
+        self.audio_samples = array('I')      # 每帧采样数，未知为 0
+        self.audio_video_ts = array('q')     # 该音频帧之前最近一个视频帧的时间戳，之前没有视频时为 -1
+        self.audio_format = None
+        self.audio_sample_rate = None
+        self.audio_channels = None
+        self.audio_config_changes = 0
+        self.metadata = None
+        self._last_video_ts = -1
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    def add(self, timestamp, size, parsed):
+        """
+        Args:
+            timestamp (int): tag 时间戳 (ms，即 DTS)。
+            size (int): VideoData body 字节数。
+            parsed (VideoTag | None): parse_rtmp_video_data 的结果。
+        """
+        self.timestamps.append(timestamp & 0xFFFFFFFF)
+        self.sizes.append(size)
+        if parsed is None:
+            self.frame_types.append(0)
+            self.packet_types.append(255)
+            self.composition_times.append(0)
+            return
+        packet_type = parsed.avc_packet_type
+        self.frame_types.append(parsed.frame_type)
+        self.packet_types.append(packet_type if packet_type is not None else 255)
+        self.composition_times.append(parsed.composition_time or 0)
+        self.codec_id = parsed.codec_id
+        if packet_type == 1:
+            self._last_video_ts = timestamp & 0xFFFFFFFF
+        elif packet_type == 0:
+            self._on_sequence_header(parsed)
+        if self.collect_nalus and parsed.parsed_nalus:
+            for nalu in parsed.parsed_nalus:
+                self.nalu_types.append(nalu.nalu_type)
+                self.nalu_sizes.append(nalu.size)
+
+    def _on_sequence_header(self, parsed):
+        size = None
+        if parsed.avc_decoder_config_record and parsed.avc_decoder_config_record['sps_nalus']:
+            sps = SPS_CACHE.parse(parsed.avc_decoder_config_record['sps_nalus'][0])
+            size = (sps.cropped_width, sps.cropped_height) if sps is not None else None
+        elif parsed.hevc_decoder_config_record and parsed.hevc_decoder_config_record['sps_nalus']:
+            from rtmp_video.hevc import HEVC_SPS_CACHE
+            sps = HEVC_SPS_CACHE.parse(parsed.hevc_decoder_config_record['sps_nalus'][0])
+            size = (sps.width, sps.height) if sps is not None else None
+        if size is not None:
+            self.width, self.height = size
+
+    def add_audio(self, timestamp, size, parsed):
+        """
+        Args:
+            timestamp (int): tag 时间戳 (ms)。
+            size (int): AudioData body 字节数。
+            parsed (AudioTag | None): parse_rtmp_audio_data 的结果。
+        """
+        if parsed is None:
+            return
+        if parsed.aac_packet_type == 0:
+            if parsed.audio_specific_config is not None:
+                if self.audio_sample_rate is not None and (
+                        parsed.sample_rate, parsed.channels) != (self.audio_sample_rate, self.audio_channels):
+                    self.audio_config_changes += 1
+                self.audio_sample_rate = parsed.sample_rate
+                self.audio_channels = parsed.channels
+            self.audio_format = parsed.sound_format
+            return
+        self.audio_format = parsed.sound_format
+        if parsed.sample_rate is not None:
+            self.audio_sample_rate = parsed.sample_rate
+            self.audio_channels = parsed.channels
+        self.audio_timestamps.append(timestamp & 0xFFFFFFFF)
+        self.audio_sizes.append(size)
+        self.audio_samples.append(parsed.samples or 0)
+        self.audio_video_ts.append(self._last_video_ts)
+
+    def add_script(self, parsed):
+        if self.metadata is None and parsed.name == 'onMetaData' and isinstance(parsed.value, dict):
+            self.metadata = parsed.value
+
+    def add_flv_file(self, path):
+        for tag, parsed in parse_flv_file(path, FLV_TAG_TYPES):
+            if tag is None:
+                self.add(0, 0, parsed)
+            elif tag['tag_type'] == FLV_TAG_VIDEO:
+                self.add(tag['timestamp'], tag['data_size'], parsed)
+            elif tag['tag_type'] == FLV_TAG_AUDIO:
+                self.add_audio(tag['timestamp'], tag['data_size'], parsed)
+            elif tag['tag_type'] == FLV_TAG_SCRIPT:
+                self.add_script(parsed)
+
+    def columns(self):
+        """
+        返回各列的 NumPy 数组。除 timestamps 转为 int64 (避免相减时无符号下溢) 外，都是与 array 共享内存的视图。
+        """
+        np = _numpy()
+        return {
+            'timestamps': np.frombuffer(self.timestamps, dtype=np.uintc).astype(np.int64),
+            'sizes': np.frombuffer(self.sizes, dtype=np.uintc),
+            'frame_types': np.frombuffer(self.frame_types, dtype=np.uint8),
+            'packet_types': np.frombuffer(self.packet_types, dtype=np.uint8),
+            'composition_times': np.frombuffer(self.composition_times, dtype=np.intc),
+            'nalu_types': np.frombuffer(self.nalu_types, dtype=np.uint8),
+            'nalu_sizes': np.frombuffer(self.nalu_sizes, dtype=np.uintc),
+            'audio_timestamps': np.frombuffer(self.audio_timestamps, dtype=np.uintc).astype(np.int64),
+            'audio_sizes': np.frombuffer(self.audio_sizes, dtype=np.uintc),
+            'audio_samples': np.frombuffer(self.audio_samples, dtype=np.uintc),
+            'audio_video_ts': np.frombuffer(self.audio_video_ts, dtype=np.int64),
+        }
+
+    def compute(self):
+        """
+        计算统计结果。
+        Returns:
+            dict: 'frames' / 'gop' / 'keyframe_interval_ms' / 'bitrate_bps' / 'nalu_sizes' / 'cts' /
+                  'audio' / 'av_sync' / 'metadata_mismatches'，
+                  数值均为 Python int/float，可直接 json.dumps。没有数据的部分为 None。
+        """
+        np = _numpy()
+        c = self.columns()
+        frames = c['packet_types'] == 1
+        ts = c['timestamps'][frames]
+        sizes = c['sizes'][frames]
+        keyframe_mask = c['frame_types'][frames] == 1
+        cts = c['composition_times'][frames].astype(np.int64)
+
+        result = {
+            'video_tags': len(self),
+            'frames': int(frames.sum()),
+            'keyframes': int(keyframe_mask.sum()),
+            'sequence_headers': int((c['packet_types'] == 0).sum()),
+            'duration_ms': int(ts[-1] - ts[0]) if len(ts) > 1 else None,
+            'fps': None,
+            'gop': None,
+            'keyframe_interval_ms': None,
+            'bitrate_bps': None,
+            'nalu_sizes': None,
+            'cts': None,
+            'width': self.width,
+            'height': self.height,
+            'audio': None,
+            'av_sync': None,
+            'metadata': self.metadata,
+            'metadata_mismatches': None,
+        }
+        if len(ts) > 1 and ts[-1] > ts[0]:
+            result['fps'] = round(float((len(ts) - 1) * 1000.0 / (ts[-1] - ts[0])), 3)
+
+        key_positions = np.flatnonzero(keyframe_mask)
+        if len(key_positions) > 1:
+            result['gop'] = _describe(np, np.diff(key_positions))
+            result['keyframe_interval_ms'] = _describe(np, np.diff(ts[key_positions]))
+
+        if len(ts):
+            seconds = np.maximum(ts - ts[0], 0) // 1000
+            per_second = np.bincount(seconds, weights=sizes) * 8
+            # 最后一秒通常不完整，有完整秒时不计入
+            if len(per_second) > 1:
+                per_second = per_second[:-1]
+            result['bitrate_bps'] = _describe(np, per_second)
+
+        if len(c['nalu_sizes']):
+            nalu_types = c['nalu_types']
+            nalu_sizes = c['nalu_sizes']
+            counts = np.bincount(nalu_types, minlength=32)
+            total_bytes = np.bincount(nalu_types, weights=nalu_sizes, minlength=32)
+            result['nalu_sizes'] = _describe(np, nalu_sizes)
+            result['nalu_sizes']['by_type'] = {
+                int(t): {'count': int(counts[t]), 'bytes': int(total_bytes[t])} for t in np.flatnonzero(counts)}
+
+        if len(ts) > 2:
+            # DTS 间隔的抖动，以及按 PTS (= DTS + CTS) 排序后的显示间隔抖动
+            pts = np.sort(ts + cts)
+            result['cts'] = {
+                'min': int(cts.min()),
+                'max': int(cts.max()),
+                'reordered_frames': int((cts != 0).sum()),
+                'dts_interval_std_ms': round(float(np.diff(ts).std()), 3),
+                'pts_interval_std_ms': round(float(np.diff(pts).std()), 3),
+            }
+
+        if len(c['audio_timestamps']):
+            result['audio'] = self._compute_audio(np, c)
+            result['av_sync'] = self._compute_av_sync(np, c, ts)
+        if self.metadata is not None:
+            result['metadata_mismatches'] = self._metadata_mismatches(result, ts, sizes)
+        return result
+
+    def _compute_audio(self, np, c):
+        ts = c['audio_timestamps']
+        audio = {
+            'frames': int(len(ts)),
+            'format': self.audio_format,
+            'sample_rate': self.audio_sample_rate,
+            'channels': self.audio_channels,
+            'config_changes': self.audio_config_changes,
+            'duration_ms': int(ts[-1] - ts[0]),
+            'kbps': None,
+            'clock_drift_ms': None,
+        }
+        if ts[-1] > ts[0]:
+            audio['kbps'] = round(float(c['audio_sizes'][:-1].sum()) * 8 / float(ts[-1] - ts[0]), 1)
+        samples = c['audio_samples']
+        if self.audio_sample_rate and len(ts) > 1 and samples.all():
+            # 时间戳跨度与按采样数推算的时长之差: 正值表示时间戳走得比音频时钟快
+            decoded_ms = float(samples[:-1].sum(dtype=np.int64)) * 1000.0 / self.audio_sample_rate
+            audio['clock_drift_ms'] = round(float(ts[-1] - ts[0]) - decoded_ms, 3)
+        return audio
+
+    def _compute_av_sync(self, np, c, video_ts):
+        """
+        每个音频帧的时间戳减去文件中在它之前最近的视频帧时间戳 (交织偏移)，
+        以及这一偏移从开头 10% 到结尾 10% 的变化 (漂移)。
+        """
+        has_video = c['audio_video_ts'] >= 0
+        if not has_video.any() or not len(video_ts):
+            return None
+        offsets = c['audio_timestamps'][has_video] - c['audio_video_ts'][has_video]
+        edge = max(1, len(offsets) // 10)
+        return {
+            'start_offset_ms': int(c['audio_timestamps'][0] - video_ts[0]),
+            'end_offset_ms': int(c['audio_timestamps'][-1] - video_ts[-1]),
+            'interleave_offset_ms': _describe(np, offsets),
+            'drift_ms': float(np.median(offsets[-edge:]) - np.median(offsets[:edge])),
+        }
+
+    def _metadata_mismatches(self, result, ts, sizes):
+        """
+        比较 onMetaData 的声明值和实际值，返回 [{'field', 'declared', 'actual'}, ...]。
+        """
+        metadata = self.metadata
+        mismatches = []
+        def check(field, declared, actual, tolerance=0.0):
+            if declared is None or actual is None:
+                return
+            if abs(declared - actual) > tolerance * max(abs(declared), abs(actual)):
+                mismatches.append({'field': field, 'declared': declared, 'actual': actual})
+
+        check('width', metadata_value(metadata, 'width'), self.width)
+        check('height', metadata_value(metadata, 'height'), self.height)
+        check('framerate', metadata_value(metadata, 'framerate', 'videoframerate', 'fps'), result['fps'], FPS_TOLERANCE)
+        check('videocodecid', metadata_value(metadata, 'videocodecid'), self.codec_id)
+        if result['duration_ms']:
+            check('videodatarate', metadata_value(metadata, 'videodatarate'),
+                  round(float(sizes[:-1].sum()) * 8 / result['duration_ms'], 1), BITRATE_TOLERANCE)
+        audio = result['audio']
+        if audio is not None:
+            check('audiocodecid', metadata_value(metadata, 'audiocodecid'), self.audio_format)
+            check('audiosamplerate', metadata_value(metadata, 'audiosamplerate'), self.audio_sample_rate)
+            check('audiodatarate', metadata_value(metadata, 'audiodatarate'), audio['kbps'], BITRATE_TOLERANCE)
+            stereo = metadata.get('stereo')
+            if isinstance(stereo, bool) and self.audio_channels is not None and stereo != (self.audio_channels >= 2):
+                mismatches.append({'field': 'stereo', 'declared': stereo, 'actual': self.audio_channels >= 2})
+        last_ts = max(int(ts[-1]) if len(ts) else 0, int(self.audio_timestamps[-1]) if len(self.audio_timestamps) else 0)
+        check('duration', metadata_value(metadata, 'duration'), last_ts / 1000.0 if last_ts else None, DURATION_TOLERANCE)
+        return mismatches
+
+
+def _describe(np, values):
+    values = np.asarray(values, dtype=np.float64)
+    percentiles = np.percentile(values, PERCENTILES)
+    out = {
+        'count': int(len(values)),
+        'min': float(values.min()),
+        'max': float(values.max()),
+        'mean': round(float(values.mean()), 3),
+        'std': round(float(values.std()), 3),
+    }
+    for p, v in zip(PERCENTILES, percentiles):
+        out[f'p{p}'] = float(v)
+    return out
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Columnar GOP / bitrate / NALU size / CTS statistics for FLV recordings.")
+    parser.add_argument("files", nargs="+", help="FLV recordings")
+    parser.add_argument("--no-nalus", action="store_true", help="skip the per-NALU size distribution")
+    parser.add_argument("--no-metadata", action="store_true", help="leave out the raw onMetaData object")
+    args = parser.parse_args(argv)
+
+    report = {}
+    for path in args.files:
+        collector = StreamStatsCollector(collect_nalus=not args.no_nalus)
+        collector.add_flv_file(path)
+        report[path] = collector.compute()
+        if args.no_metadata:
+            report[path].pop('metadata')
+    json.dump(report, sys.stdout, indent=2)
+    sys.stdout.write("\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,107 @@
+"""
+BitReader 以及 SPS / PPS 解析的测试。码流由 bench_parser 的 BitWriter / make_sps / make_pps 生成。
+
+    python -m unittest test_bitreader      (在 media/ 目录下)
+"""
+import unittest
+
+from bench_parser import BitWriter, add_emulation_prevention, make_pps, make_sps
+from rtmp_video.bitreader import BitReader
+from rtmp_video.h264 import parse_h264_pps, parse_h264_sps
+
+
+def _read_all(reader, widths):
+    values = []
+    for width in widths:
+        values.append(reader.read_bits(width))
+    return values
+
+
+class BitReaderTest(unittest.TestCase):
+    def test_exp_golomb_round_trip(self):
+        w = BitWriter()
+        values = [(i * 37) % 5000 for i in range(300)]
+        for value in values:
+            w.write_ue(value)
+            w.write_se(value - 2500)
+            w.write_bits(value & 0x7F, 7)
+        w.write_trailing_bits()
+        reader = BitReader(w.to_bytes())
+        for value in values:
+            self.assertEqual(reader.read_ue(), value)
+            self.assertEqual(reader.read_se(), value - 2500)
+            self.assertEqual(reader.read_bits(7), value & 0x7F)
+
+    def test_emulation_prevention_bytes_are_skipped(self):
+        rbsp = bytes([0x00, 0x00, 0x01, 0x00, 0x00, 0x00, 0x00, 0x00, 0x03, 0xAB] * 3)
+        nalu = add_emulation_prevention(rbsp)
+        self.assertGreater(len(nalu), len(rbsp))
+        # 各种宽度读取都要跨过缓存边界和防竞争字节
+        for width in (1, 3, 8, 13, 24):
+            reader = BitReader(nalu, rbsp=True)
+            count = len(rbsp) * 8 // width
+            expected = BitReader(rbsp)
+            self.assertEqual(_read_all(reader, [width] * count), _read_all(expected, [width] * count), f"width {width}")
+        reader = BitReader(nalu, rbsp=True)
+        reader.read_bits(len(rbsp) * 8)
+        self.assertEqual(reader.byte_pos, len(nalu))
+
+    def test_more_rbsp_data(self):
+        # (数据, 已读取的比特数, 期望值)
+        cases = [
+            (b'\x12\x34\x80', 15, True),
+            (b'\x12\x34\x80', 16, False),
+            (b'\xa8\x00\x00\x03', 3, True),                     # 末尾是 cabac_zero_word，不是 stop bit
+            (b'\xa8\x00\x00\x03', 4, False),
+            (b'\xa8\x00\x00\x03\x00\x00\x03\x00', 4, False),
+            (b'\xff' * 8 + b'\x00\x00\x03\x01\x80', 64, True),  # 防竞争字节还没有装载
+            (b'\xff' * 8 + b'\x00\x00\x03\x01\x80', 87, True),
+            (b'\xff' * 8 + b'\x00\x00\x03\x01\x80', 88, False),
+            (b'\x00\x00\x03\x03', 22, True),
+            (b'\x00\x00\x03\x03', 23, False),
+            (b'\x00\x00', 0, False),
+        ]
+        for data, consumed, expected in cases:
+            reader = BitReader(data, rbsp=True)
+            _read_all(reader, [1] * consumed)
+            self.assertEqual(reader.more_rbsp_data(), expected, f"{data.hex()} after {consumed} bits")
+
+
+class ParameterSetTest(unittest.TestCase):
+    def test_sps_with_scaling_lists_hrd_and_bitstream_restriction(self):
+        sps = parse_h264_sps(make_sps(1920, 1080, level_idc=42, scaling_matrix=True, hrd=True, max_num_reorder_frames=2))
+        self.assertEqual((sps.cropped_width, sps.cropped_height), (1920, 1080))
+        self.assertEqual(sps.frame_rate, 30.0)
+        self.assertEqual(len(sps.scaling_lists), 8)
+        self.assertEqual(sps.scaling_lists[1], 'default')
+        self.assertEqual(sps.scaling_lists[0][:4], (16, 19, 22, 25))
+        self.assertEqual(len(sps.scaling_lists[7]), 64)
+        vui = sps.vui_parameters
+        self.assertEqual((vui['max_num_reorder_frames'], vui['max_dec_frame_buffering']), (2, 4))
+        for name in ('nal_hrd_parameters', 'vcl_hrd_parameters'):
+            cpb = vui[name]['cpb'][0]
+            self.assertEqual((cpb['bit_rate_value_minus1'], cpb['cpb_size_value_minus1']), (124999, 999999))
+
+    def test_sps_variants(self):
+        for params in (dict(width=1280, height=720, profile_idc=77, level_idc=31),
+                       dict(width=3840, height=2160, profile_idc=110, bit_depth=10, sar=(4, 3)),
+                       dict(width=1920, height=1080, frame_mbs_only=0, poc_type=1),
+                       dict(width=640, height=360, profile_idc=66, vui=False)):
+            sps = parse_h264_sps(make_sps(**params))
+            self.assertIsNotNone(sps, params)
+            self.assertEqual((sps.cropped_width, sps.cropped_height), (params['width'], params['height']), params)
+
+    def test_pps_slice_group_map(self):
+        pps = parse_h264_pps(make_pps(cabac=0, transform_8x8=False, slice_group_map_units=396))
+        self.assertEqual(pps.entropy_coding_mode_flag, 0)
+        self.assertEqual(pps.slice_group_map_type, 6)
+        self.assertEqual(list(pps.slice_group_id), [i % 4 for i in range(396)])
+
+    def test_pps_transform_8x8(self):
+        pps = parse_h264_pps(make_pps())
+        self.assertEqual(pps.transform_8x8_mode_flag, 1)
+        self.assertEqual(pps.second_chroma_qp_index_offset, -2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,135 @@
+"""
+RtmpChunkParser 的测试：encode_message 的输出按各种方式切开后 feed() 回来，
+以及手工拼出的 fmt 1/2/3 头、交错的 chunk stream、中途的 Set Chunk Size 和 Abort。
+
+    python -m unittest test_rtmp_chunk      (在 media/ 目录下)
+"""
+import struct
+import unittest
+
+from rtmp_chunk import (RTMP_DEFAULT_CHUNK_SIZE, RTMP_HANDSHAKE_SIZE, RTMP_MSG_ABORT, RTMP_MSG_AUDIO,
+                        RTMP_MSG_SET_CHUNK_SIZE, RtmpChunkParser, encode_message)
+
+
+def _payload(size, seed=0):
+    return bytes((i * 7 + seed) & 0xFF for i in range(size))
+
+
+def _chunk(fmt, csid, body, timestamp=0, length=None, type_id=RTMP_MSG_AUDIO, stream_id=1):
+    """
+    拼一个 chunk (csid < 64)：fmt 0 写完整消息头，fmt 1 不写 stream id，fmt 2 只写时间戳增量，fmt 3 没有消息头。
+    """
+    out = bytearray([(fmt << 6) | csid])
+    if fmt <= 2:
+        out += timestamp.to_bytes(3, 'big')
+    if fmt <= 1:
+        out += (len(body) if length is None else length).to_bytes(3, 'big')
+        out.append(type_id)
+    if fmt == 0:
+        out += struct.pack('<I', stream_id)
+    return bytes(out + body)
+
+
+def _feed_all(parser, pieces):
+    messages = []
+    for piece in pieces:
+        messages.extend(parser.feed(piece))
+    return messages
+
+
+def _summary(messages):
+    return [(m.csid, m.timestamp, m.type_id, m.stream_id, bytes(m.payload)) for m in messages]
+
+
+class EncodeRoundTripTest(unittest.TestCase):
+    def _messages(self):
+        # (csid, timestamp, type_id, stream_id, payload)：1/2/3 字节的 basic header，扩展时间戳，跨多个 chunk
+        return [
+            (3, 0, RTMP_MSG_AUDIO, 1, _payload(10)),
+            (4, 1000, RTMP_MSG_AUDIO, 1, _payload(300, 1)),
+            (70, 0x1234567, RTMP_MSG_AUDIO, 5, _payload(RTMP_DEFAULT_CHUNK_SIZE * 2, 2)),
+            (400, 42, RTMP_MSG_AUDIO, 1, _payload(129, 3)),
+            (5, 0xFFFFFF, RTMP_MSG_AUDIO, 1, b''),
+        ]
+
+    def _stream(self):
+        return b''.join(encode_message(*message) for message in self._messages())
+
+    def test_single_feed(self):
+        messages = RtmpChunkParser(parse_video=False).feed(self._stream())
+        self.assertEqual(_summary(messages), self._messages())
+
+    def test_split_at_every_byte(self):
+        data = self._stream()
+        for split in range(1, len(data)):
+            parser = RtmpChunkParser(parse_video=False)
+            messages = _feed_all(parser, (data[:split], data[split:]))
+            self.assertEqual(_summary(messages), self._messages(), f"split at {split}")
+            self.assertEqual(parser.buffered(), 0)
+
+    def test_one_byte_at_a_time(self):
+        data = self._stream()
+        parser = RtmpChunkParser(parse_video=False)
+        messages = _feed_all(parser, (data[i : i + 1] for i in range(len(data))))
+        self.assertEqual(_summary(messages), self._messages())
+        self.assertEqual(parser.bytes_received, len(data))
+
+    def test_skip_handshake(self):
+        data = b'\x03' * RTMP_HANDSHAKE_SIZE + self._stream()
+        parser = RtmpChunkParser(skip_handshake=True, parse_video=False)
+        messages = _feed_all(parser, (data[i : i + 1000] for i in range(0, len(data), 1000)))
+        self.assertEqual(_summary(messages), self._messages())
+
+
+class ChunkHeaderTest(unittest.TestCase):
+    def test_compressed_headers_accumulate_timestamp_deltas(self):
+        data = (_chunk(0, 4, b'a' * 10, timestamp=1000)
+                + _chunk(1, 4, b'b' * 20, timestamp=33)     # 新的长度，增量 33
+                + _chunk(2, 4, b'c' * 20, timestamp=40)     # 沿用长度，增量 40
+                + _chunk(3, 4, b'd' * 20))                  # 新消息，沿用增量 40
+        messages = RtmpChunkParser(parse_video=False).feed(data)
+        self.assertEqual([(m.timestamp, bytes(m.payload)) for m in messages],
+                         [(1000, b'a' * 10), (1033, b'b' * 20), (1073, b'c' * 20), (1113, b'd' * 20)])
+        self.assertEqual({m.stream_id for m in messages}, {1})
+
+    def test_interleaved_chunk_streams(self):
+        audio, video = _payload(300, 1), _payload(200, 2)
+        data = (_chunk(0, 4, audio[:128], timestamp=10, length=300)
+                + _chunk(0, 6, video[:128], timestamp=20, length=200, type_id=RTMP_MSG_AUDIO, stream_id=2)
+                + _chunk(3, 4, audio[128:256])
+                + _chunk(3, 6, video[128:])
+                + _chunk(3, 4, audio[256:]))
+        for split in range(1, len(data)):
+            messages = _feed_all(RtmpChunkParser(parse_video=False), (data[:split], data[split:]))
+            self.assertEqual(_summary(messages),
+                             [(6, 20, RTMP_MSG_AUDIO, 2, video), (4, 10, RTMP_MSG_AUDIO, 1, audio)], f"split at {split}")
+
+    def test_set_chunk_size_takes_effect_mid_stream(self):
+        payload = _payload(3000)
+        data = (encode_message(2, 0, RTMP_MSG_SET_CHUNK_SIZE, 0, struct.pack('>I', 4096))
+                + encode_message(4, 0, RTMP_MSG_AUDIO, 1, payload, chunk_size=4096)
+                + encode_message(2, 0, RTMP_MSG_SET_CHUNK_SIZE, 0, struct.pack('>I', 100), chunk_size=4096)
+                + encode_message(4, 0, RTMP_MSG_AUDIO, 1, payload, chunk_size=100))
+        for pieces in ([data], [data[i : i + 7] for i in range(0, len(data), 7)]):
+            parser = RtmpChunkParser(parse_video=False)
+            messages = _feed_all(parser, pieces)
+            self.assertEqual([m.type_id for m in messages],
+                             [RTMP_MSG_SET_CHUNK_SIZE, RTMP_MSG_AUDIO, RTMP_MSG_SET_CHUNK_SIZE, RTMP_MSG_AUDIO])
+            self.assertEqual(bytes(messages[1].payload), payload)
+            self.assertEqual(bytes(messages[3].payload), payload)
+            self.assertEqual(parser.chunk_size, 100)
+
+    def test_abort_discards_partial_message(self):
+        fresh = _payload(50, 9)
+        data = (_chunk(0, 6, _payload(128), timestamp=5, length=300)   # 只到了第一个 chunk
+                + encode_message(2, 0, RTMP_MSG_ABORT, 0, struct.pack('>I', 6))
+                + _chunk(0, 6, fresh, timestamp=7))
+        for split in range(1, len(data)):
+            messages = _feed_all(RtmpChunkParser(parse_video=False), (data[:split], data[split:]))
+            self.assertEqual(_summary(messages),
+                             [(2, 0, RTMP_MSG_ABORT, 0, struct.pack('>I', 6)), (6, 7, RTMP_MSG_AUDIO, 1, fresh)],
+                             f"split at {split}")
+
+
+if __name__ == '__main__':
+    unittest.main()